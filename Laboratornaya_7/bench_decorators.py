@@ -0,0 +1,101 @@
+"""
+Накладные расходы декоратора logger на один вызов.
+
+Запуск: python bench_decorators.py [--calls 100000] [--disk-calls 1000]
+"""
+
+import argparse
+import io
+import os
+import logging
+import tempfile
+import time
+import timeit
+
+from decorators import AsyncLogSink, flush_logs, logger, timed
+from metrics import MetricsRegistry
+
+
+class SyncedFileHandler(logging.FileHandler):
+    """FileHandler с fsync после каждой записи (медленный диск)."""
+
+    def flush(self):
+        super().flush()
+        if self.stream:
+            os.fsync(self.stream.fileno())
+
+
+def add(a, b):
+    return a + b
+
+
+def file_logger(name: str, log_dir: str) -> logging.Logger:
+    """Логгер с SyncedFileHandler."""
+    disk_logger = logging.getLogger(f"bench.disk.{name}")
+    disk_logger.setLevel(logging.INFO)
+    disk_logger.propagate = False
+    disk_logger.addHandler(SyncedFileHandler(os.path.join(log_dir, f"{name}.log"), encoding='utf-8'))
+    return disk_logger
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк декоратора logger")
+    parser.add_argument('--calls', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--disk-calls', type=int, default=1000)
+    args = parser.parse_args()
+
+    quiet = logging.getLogger("bench.quiet")
+    quiet.setLevel(logging.WARNING)
+    quiet.propagate = False
+    loud = logging.getLogger("bench.loud")
+    loud.setLevel(logging.INFO)
+    loud.propagate = False
+    loud.addHandler(logging.StreamHandler(io.StringIO()))
+
+    # Файловый поток: flush() после каждого сообщения - системный вызов
+    devnull = open(os.devnull, 'w', encoding='utf-8')
+    big = list(range(1000))
+    enabled_registry = MetricsRegistry()
+    disabled_registry = MetricsRegistry(enabled=False)
+    cases = [
+        ("без декоратора", add, (1, 2)),
+        ("Logger, уровень отключён", logger(handle=quiet)(add), (1, 2)),
+        ("Logger, выборка 1%", logger(handle=loud, sample_rate=0.01)(add), (1, 2)),
+        ("Logger, каждый вызов", logger(handle=loud)(add), (1, 2)),
+        ("timed", timed(registry=enabled_registry)(add), (1, 2)),
+        ("timed, реестр выключен", timed(registry=disabled_registry)(add), (1, 2)),
+        ("поток, flush на запись", logger(handle=devnull)(add), (1, 2)),
+        ("поток, пачки по 256", logger(handle=devnull, batch_size=256)(add), (1, 2)),
+        ("поток, список 1000", logger(handle=devnull)(add), (big, [])),
+        ("поток, список, max_repr=80",
+         logger(handle=devnull, max_repr=80)(add), (big, [])),
+    ]
+
+    print(f"{args.calls} вызовов, лучшее из {args.repeat}, нс на вызов")
+    for title, func, call_args in cases:
+        seconds = min(timeit.repeat(lambda: func(*call_args), number=args.calls, repeat=args.repeat))
+        print(f"{title:<30}{seconds / args.calls * 1e9:>12.0f}")
+    flush_logs()
+    devnull.close()
+
+    # Медленный диск: вызывающий поток ждёт fsync или только кладёт запись в очередь
+    log_dir = tempfile.mkdtemp()
+    sync_logger = file_logger("sync", log_dir)
+    queued_logger = file_logger("queued", log_dir)
+    sink = AsyncLogSink(queued_logger, max_size=2 * args.disk_calls + 1, overflow='block')
+    print()
+    print(f"FileHandler с fsync, {args.disk_calls} вызовов, мкс на вызов")
+    for title, disk_logger in (("синхронно", sync_logger), ("через очередь", queued_logger)):
+        func = logger(handle=disk_logger)(add)
+        start = time.perf_counter()
+        for _ in range(args.disk_calls):
+            func(1, 2)
+        elapsed = time.perf_counter() - start
+        print(f"{title:<30}{elapsed / args.disk_calls * 1e6:>12.1f}")
+    start = time.perf_counter()
+    sink.close()
+    print(f"{'дозапись очереди, с':<30}{time.perf_counter() - start:>12.2f}")
+    for disk_logger in (sync_logger, queued_logger):
+        for handler in disk_logger.handlers:
+            handler.close()
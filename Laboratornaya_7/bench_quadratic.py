@@ -0,0 +1,51 @@
+"""
+solve_quadratic_batch против цикла по solve_quadratic.
+
+Запуск: python bench_quadratic.py [--size 1000000]
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+
+from quadratic import solve_quadratic, solve_quadratic_batch
+
+
+def solve_loop(a, b, c):
+    return [solve_quadratic(*coefficients) for coefficients in zip(a, b, c)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк решения квадратных уравнений")
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--loop-size', type=int, default=100_000,
+                        help="Сколько уравнений решать циклом (время пересчитывается на --size)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    a = rng.uniform(0.5, 10, args.size) * rng.choice([-1, 1], args.size)
+    b = rng.uniform(-100, 100, args.size)
+    c = rng.uniform(-10, 10, args.size)
+    loop_size = min(args.loop_size, args.size)
+    loop_args = (a[:loop_size].tolist(), b[:loop_size].tolist(), c[:loop_size].tolist())
+
+    loop = min(timeit.repeat(lambda: solve_loop(*loop_args), number=1, repeat=args.repeat))
+    batch = min(timeit.repeat(lambda: solve_quadratic_batch(a, b, c), number=1, repeat=args.repeat))
+    loop_total = loop * args.size / loop_size
+    print(f"{args.size} уравнений, лучшее из {args.repeat}, мс")
+    print(f"{'цикл solve_quadratic':<26}{loop_total * 1000:>10.1f}"
+          f"  (измерено на {loop_size})")
+    print(f"{'solve_quadratic_batch':<26}{batch * 1000:>10.1f}")
+    print(f"{'ускорение':<26}{loop_total / batch:>10.0f}x")
+
+    # Точность меньшего корня при b² ≫ 4ac: точный корень x ≈ -c/b
+    print()
+    print(f"{'b':>8}{'(-b + √D) / 2a':>24}{'batch':>24}{'точный':>24}")
+    for power in (4, 6, 8, 10):
+        b_big = 10.0 ** power
+        x1, _, _ = solve_quadratic_batch(1.0, b_big, 1.0)
+        exact = -2.0 / (b_big + (b_big * b_big - 4.0) ** 0.5)
+        print(f"{b_big:>8.0e}{solve_quadratic(1.0, b_big, 1.0)[0]:>24.16e}"
+              f"{float(x1):>24.16e}{exact:>24.16e}")
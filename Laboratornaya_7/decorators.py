@@ -3,30 +3,603 @@
 Поддерживает разные типы обработчиков: sys.stdout, io.StringIO, logging.Logger.
 """
 
+import asyncio
+import atexit
 import functools
+import inspect
+import reprlib
 import sys
 import logging
-from typing import Callable, Any, Optional, Union
+import queue
+import threading
+import time
+import traceback
+import types
+from logging.handlers import QueueHandler
+from typing import Callable, Any, Dict, List, Optional, Union
 import io
 
+from metrics import MetricsRegistry, metrics
+
+
+class BatchedStream:
+    """
+    Буфер сообщений лога поверх потока с методом write().
+
+    Сообщения записываются в поток пачками по batch_size штук (или при
+    flush()), а не по одному с flush() после каждого.
+    """
+
+    def __init__(self, stream: io.IOBase, batch_size: int = 64):
+        """
+        Args:
+            stream: Поток, в который записываются пачки
+            batch_size: Сколько сообщений копить до записи
+        """
+        self.stream = stream
+        self.batch_size = batch_size
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+
+    def write(self, text: str) -> None:
+        """Добавить сообщение в буфер (и записать пачку, если она набралась)."""
+        with self._lock:
+            self._buffer.append(text)
+            if len(self._buffer) >= self.batch_size:
+                self._write_buffer()
+
+    def flush(self) -> None:
+        """Записать накопленные сообщения и сбросить поток."""
+        with self._lock:
+            self._write_buffer()
+            if hasattr(self.stream, 'flush'):
+                self.stream.flush()
+
+    def _write_buffer(self) -> None:
+        if self._buffer:
+            self.stream.write(''.join(self._buffer))
+            self._buffer.clear()
+
+
+# id потока -> его общий буфер (поток хранится в буфере, поэтому id не переиспользуется)
+_batched_streams: Dict[int, BatchedStream] = {}
+_registry_lock = threading.Lock()
+
+
+def batched_stream(stream: io.IOBase, batch_size: int = 64) -> BatchedStream:
+    """
+    Общий буфер для потока.
+
+    Все функции, пишущие в один поток, используют один буфер, поэтому
+    порядок сообщений сохраняется. Размер пачки задаёт первый вызов.
+    """
+    with _registry_lock:
+        buffered = _batched_streams.get(id(stream))
+        if buffered is None:
+            buffered = _batched_streams[id(stream)] = BatchedStream(stream, batch_size)
+        return buffered
+
+
+OVERFLOW_POLICIES = ('drop', 'block')
+
+# Сигнал остановки фонового потока
+_STOP = object()
+
+
+class _SinkQueueHandler(QueueHandler):
+    """QueueHandler, кладущий записи в очередь AsyncLogSink с учётом её политики."""
+
+    def __init__(self, sink: 'AsyncLogSink'):
+        super().__init__(sink._queue)
+        self.sink = sink
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Текст сообщения собирается сразу (аргументы могут измениться),
+        # а форматирование и копирование записи остаются обработчикам
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.sink._put(record)
+
+
+def _ancestor_handlers(log: Optional[logging.Logger]) -> List[logging.Handler]:
+    """Обработчики логгера и его предков с учётом propagate (как Logger.callHandlers)."""
+    handlers: List[logging.Handler] = []
+    current = log
+    while current is not None:
+        handlers.extend(current.handlers)
+        if not current.propagate:
+            break
+        current = current.parent
+    return handlers
+
+
+class AsyncLogSink:
+    """
+    Запись лога через ограниченную очередь и фоновый поток.
+
+    Вызывающий поток только кладёт сообщение в очередь, а запись на диск
+    выполняет фоновый поток; всё, что накопилось в очереди, он записывает
+    за один раз.
+
+    Для потока (sys.stdout, файл) объект подставляется вместо него: метод
+    write() кладёт текст в очередь. Для logging.Logger записи кладутся в
+    очередь методом log(), а фоновый поток передаёт их logger.handle() -
+    обработчики логгера и предков определяются в момент записи, поэтому
+    настройка logging после создания очереди (например, basicConfig)
+    учитывается. Сам логгер при этом не меняется.
+
+    С attach=True обработчики логгера переносятся в фоновый поток (как в
+    QueueListener), а к логгеру подключается QueueHandler - логгер
+    используется как обычно. Передача записей предкам на время работы
+    отключается: их обработчики тоже вызываются из фонового потока.
+
+    При переполнении очереди:
+        - overflow='drop': сообщение отбрасывается и учитывается в dropped;
+        - overflow='block': вызывающий поток ждёт места в очереди (не
+          дольше timeout секунд, затем сообщение отбрасывается).
+
+    Очереди, созданные через async_sink() (и декоратором), дописываются
+    при завершении программы; собственный экземпляр нужно закрыть close().
+    """
+
+    def __init__(self, handle: Union[io.IOBase, logging.Logger], max_size: int = 10_000,
+                 overflow: str = 'drop', timeout: Optional[float] = None,
+                 attach: bool = True):
+        """
+        Args:
+            handle: Поток или logging.Logger, в который выполняется запись
+            max_size: Ёмкость очереди в сообщениях
+            overflow: Политика при переполнении: 'drop' или 'block'
+            timeout: Наибольшее ожидание для 'block' (None - без ограничения)
+            attach: Для logging.Logger: перенести его обработчики в фоновый
+                поток, чтобы через очередь шли все его записи
+
+        Raises:
+            ValueError: При неизвестной политике или неположительной ёмкости
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Неизвестная политика переполнения: {overflow}")
+        if max_size < 1:
+            raise ValueError("max_size должен быть положительным")
+        self.handle = handle
+        self.overflow = overflow
+        self.timeout = timeout
+        self.dropped = 0
+        self._queue: 'queue.Queue[Any]' = queue.Queue(max_size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._attached = attach and isinstance(handle, logging.Logger)
+        if self._attached:
+            self._own_handlers = list(handle.handlers)
+            self._propagate = handle.propagate
+            self._queue_handler = _SinkQueueHandler(self)
+            for handler in self._own_handlers:
+                handle.removeHandler(handler)
+            # Обработчики предков уже вызываются из фонового потока
+            handle.propagate = False
+            handle.addHandler(self._queue_handler)
+
+        self._thread = threading.Thread(target=self._run, name='async-log-sink', daemon=True)
+        self._thread.start()
+
+    def write(self, text: str) -> None:
+        """Положить текст в очередь (после close() - записать сразу)."""
+        if self._closed:
+            self._write([text])
+        else:
+            self._put(text)
+
+    def log(self, level: int, msg: str, *args: Any) -> None:
+        """Положить в очередь запись логгера (как logger.log(), без поиска места вызова)."""
+        log = self.handle
+        if not log.isEnabledFor(level):
+            return
+        record = log.makeRecord(log.name, level, "(unknown file)", 0, msg, args, None)
+        # Текст собирается сразу: аргументы могут измениться до записи
+        record.msg = record.getMessage()
+        record.args = None
+        if self._closed:
+            self._write([record])
+        else:
+            self._put(record)
+
+    def flush(self) -> None:
+        """Дождаться записи всего, что уже лежит в очереди."""
+        if not self._closed:
+            self._queue.join()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Записать остаток очереди и остановить фоновый поток.
+
+        Обработчики логгера возвращаются на место, дальнейшая запись
+        выполняется синхронно.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        # Сигнал остановки кладётся в очередь независимо от политики
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._attached:
+            self.handle.removeHandler(self._queue_handler)
+            for handler in self._own_handlers:
+                self.handle.addHandler(handler)
+            self.handle.propagate = self._propagate
+        # То, что попало в очередь во время остановки
+        leftovers = []
+        while True:
+            try:
+                leftovers.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._write(leftovers)
+        with _registry_lock:
+            if _async_sinks.get(id(self.handle)) is self:
+                del _async_sinks[id(self.handle)]
+
+    def _put(self, item: Any) -> None:
+        try:
+            if self.overflow == 'block':
+                self._queue.put(item, timeout=self.timeout)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            # Всё накопившееся записывается за один раз
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(items)
+            except Exception:
+                # Фоновый поток не должен останавливаться из-за ошибки записи
+                traceback.print_exc()
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+            if any(item is _STOP for item in items):
+                return
+
+    def _write(self, items: List[Any]) -> None:
+        texts = []
+        for item in items:
+            if isinstance(item, logging.LogRecord):
+                self._handle_record(item)
+            elif item is not _STOP:
+                texts.append(item)
+        if texts:
+            self.handle.write(''.join(texts))
+            if hasattr(self.handle, 'flush'):
+                self.handle.flush()
+
+    def _handle_record(self, record: logging.LogRecord) -> None:
+        if not self._attached:
+            self.handle.handle(record)
+            return
+        # Обработчики предков ищутся при записи, а не при создании очереди
+        handlers = list(self._own_handlers)
+        if self._propagate:
+            handlers.extend(_ancestor_handlers(self.handle.parent))
+        if not handlers and logging.lastResort is not None:
+            handlers.append(logging.lastResort)
+        for handler in handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+# id потока или логгера -> его общий AsyncLogSink
+_async_sinks: Dict[int, AsyncLogSink] = {}
+
+
+def async_sink(handle: Union[io.IOBase, logging.Logger], max_size: int = 10_000,
+               overflow: str = 'drop', timeout: Optional[float] = None) -> AsyncLogSink:
+    """
+    Общий AsyncLogSink для потока или логгера.
+
+    Параметры очереди задаёт первый вызов. Логгер не меняется: его записи
+    кладутся в очередь методом log() общего экземпляра.
+    """
+    with _registry_lock:
+        sink = _async_sinks.get(id(handle))
+        if sink is None:
+            sink = _async_sinks[id(handle)] = AsyncLogSink(handle, max_size, overflow, timeout,
+                                                           attach=False)
+        return sink
+
+
+@atexit.register
+def flush_logs() -> None:
+    """Записать сообщения из всех общих буферов и очередей (вызывается и при выходе)."""
+    with _registry_lock:
+        buffers = list(_batched_streams.values()) + list(_async_sinks.values())
+    for buffered in buffers:
+        try:
+            buffered.flush()
+        except ValueError:
+            # Поток уже закрыт
+            pass
+
+
+@functools.lru_cache(maxsize=None)
+def _repr_for(max_repr: int) -> reprlib.Repr:
+    limited = reprlib.Repr()
+    limited.maxstring = limited.maxother = limited.maxlong = max_repr
+    return limited
+
+
+def _short_repr(value: Any, max_repr: Optional[int]) -> str:
+    """repr() значения, обрезанный до max_repr символов (None - без обрезки)."""
+    if max_repr is None:
+        return repr(value)
+    # reprlib не строит repr длинных строк и коллекций целиком
+    text = _repr_for(max_repr).repr(value)
+    return text if len(text) <= max_repr else text[:max_repr - 3] + '...'
+
+
+def _format_signature(args: tuple, kwargs: dict, max_repr: Optional[int]) -> str:
+    args_repr = [_short_repr(a, max_repr) for a in args]
+    kwargs_repr = [f"{k}={_short_repr(v, max_repr)}" for k, v in kwargs.items()]
+    return ", ".join(args_repr + kwargs_repr)
+
+
+class _LazySignature:
+    """Аргументы вызова, которые переводятся в строку только при выводе сообщения."""
+
+    __slots__ = ('args', 'kwargs', 'max_repr')
+
+    def __init__(self, args: tuple, kwargs: dict, max_repr: Optional[int]):
+        self.args = args
+        self.kwargs = kwargs
+        self.max_repr = max_repr
+
+    def __str__(self) -> str:
+        return _format_signature(self.args, self.kwargs, self.max_repr)
+
+
+class _LazyRepr:
+    """Значение, repr() которого строится только при выводе сообщения."""
+
+    __slots__ = ('value', 'max_repr')
+
+    def __init__(self, value: Any, max_repr: Optional[int]):
+        self.value = value
+        self.max_repr = max_repr
+
+    def __str__(self) -> str:
+        return _short_repr(self.value, self.max_repr)
+
+
+class _Sampler:
+    """
+    Равномерная выборка: из каждых 1/rate вызовов логируется один, начиная с первого.
+
+    Счётчик не блокируется: при вызовах из нескольких потоков доля
+    логируемых вызовов может немного отличаться от rate.
+    """
+
+    __slots__ = ('rate', 'credit')
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.credit = 1.0 - rate if rate > 0 else 0.0
+
+    def __call__(self) -> bool:
+        self.credit += self.rate
+        if self.credit >= 1.0:
+            self.credit -= 1.0
+            return True
+        return False
+
+
+def _call_kind(func: Callable) -> Optional[str]:
+    """'coroutine', 'async_generator', 'generator' или None для обычной функции."""
+    if inspect.iscoroutinefunction(func):
+        return 'coroutine'
+    if inspect.isasyncgenfunction(func):
+        return 'async_generator'
+    if inspect.isgeneratorfunction(func):
+        return 'generator'
+    return None
+
+
+class _Progress:
+    """Ход выполнения генератора или корутины: выданные элементы и процессорное время."""
+
+    __slots__ = ('items', 'cpu_ns', 'measure_cpu')
+
+    def __init__(self, measure_cpu: bool = False):
+        self.items = 0
+        self.cpu_ns = 0
+        self.measure_cpu = measure_cpu
+
+
+@types.coroutine
+def _delegate(iterator: Any, progress: _Progress, count_items: bool = True):
+    """
+    Передать управление итератору, как yield from, учитывая каждый шаг.
+
+    Работает и для генераторов, и для корутин (ожидается через await).
+    Процессорное время считается только внутри шагов итератора, а не пока
+    он приостановлен.
+
+    Returns:
+        Значение, с которым завершился итератор
+    """
+    value, error = None, None
+    while True:
+        cpu = time.thread_time_ns() if progress.measure_cpu else 0
+        try:
+            item = iterator.send(value) if error is None else iterator.throw(error)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            if progress.measure_cpu:
+                progress.cpu_ns += time.thread_time_ns() - cpu
+        if count_items:
+            progress.items += 1
+        value, error = None, None
+        try:
+            value = yield item
+        except GeneratorExit:
+            iterator.close()
+            raise
+        except BaseException as e:
+            error = e
+
+
+def _observe(inner_func: Callable, kind: str, start: Callable, finish: Callable,
+             fail: Callable, measure_cpu: bool = False) -> Callable:
+    """
+    Обёртка корутины или генератора, сообщающая о фактическом завершении.
+
+    start(args, kwargs) вызывается, когда выполнение действительно начинается
+    (для генераторов - при первом запросе элемента), и возвращает состояние.
+    Затем вызывается одно из двух:
+        - finish(состояние, результат, progress, interrupted) - после
+          завершения; interrupted истинно, если генератор закрыли до конца
+          или корутину отменили;
+        - fail(состояние, исключение, progress) - при исключении.
+    Элементы генераторов передаются по одному, без предварительного чтения.
+    """
+    if kind == 'coroutine':
+        @functools.wraps(inner_func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            state = start(args, kwargs)
+            progress = _Progress(measure_cpu)
+            try:
+                result = await _delegate(inner_func(*args, **kwargs), progress, False)
+            except asyncio.CancelledError:
+                finish(state, None, progress, True)
+                raise
+            except Exception as e:
+                fail(state, e, progress)
+                raise
+            finish(state, result, progress, False)
+            return result
+
+    elif kind == 'generator':
+        @functools.wraps(inner_func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            state = start(args, kwargs)
+            progress = _Progress(measure_cpu)
+            try:
+                result = yield from _delegate(inner_func(*args, **kwargs), progress)
+            except GeneratorExit:
+                finish(state, None, progress, True)
+                raise
+            except Exception as e:
+                fail(state, e, progress)
+                raise
+            finish(state, result, progress, False)
+            return result
+
+    else:
+        @functools.wraps(inner_func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            state = start(args, kwargs)
+            progress = _Progress(measure_cpu)
+            generator = inner_func(*args, **kwargs)
+            value, error = None, None
+            try:
+                while True:
+                    step = generator.asend(value) if error is None else generator.athrow(error)
+                    try:
+                        item = await _delegate(step, progress, False)
+                    except StopAsyncIteration:
+                        break
+                    progress.items += 1
+                    value, error = None, None
+                    try:
+                        value = yield item
+                    except GeneratorExit:
+                        await generator.aclose()
+                        raise
+                    except BaseException as e:
+                        error = e
+            except (GeneratorExit, asyncio.CancelledError):
+                finish(state, None, progress, True)
+                raise
+            except Exception as e:
+                fail(state, e, progress)
+                raise
+            finish(state, None, progress, False)
+
+    return wrapper
+
+
+def _outcome(name: str, kind: Optional[str], result: str, progress: _Progress,
+             interrupted: bool) -> str:
+    """Текст сообщения о завершении корутины или генератора."""
+    items = f" Элементов: {progress.items}." if kind in ('generator', 'async_generator') else ""
+    if interrupted:
+        return f"Функция {name} прервана до завершения.{items}"
+    return f"Функция {name} завершилась успешно.{items} Результат: {result}"
+
 
 def logger(
         func: Optional[Callable] = None,
         *,
-        handle: Union[io.IOBase, logging.Logger] = sys.stdout
+        handle: Union[io.IOBase, logging.Logger] = sys.stdout,
+        level: int = logging.INFO,
+        max_repr: Optional[int] = None,
+        sample_rate: float = 1.0,
+        batch_size: int = 1,
+        queue_size: int = 0,
+        overflow: str = 'drop'
 ) -> Callable:
     """
     Параметризованный декоратор для логирования вызовов функций.
 
+    Для logging.Logger сообщения о вызове и результате формируются лениво:
+    сначала проверяется isEnabledFor(level), а repr() аргументов и
+    результата строится, только если запись действительно выводится.
+    Ошибки логируются всегда, независимо от выборки.
+
+    Корутины, асинхронные генераторы и генераторы логируются по
+    фактическому завершению: сообщение об успехе выводится после await
+    или после выдачи последнего элемента (с их количеством), а закрытый
+    раньше времени генератор или отменённая корутина отмечаются как
+    прерванные.
+
     Args:
         func: Декорируемая функция (None при использовании с параметрами)
         handle: Объект для логирования. Может быть:
             - sys.stdout или io.StringIO (использует .write())
-            - logging.Logger (использует .info(), .error())
+            - logging.Logger (использует .log(), .error())
+        level: Уровень сообщений о вызове и результате для logging.Logger
+        max_repr: Максимальная длина repr() аргумента или результата
+            (None - без обрезки)
+        sample_rate: Доля логируемых вызовов от 0 до 1 (например, 0.01 -
+            каждый сотый вызов)
+        batch_size: Для потоков: сколько сообщений копить перед записью.
+            При batch_size > 1 поток не сбрасывается после каждого
+            сообщения; накопленное записывается при ошибке, вызове
+            flush_logs() и завершении программы
+        queue_size: Если больше 0, запись выполняется фоновым потоком через
+            очередь такой ёмкости (см. AsyncLogSink), вызывающий поток не
+            ждёт диска. Для потоков заменяет batch_size; логгер при этом не
+            меняется - записи передаются ему из фонового потока
+        overflow: Политика переполнения очереди: 'drop' или 'block'
 
     Returns:
         Декорированную функцию с логированием.
 
+    Raises:
+        ValueError: При недопустимых max_repr, sample_rate, batch_size или
+            параметрах очереди
+
     Примеры использования:
         @logger
         def f(): ...
@@ -39,58 +612,131 @@ def logger(
 
         @logger(handle=logging.getLogger("my_logger"))
         def f(): ...
+
+        @logger(handle=logging.getLogger("hot"), level=logging.DEBUG,
+                max_repr=80, sample_rate=0.01)
+        def f(): ...
+
+        @logger(handle=sys.stderr, batch_size=100)
+        def f(): ...
+
+        @logger(handle=logging.getLogger("file"), queue_size=10_000, overflow='block')
+        def f(): ...
     """
+    if max_repr is not None and max_repr < 4:
+        raise ValueError("max_repr должен быть не меньше 4")
+    if not 0.0 <= sample_rate <= 1.0:
+        raise ValueError("sample_rate должен быть в диапазоне от 0 до 1")
+    if batch_size < 1:
+        raise ValueError("batch_size должен быть положительным")
+    if queue_size < 0:
+        raise ValueError("queue_size не может быть отрицательным")
+    if overflow not in OVERFLOW_POLICIES:
+        raise ValueError(f"Неизвестная политика переполнения: {overflow}")
 
     def decorator(inner_func: Callable) -> Callable:
+        name = inner_func.__name__
+        # Выборка своя у каждой декорированной функции
+        sampled = _Sampler(sample_rate) if sample_rate < 1.0 else None
+        sink = async_sink(handle, queue_size, overflow) if queue_size else None
+
+        kind = _call_kind(inner_func)
+
+        if isinstance(handle, logging.Logger):
+            # Через очередь записи идут в обработчики логгера из фонового потока
+            log = sink.log if sink is not None else handle.log
+
+            if kind is not None:
+                def start(args: tuple, kwargs: dict) -> bool:
+                    traced = handle.isEnabledFor(level) and (sampled is None or sampled())
+                    if traced:
+                        log(level, "START: Вызов функции %s(%s)",
+                            name, _LazySignature(args, kwargs, max_repr))
+                    return traced
+
+                def finish(traced: bool, result: Any, progress: _Progress, interrupted: bool) -> None:
+                    if traced:
+                        log(level, "SUCCESS: %s", _outcome(
+                            name, kind, _short_repr(result, max_repr), progress, interrupted))
+
+                def fail(traced: bool, e: Exception, progress: _Progress) -> None:
+                    log(logging.ERROR, "ERROR: Ошибка в функции %s: %s: %s", name, type(e).__name__, e)
+
+                return _observe(inner_func, kind, start, finish, fail)
+
+            @functools.wraps(inner_func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                # Уровень проверяется до форматирования: отключённые сообщения почти ничего не стоят
+                traced = handle.isEnabledFor(level) and (sampled is None or sampled())
+                if traced:
+                    log(level, "START: Вызов функции %s(%s)",
+                        name, _LazySignature(args, kwargs, max_repr))
+                try:
+                    result = inner_func(*args, **kwargs)
+                except Exception as e:
+                    log(logging.ERROR, "ERROR: Ошибка в функции %s: %s: %s", name, type(e).__name__, e)
+                    # Повторно выбрасываем исключение
+                    raise
+                if traced:
+                    log(level, "SUCCESS: Функция %s завершилась успешно. Результат: %s",
+                        name, _LazyRepr(result, max_repr))
+                return result
+
+            return wrapper
+
+        # Логирование через метод write()
+        if sink is not None:
+            stream = sink
+        elif batch_size > 1:
+            stream = batched_stream(handle, batch_size)
+        else:
+            stream = handle
+        batched = isinstance(stream, BatchedStream)
+        # Буфер и очередь сами решают, когда писать в поток
+        flush_each = (not batched and not isinstance(stream, AsyncLogSink)
+                      and hasattr(stream, 'flush'))
+
+        def emit(message: str) -> None:
+            stream.write(message)
+            if flush_each:
+                stream.flush()
+
+        if kind is not None:
+            def start(args: tuple, kwargs: dict) -> bool:
+                traced = sampled is None or sampled()
+                if traced:
+                    emit(f"INFO: Вызов функции {name}({_format_signature(args, kwargs, max_repr)})\n")
+                return traced
+
+            def finish(traced: bool, result: Any, progress: _Progress, interrupted: bool) -> None:
+                if traced:
+                    result_repr = _short_repr(result, max_repr)
+                    emit(f"INFO: {_outcome(name, kind, result_repr, progress, interrupted)}\n")
+
+            def fail(traced: bool, e: Exception, progress: _Progress) -> None:
+                emit(f"ERROR: Ошибка в функции {name}: {type(e).__name__}: {str(e)}\n")
+                if batched:
+                    stream.flush()
+
+            return _observe(inner_func, kind, start, finish, fail)
+
         @functools.wraps(inner_func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
-            # Формируем строку с аргументами
-            args_repr = [repr(a) for a in args]
-            kwargs_repr = [f"{k}={v!r}" for k, v in kwargs.items()]
-            signature = ", ".join(args_repr + kwargs_repr)
-
-            # Логирование начала вызова
-            start_message = f"Вызов функции {inner_func.__name__}({signature})"
-
-            # Определяем тип обработчика и логируем соответствующим образом
-            if isinstance(handle, logging.Logger):
-                # Логирование через logging.Logger
-                handle.info(f"START: {start_message}")
-            else:
-                # Логирование через метод write()
-                handle.write(f"INFO: {start_message}\n")
-                if hasattr(handle, 'flush'):
-                    handle.flush()
-
+            traced = sampled is None or sampled()
+            if traced:
+                emit(f"INFO: Вызов функции {name}({_format_signature(args, kwargs, max_repr)})\n")
             try:
-                # Выполняем функцию
                 result = inner_func(*args, **kwargs)
-
-                # Логирование успешного завершения
-                success_message = f"Функция {inner_func.__name__} завершилась успешно. Результат: {result!r}"
-
-                if isinstance(handle, logging.Logger):
-                    handle.info(f"SUCCESS: {success_message}")
-                else:
-                    handle.write(f"INFO: {success_message}\n")
-                    if hasattr(handle, 'flush'):
-                        handle.flush()
-
-                return result
-
             except Exception as e:
-                # Логирование ошибки
-                error_message = f"Ошибка в функции {inner_func.__name__}: {type(e).__name__}: {str(e)}"
-
-                if isinstance(handle, logging.Logger):
-                    handle.error(f"ERROR: {error_message}")
-                else:
-                    handle.write(f"ERROR: {error_message}\n")
-                    if hasattr(handle, 'flush'):
-                        handle.flush()
-
-                # Повторно выбрасываем исключение
+                emit(f"ERROR: Ошибка в функции {name}: {type(e).__name__}: {str(e)}\n")
+                if batched:
+                    # Ошибка и предшествующие сообщения должны быть видны сразу
+                    stream.flush()
                 raise
+            if traced:
+                emit(f"INFO: Функция {name} завершилась успешно. "
+                     f"Результат: {_short_repr(result, max_repr)}\n")
+            return result
 
         return wrapper
 
@@ -107,10 +753,89 @@ def logger(
 def trace(
         func: Optional[Callable] = None,
         *,
-        handle: Union[io.IOBase, logging.Logger] = sys.stdout
+        handle: Union[io.IOBase, logging.Logger] = sys.stdout,
+        **options: Any
 ) -> Callable:
     """Альтернативное имя для декоратора logger (совместимость с примерами)."""
-    return logger(func, handle=handle)
+    return logger(func, handle=handle, **options)
+
+
+def timed(
+        func: Optional[Callable] = None,
+        *,
+        name: Optional[str] = None,
+        registry: Optional[MetricsRegistry] = None
+) -> Callable:
+    """
+    Декоратор, учитывающий время вызовов в гистограммах реестра метрик.
+
+    Для каждого вызова записываются время по часам (perf_counter_ns) и
+    процессорное время потока (thread_time_ns); вызовы, завершившиеся
+    исключением, учитываются и как ошибки. Пока registry.enabled ложно,
+    функция вызывается напрямую.
+
+    Для корутин и генераторов время по часам считается от начала
+    выполнения до фактического завершения, а процессорное время - только
+    пока выполняется их собственный код (без времени в приостановке).
+    Прерванные генераторы и отменённые корутины ошибками не считаются.
+
+    Args:
+        func: Декорируемая функция (None при использовании с параметрами)
+        name: Имя в реестре (по умолчанию - __qualname__ функции)
+        registry: Реестр метрик (по умолчанию - metrics.metrics)
+
+    Returns:
+        Декорированную функцию.
+
+    Примеры использования:
+        @timed
+        def f(): ...
+
+        @logger(handle=log)
+        @timed(name="cbr.get_currencies")
+        def get_currencies(codes): ...
+
+        print(metrics.to_prometheus())
+    """
+
+    def decorator(inner_func: Callable) -> Callable:
+        target = registry if registry is not None else metrics
+        entry = target.function(name or inner_func.__qualname__)
+        kind = _call_kind(inner_func)
+
+        if kind is not None:
+            def start(args: tuple, kwargs: dict) -> Optional[int]:
+                return time.perf_counter_ns() if target.enabled else None
+
+            def finish(wall: Optional[int], result: Any, progress: _Progress, interrupted: bool) -> None:
+                if wall is not None:
+                    entry.record(time.perf_counter_ns() - wall, progress.cpu_ns)
+
+            def fail(wall: Optional[int], e: Exception, progress: _Progress) -> None:
+                if wall is not None:
+                    entry.record(time.perf_counter_ns() - wall, progress.cpu_ns, True)
+
+            return _observe(inner_func, kind, start, finish, fail, measure_cpu=True)
+
+        @functools.wraps(inner_func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not target.enabled:
+                return inner_func(*args, **kwargs)
+            failed = True
+            wall = time.perf_counter_ns()
+            cpu = time.thread_time_ns()
+            try:
+                result = inner_func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                entry.record(time.perf_counter_ns() - wall, time.thread_time_ns() - cpu, failed)
+
+        return wrapper
+
+    if func is None:
+        return decorator
+    return decorator(func)
 
 
 if __name__ == "__main__":
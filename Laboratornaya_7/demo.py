@@ -5,7 +5,8 @@
 import sys
 import io
 import logging
-from decorators import logger
+from decorators import AsyncLogSink, logger, timed
+from metrics import metrics
 from currency import get_currencies
 
 
@@ -75,6 +76,31 @@ def demo_file_logging():
     print()
 
 
+def demo_async_file_logging():
+    """Демонстрация записи в файл через очередь и фоновый поток."""
+    print("=== Логирование в файл через очередь ===")
+
+    async_logger = logging.getLogger("currency_async")
+    async_logger.setLevel(logging.DEBUG)
+    async_logger.handlers.clear()
+    file_handler = logging.FileHandler("currency.log", mode='a', encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    async_logger.addHandler(file_handler)
+
+    # FileHandler переносится в фоновый поток, вызовы не ждут диска
+    sink = AsyncLogSink(async_logger, max_size=1000, overflow='drop')
+
+    @logger(handle=async_logger)
+    def async_logged_func(values):
+        return max(values)
+
+    for i in range(100):
+        async_logged_func([i, i + 1, i + 2])
+    sink.close()
+    print(f"100 вызовов записаны в 'currency.log', отброшено сообщений: {sink.dropped}")
+    print()
+
+
 def demo_get_currencies_with_logging():
     """Демонстрация get_currencies с логированием."""
     print("=== get_currencies с логированием ===")
@@ -109,6 +135,29 @@ def demo_get_currencies_with_logging():
     print()
 
 
+def demo_metrics():
+    """Демонстрация учёта времени вызовов и выгрузки метрик."""
+    print("=== Метрики времени вызовов ===")
+
+    @timed(name="get_currencies")
+    def get_currencies_timed(codes, url="https://www.cbr-xml-daily.ru/daily_json.js"):
+        return get_currencies(codes, url)
+
+    for url in ("https://www.cbr-xml-daily.ru/daily_json.js", "https://invalid-url"):
+        try:
+            get_currencies_timed(["USD"], url=url)
+        except Exception as e:
+            print(f"Поймано исключение: {type(e).__name__}")
+
+    print("Метрики в формате JSON:")
+    print(metrics.to_json())
+    print("Суммы и счётчики в формате Prometheus (без корзин):")
+    for line in metrics.to_prometheus().splitlines():
+        if not line.startswith("#") and "_bucket" not in line:
+            print(line)
+    print()
+
+
 def main():
     """Основная демонстрационная функция."""
     print("ДЕМОНСТРАЦИЯ ЛАБОРАТОРНОЙ РАБОТЫ 7")
@@ -117,7 +166,9 @@ def main():
     demo_basic_logging()
     demo_stringio_logging()
     demo_file_logging()
+    demo_async_file_logging()
     demo_get_currencies_with_logging()
+    demo_metrics()
 
     print("=" * 50)
     print("Демонстрация завершена!")
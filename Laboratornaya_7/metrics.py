@@ -0,0 +1,243 @@
+"""
+Гистограммы длительностей вызовов и их выгрузка в формате Prometheus или JSON.
+"""
+
+import json
+import sys
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Точность корзин: 2**7 подкорзин, относительная погрешность не больше 1/64
+PRECISION_BITS = 7
+_SUB_BUCKETS = 1 << PRECISION_BITS
+_HALF = PRECISION_BITS - 1
+
+# Границы корзин (в секундах) для выгрузки в Prometheus
+PROMETHEUS_BUCKETS = (
+    0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005,
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _bucket_index(value: int) -> int:
+    """Номер корзины: до 2**PRECISION_BITS - точно, дальше - логарифмически-линейно."""
+    if value < _SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - PRECISION_BITS
+    return (shift << _HALF) + (value >> shift)
+
+
+def _bucket_bounds(index: int) -> Tuple[int, int]:
+    """Наименьшее и наибольшее значения корзины."""
+    if index < _SUB_BUCKETS:
+        return index, index
+    shift = (index >> _HALF) - 1
+    mantissa = index - (shift << _HALF)
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class Histogram:
+    """
+    Гистограмма целых значений (наносекунд) с корзинами как в HdrHistogram.
+
+    Ширина корзины растёт вместе со значением, поэтому погрешность
+    относительная (не больше 1/64), а памяти нужно немного при любом
+    разбросе - хранятся только непустые корзины.
+    """
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self._min = sys.maxsize
+        self._max = 0
+
+    @property
+    def min(self) -> Optional[int]:
+        """Наименьшее значение (None, если значений нет)."""
+        return self._min if self.count else None
+
+    @property
+    def max(self) -> Optional[int]:
+        """Наибольшее значение (None, если значений нет)."""
+        return self._max if self.count else None
+
+    def record(self, value: int) -> None:
+        """Добавить значение (вызывающий отвечает за блокировку)."""
+        # _bucket_index встроен: запись выполняется на каждый вызов функции
+        if value < _SUB_BUCKETS:
+            index = value if value > 0 else 0
+        else:
+            shift = value.bit_length() - PRECISION_BITS
+            index = (shift << _HALF) + (value >> shift)
+        counts = self.counts
+        counts[index] = counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+
+    def buckets(self) -> Iterator[Tuple[int, int]]:
+        """Пары (верхняя граница корзины, количество) по возрастанию."""
+        for index in sorted(self.counts):
+            yield _bucket_bounds(index)[1], self.counts[index]
+
+    def percentile(self, q: float) -> int:
+        """
+        Значение, не больше которого q процентов записей (с точностью корзины).
+
+        Raises:
+            ValueError: Если q не в диапазоне от 0 до 100
+        """
+        if not 0 <= q <= 100:
+            raise ValueError("q должен быть в диапазоне от 0 до 100")
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * q // 100))
+        seen = 0
+        for upper, count in self.buckets():
+            seen += count
+            if seen >= rank:
+                return min(upper, self.max)
+        return self.max
+
+    def cumulative(self, bounds: Tuple[int, ...]) -> List[int]:
+        """Количество значений не больше каждой из границ (для Prometheus)."""
+        result = []
+        buckets = list(self.buckets())
+        position = seen = 0
+        for bound in bounds:
+            while position < len(buckets) and buckets[position][0] <= bound:
+                seen += buckets[position][1]
+                position += 1
+            result.append(seen)
+        return result
+
+    def summary(self) -> Dict[str, float]:
+        """Количество, сумма и перцентили в секундах."""
+        return {
+            'count': self.count,
+            'sum': self.total / 1e9,
+            'min': (self.min or 0) / 1e9,
+            'p50': self.percentile(50) / 1e9,
+            'p90': self.percentile(90) / 1e9,
+            'p99': self.percentile(99) / 1e9,
+            'max': (self.max or 0) / 1e9,
+        }
+
+
+class FunctionMetrics:
+    """Время по часам и процессорное время вызовов одной функции."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Удалить накопленные значения."""
+        with self._lock:
+            self.wall = Histogram()
+            self.cpu = Histogram()
+            self.errors = 0
+
+    def record(self, wall_ns: int, cpu_ns: int, failed: bool = False) -> None:
+        """Учесть один вызов."""
+        with self._lock:
+            self.wall.record(wall_ns)
+            self.cpu.record(cpu_ns)
+            if failed:
+                self.errors += 1
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик вызовов по именам функций.
+
+    При enabled = False декоратор timed вызывает функцию напрямую,
+    не обращаясь к часам.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._functions: Dict[str, FunctionMetrics] = {}
+        self._lock = threading.Lock()
+
+    def function(self, name: str) -> FunctionMetrics:
+        """Метрики функции (создаются при первом обращении)."""
+        with self._lock:
+            entry = self._functions.get(name)
+            if entry is None:
+                entry = self._functions[name] = FunctionMetrics()
+            return entry
+
+    def reset(self) -> None:
+        """Удалить все накопленные значения (декорированные функции продолжают учёт)."""
+        for _, entry in self._snapshot():
+            entry.reset()
+
+    def _snapshot(self) -> List[Tuple[str, FunctionMetrics]]:
+        with self._lock:
+            return sorted(self._functions.items())
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """Сводка по функциям: вызовы, ошибки и перцентили в секундах."""
+        result = {}
+        for name, entry in self._snapshot():
+            with entry._lock:
+                result[name] = {
+                    'calls': entry.wall.count,
+                    'errors': entry.errors,
+                    'wall': entry.wall.summary(),
+                    'cpu': entry.cpu.summary(),
+                }
+        return result
+
+    def to_json(self) -> str:
+        """Сводка в формате JSON."""
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix: str = 'function_call') -> str:
+        """
+        Метрики в текстовом формате Prometheus.
+
+        Для каждой функции выгружаются гистограммы <prefix>_wall_seconds и
+        <prefix>_cpu_seconds с границами PROMETHEUS_BUCKETS и счётчик
+        ошибок <prefix>_errors_total.
+        """
+        bounds_ns = tuple(round(bound * 1e9) for bound in PROMETHEUS_BUCKETS)
+        snapshot = self._snapshot()
+        lines = []
+        for kind, help_text in (('wall', "Длительность вызовов по часам"),
+                                ('cpu', "Процессорное время вызовов")):
+            metric = f"{prefix}_{kind}_seconds"
+            lines.append(f"# HELP {metric} {help_text}.")
+            lines.append(f"# TYPE {metric} histogram")
+            for name, entry in snapshot:
+                label = f'function="{_escape_label(name)}"'
+                with entry._lock:
+                    histogram = getattr(entry, kind)
+                    cumulative = histogram.cumulative(bounds_ns)
+                    count, total = histogram.count, histogram.total
+                for bound, seen in zip(PROMETHEUS_BUCKETS, cumulative):
+                    lines.append(f'{metric}_bucket{{{label},le="{bound!r}"}} {seen}')
+                lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {count}')
+                lines.append(f"{metric}_sum{{{label}}} {total / 1e9!r}")
+                lines.append(f"{metric}_count{{{label}}} {count}")
+
+        metric = f"{prefix}_errors_total"
+        lines.append(f"# HELP {metric} Вызовы, завершившиеся исключением.")
+        lines.append(f"# TYPE {metric} counter")
+        for name, entry in snapshot:
+            lines.append(f'{metric}{{function="{_escape_label(name)}"}} {entry.errors}')
+        return "\n".join(lines) + "\n"
+
+
+# Реестр по умолчанию для декоратора timed
+metrics = MetricsRegistry()
@@ -6,6 +6,12 @@
 import math
 from typing import Optional, Tuple, Union
 
+try:
+    import numpy as np
+except ImportError:
+    # Необязательная зависимость: нужна только для solve_quadratic_batch
+    np = None
+
 
 def solve_quadratic(
         a: Union[int, float],
@@ -56,6 +62,67 @@ def solve_quadratic(
         return root1, root2
 
 
+def solve_quadratic_batch(a, b, c) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    Решает сразу много квадратных уравнений ax² + bx + c = 0.
+
+    Корни считаются устойчивой формулой: q = -(b + sign(b)·√D) / 2,
+    x = q / a и x = c / q. В отличие от (-b ± √D) / 2a, здесь не
+    вычитаются близкие числа, поэтому меньший по модулю корень не
+    теряет точность при b² ≫ 4ac.
+
+    Args:
+        a: Коэффициенты при x² (массив или число)
+        b: Коэффициенты при x
+        c: Свободные члены
+        Массивы приводятся к общей форме по правилам broadcasting NumPy.
+
+    Returns:
+        Кортеж (x1, x2, count) массивов общей формы:
+            - x1: корни (-b + √D) / 2a, как первый корень solve_quadratic;
+            - x2: корни (-b - √D) / 2a (при одном корне x1 == x2);
+            - count: число корней (int8): 2, 1, 0 при D < 0 и -1 при
+              a = 0 (уравнение не квадратное).
+        Там, где корней нет, x1 и x2 равны NaN.
+
+    Raises:
+        ImportError: Если numpy не установлен
+        TypeError: Если коэффициенты не числовые
+    """
+    if np is None:
+        raise ImportError("Для solve_quadratic_batch нужен numpy")
+    arrays = []
+    for name, value in zip(("a", "b", "c"), (a, b, c)):
+        array = np.asarray(value)
+        if array.dtype.kind not in "biuf":
+            raise TypeError(f"Коэффициенты '{name}' должны быть числами, получено: {array.dtype}")
+        arrays.append(array.astype(np.float64, copy=False))
+    a, b, c = np.broadcast_arrays(*arrays)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        discriminant = b * b - 4.0 * a * c
+        count = np.zeros(discriminant.shape, dtype=np.int8)
+        count[discriminant > 0] = 2
+        count[discriminant == 0] = 1
+        count[a == 0] = -1
+
+        sqrt_discriminant = np.sqrt(np.maximum(discriminant, 0.0))
+        q = -0.5 * (b + np.copysign(sqrt_discriminant, b))
+        # q / a - корень, больший по модулю, c / q - меньший
+        larger = q / a
+        smaller = c / q
+        negative_b = np.signbit(b)
+        x1 = np.where(negative_b, larger, smaller)
+        x2 = np.where(negative_b, smaller, larger)
+
+        # При D = 0 корень -b / 2a (формула c / q даёт 0/0 при b = c = 0)
+        single = count == 1
+        x1[single] = x2[single] = -0.5 * b[single] / a[single]
+        no_roots = count <= 0
+        x1[no_roots] = x2[no_roots] = np.nan
+    return x1, x2, count
+
+
 if __name__ == "__main__":
     # Демонстрация
     print("=== Демонстрация решения квадратных уравнений ===")
@@ -2,15 +2,20 @@
 Тесты для лабораторной работы 7.
 """
 
+import asyncio
 import unittest
 import io
+import json
 import sys
 import logging
+import threading
 from unittest.mock import patch, Mock
 import requests
 
 # Импорт тестируемых модулей
-from decorators import logger, trace
+from decorators import AsyncLogSink, async_sink, flush_logs, logger, timed, trace
+from metrics import Histogram, MetricsRegistry, _bucket_bounds, _bucket_index
+from quadratic import np, solve_quadratic, solve_quadratic_batch
 from currency import get_currencies
 
 
@@ -204,6 +209,545 @@ class TestLoggerDecorator(unittest.TestCase):
         self.assertIn("Отрицательное число", logs)
 
 
+class TestLowOverheadLogger(unittest.TestCase):
+    """Тесты ленивого форматирования, выборки и пакетной записи."""
+
+    def _make_logger(self, level=logging.INFO):
+        log_stream = io.StringIO()
+        test_logger = logging.getLogger("test_low_overhead")
+        test_logger.setLevel(level)
+        test_logger.handlers.clear()
+        test_logger.propagate = False
+        test_logger.addHandler(logging.StreamHandler(log_stream))
+        return test_logger, log_stream
+
+    def test_disabled_level_skips_repr(self):
+        """При отключённом уровне repr() аргументов и результата не вызывается."""
+        test_logger, log_stream = self._make_logger(logging.WARNING)
+        calls = []
+
+        class Expensive:
+            def __repr__(self):
+                calls.append(1)
+                return "Expensive()"
+
+        @logger(handle=test_logger)
+        def identity(x):
+            return x
+
+        identity(Expensive())
+        self.assertEqual(calls, [])
+        self.assertEqual(log_stream.getvalue(), "")
+
+        test_logger.setLevel(logging.INFO)
+        identity(Expensive())
+        self.assertEqual(len(calls), 2)
+        self.assertIn("identity(Expensive())", log_stream.getvalue())
+
+    def test_errors_logged_when_disabled(self):
+        """Ошибки логируются независимо от уровня вызовов и выборки."""
+        test_logger, log_stream = self._make_logger(logging.ERROR)
+
+        @logger(handle=test_logger, sample_rate=0.0)
+        def fail():
+            raise KeyError("нет ключа")
+
+        with self.assertRaises(KeyError):
+            fail()
+        self.assertEqual(log_stream.getvalue(), "ERROR: Ошибка в функции fail: KeyError: 'нет ключа'\n")
+
+    def test_max_repr(self):
+        """Длинные repr() обрезаются."""
+        stream = io.StringIO()
+
+        @logger(handle=stream, max_repr=20)
+        def echo(value):
+            return value
+
+        echo("x" * 10_000)
+        echo(list(range(10_000)))
+        for line in stream.getvalue().splitlines():
+            self.assertLess(len(line), 120)
+        self.assertIn("...", stream.getvalue())
+
+        with self.assertRaises(ValueError):
+            logger(handle=stream, max_repr=2)
+
+    def test_sample_rate(self):
+        """Логируется заданная доля вызовов, начиная с первого."""
+        stream = io.StringIO()
+
+        @logger(handle=stream, sample_rate=0.25)
+        def square(x):
+            return x * x
+
+        for i in range(8):
+            square(i)
+        starts = [line for line in stream.getvalue().splitlines() if "Вызов функции" in line]
+        self.assertEqual(starts, ["INFO: Вызов функции square(0)", "INFO: Вызов функции square(4)"])
+
+        with self.assertRaises(ValueError):
+            logger(handle=stream, sample_rate=1.5)
+
+    def test_batched_writes(self):
+        """Сообщения записываются пачками, ошибка сбрасывает буфер сразу."""
+        stream = Mock(wraps=io.StringIO())
+
+        @logger(handle=stream, batch_size=4)
+        def half(x):
+            return 10 / x
+
+        half(1)
+        self.assertEqual(stream.write.call_count, 0)
+        half(2)
+        self.assertEqual(stream.write.call_count, 1)
+        self.assertEqual(stream.flush.call_count, 0)
+
+        with self.assertRaises(ZeroDivisionError):
+            half(0)
+        self.assertEqual(stream.write.call_count, 2)
+        self.assertIn("ZeroDivisionError", stream.getvalue())
+
+        half(5)
+        flush_logs()
+        self.assertIn("Результат: 2.0", stream.getvalue())
+
+
+class GatedStream(io.StringIO):
+    """Поток, запись в который ждёт разрешения (имитация медленного диска)."""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+
+    def write(self, text):
+        self.gate.wait(5)
+        return super().write(text)
+
+
+class TestAsyncLogSink(unittest.TestCase):
+    """Тесты записи лога через очередь и фоновый поток."""
+
+    def test_stream_not_blocked(self):
+        """Вызовы не ждут медленный поток, порядок сообщений сохраняется."""
+        stream = GatedStream()
+        sink = AsyncLogSink(stream)
+
+        @logger(handle=sink)
+        def inc(x):
+            return x + 1
+
+        for i in range(3):
+            self.assertEqual(inc(i), i + 1)
+        self.assertEqual(stream.getvalue(), "")
+
+        stream.gate.set()
+        sink.close()
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(lines[0], "INFO: Вызов функции inc(0)")
+        self.assertEqual(lines[-1], "INFO: Функция inc завершилась успешно. Результат: 3")
+
+        # После close() запись выполняется сразу
+        sink.write("после\n")
+        self.assertTrue(stream.getvalue().endswith("после\n"))
+
+    def test_drop_policy(self):
+        """При переполнении сообщения отбрасываются и считаются."""
+        stream = GatedStream()
+        sink = AsyncLogSink(stream, max_size=2)
+        for i in range(10):
+            sink.write(f"{i}\n")
+        self.assertGreater(sink.dropped, 0)
+        stream.gate.set()
+        sink.close()
+        self.assertEqual(len(stream.getvalue().splitlines()) + sink.dropped, 10)
+
+    def test_block_policy(self):
+        """При политике 'block' вызывающий поток ждёт не дольше timeout."""
+        stream = GatedStream()
+        sink = AsyncLogSink(stream, max_size=1, overflow='block', timeout=0.05)
+        for i in range(4):
+            sink.write(f"{i}\n")
+        self.assertGreater(sink.dropped, 0)
+        stream.gate.set()
+        sink.close()
+
+        with self.assertRaises(ValueError):
+            AsyncLogSink(stream, overflow='wait')
+
+    def test_logger_handlers_moved(self):
+        """Обработчики логгера работают в фоновом потоке и возвращаются после close()."""
+        log_stream = io.StringIO()
+        emitted_in = []
+
+        class RecordingHandler(logging.StreamHandler):
+            def emit(self, record):
+                emitted_in.append(threading.current_thread().name)
+                super().emit(record)
+
+        handler = RecordingHandler(log_stream)
+        handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        test_logger = logging.getLogger("test_async_sink")
+        test_logger.setLevel(logging.INFO)
+        test_logger.handlers.clear()
+        test_logger.propagate = False
+        test_logger.addHandler(handler)
+
+        sink = AsyncLogSink(test_logger)
+        self.assertNotIn(handler, test_logger.handlers)
+
+        @logger(handle=test_logger)
+        def double(x):
+            return x * 2
+
+        double(21)
+        sink.flush()
+        self.assertEqual(log_stream.getvalue().splitlines(), [
+            "INFO START: Вызов функции double(21)",
+            "INFO SUCCESS: Функция double завершилась успешно. Результат: 42"])
+        self.assertEqual(emitted_in, ["async-log-sink", "async-log-sink"])
+
+        sink.close()
+        self.assertEqual(test_logger.handlers, [handler])
+
+    def test_logger_without_own_handlers(self):
+        """Логгер без своих обработчиков пишет через обработчики предка, без дублей."""
+        log_stream = io.StringIO()
+        parent = logging.getLogger("test_async_sink_parent")
+        parent.setLevel(logging.INFO)
+        parent.handlers.clear()
+        parent.propagate = False
+        parent.addHandler(logging.StreamHandler(log_stream))
+        child = logging.getLogger("test_async_sink_parent.module")
+        child.handlers.clear()
+
+        @logger(handle=child, queue_size=100)
+        def triple(x):
+            return x * 3
+
+        triple(2)
+        async_sink(child).flush()
+        self.assertEqual(len(log_stream.getvalue().splitlines()), 2)
+        # Декоратор не меняет чужой логгер
+        self.assertTrue(child.propagate)
+        self.assertEqual(child.handlers, [])
+        async_sink(child).close()
+
+    def test_basic_config_after_decoration(self):
+        """Настройка logging после декорирования учитывается при записи из очереди."""
+        root = logging.getLogger()
+        saved_handlers, saved_level = root.handlers[:], root.level
+        late = logging.getLogger("test_async_sink_late")
+        late.handlers.clear()
+
+        @logger(handle=late, queue_size=100)
+        def square(x):
+            return x * x
+
+        log_stream = io.StringIO()
+        try:
+            logging.basicConfig(stream=log_stream, level=logging.INFO,
+                                format="%(levelname)s %(message)s", force=True)
+            square(3)
+            async_sink(late).flush()
+        finally:
+            async_sink(late).close()
+            root.handlers[:] = saved_handlers
+            root.setLevel(saved_level)
+        self.assertEqual(log_stream.getvalue().splitlines(), [
+            "INFO START: Вызов функции square(3)",
+            "INFO SUCCESS: Функция square завершилась успешно. Результат: 9"])
+        self.assertTrue(late.propagate)
+        self.assertEqual(late.handlers, [])
+
+    def test_decorator_queue_size(self):
+        """Параметр queue_size направляет запись через общую очередь."""
+        stream = io.StringIO()
+
+        @logger(handle=stream, queue_size=100)
+        def fail():
+            raise RuntimeError("сбой")
+
+        with self.assertRaises(RuntimeError):
+            fail()
+        flush_logs()
+        self.assertIn("ERROR: Ошибка в функции fail: RuntimeError: сбой", stream.getvalue())
+        self.assertIs(async_sink(stream), async_sink(stream))
+        async_sink(stream).close()
+
+
+class TestMetrics(unittest.TestCase):
+    """Тесты гистограмм, реестра метрик и декоратора timed."""
+
+    def test_histogram_buckets(self):
+        """Корзины непрерывны, значение лежит в своей корзине с погрешностью не больше 1/64."""
+        previous_upper = -1
+        for index in range(2000):
+            lower, upper = _bucket_bounds(index)
+            self.assertEqual(lower, previous_upper + 1)
+            self.assertEqual(_bucket_index(lower), index)
+            self.assertEqual(_bucket_index(upper), index)
+            self.assertLessEqual(upper - lower, lower / 64)
+            previous_upper = upper
+
+    def test_percentiles(self):
+        """Перцентили совпадают с точными с относительной погрешностью корзин."""
+        histogram = Histogram()
+        for value in range(1, 100_001):
+            histogram.record(value * 1000)
+        self.assertEqual((histogram.count, histogram.min, histogram.max), (100_000, 1000, 100_000_000))
+        for q, exact in ((50, 50_000_000), (90, 90_000_000), (99, 99_000_000)):
+            self.assertAlmostEqual(histogram.percentile(q) / exact, 1, delta=1 / 64)
+        self.assertEqual(histogram.percentile(100), 100_000_000)
+        self.assertEqual(Histogram().percentile(50), 0)
+        with self.assertRaises(ValueError):
+            histogram.percentile(101)
+
+    def test_timed(self):
+        """Вызовы и ошибки учитываются, выключенный реестр не трогается."""
+        registry = MetricsRegistry()
+
+        @timed(registry=registry)
+        def work(fail=False):
+            if fail:
+                raise ValueError("сбой")
+            return sum(range(1000))
+
+        @timed(name="cbr.get", registry=registry)
+        def other():
+            return None
+
+        self.assertEqual(work(), 499500)
+        with self.assertRaises(ValueError):
+            work(fail=True)
+        other()
+
+        data = registry.to_dict()
+        self.assertEqual(sorted(data), ["TestMetrics.test_timed.<locals>.work", "cbr.get"])
+        summary = data["TestMetrics.test_timed.<locals>.work"]
+        self.assertEqual((summary['calls'], summary['errors']), (2, 1))
+        self.assertGreater(summary['wall']['sum'], 0)
+        self.assertEqual(json.loads(registry.to_json()), data)
+
+        registry.enabled = False
+        work()
+        self.assertEqual(registry.to_dict()["TestMetrics.test_timed.<locals>.work"]['calls'], 2)
+
+        registry.reset()
+        self.assertEqual(registry.to_dict()["cbr.get"]['calls'], 0)
+        registry.enabled = True
+        other()
+        self.assertEqual(registry.to_dict()["cbr.get"]['calls'], 1)
+
+    def test_prometheus(self):
+        """Выгрузка в Prometheus: накопительные корзины, сумма, количество и ошибки."""
+        registry = MetricsRegistry()
+        entry = registry.function('say "hi"')
+        for wall in (2_000, 30_000, 7_000_000):
+            entry.record(wall, wall // 2)
+        entry.record(1_000, 500, failed=True)
+
+        text = registry.to_prometheus()
+        self.assertIn("# TYPE function_call_wall_seconds histogram", text)
+        label = 'function="say \\"hi\\""'
+        self.assertIn(f'function_call_wall_seconds_bucket{{{label},le="5e-06"}} 2\n', text)
+        self.assertIn(f'function_call_wall_seconds_bucket{{{label},le="+Inf"}} 4\n', text)
+        self.assertIn(f'function_call_wall_seconds_count{{{label}}} 4\n', text)
+        self.assertIn(f'function_call_cpu_seconds_bucket{{{label},le="0.005"}} 4\n', text)
+        self.assertIn(f'function_call_errors_total{{{label}}} 1\n', text)
+
+        counts = [int(line.rsplit(' ', 1)[1]) for line in text.splitlines()
+                  if line.startswith('function_call_wall_seconds_bucket')]
+        self.assertEqual(counts, sorted(counts))
+
+
+class TestAsyncAndGenerators(unittest.TestCase):
+    """Тесты декораторов для корутин, асинхронных генераторов и генераторов."""
+
+    def setUp(self):
+        self.stream = io.StringIO()
+
+    def lines(self):
+        return self.stream.getvalue().splitlines()
+
+    def test_coroutine(self):
+        """Успех логируется после await с настоящим результатом."""
+        @logger(handle=self.stream)
+        async def fetch(x):
+            await asyncio.sleep(0)
+            if x < 0:
+                raise ValueError("отрицательное")
+            return x * 2
+
+        coroutine = fetch(21)
+        self.assertEqual(self.stream.getvalue(), "")
+        self.assertEqual(asyncio.run(coroutine), 42)
+        self.assertEqual(self.lines(), ["INFO: Вызов функции fetch(21)",
+                                        "INFO: Функция fetch завершилась успешно. Результат: 42"])
+        self.assertTrue(asyncio.iscoroutinefunction(fetch))
+
+        with self.assertRaises(ValueError):
+            asyncio.run(fetch(-1))
+        self.assertEqual(self.lines()[-1], "ERROR: Ошибка в функции fetch: ValueError: отрицательное")
+
+    def test_cancelled_coroutine(self):
+        """Отменённая корутина отмечается как прерванная."""
+        @logger(handle=self.stream)
+        async def wait_forever():
+            await asyncio.sleep(10)
+
+        async def main():
+            task = asyncio.ensure_future(wait_forever())
+            await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+        self.assertEqual(self.lines()[-1], "INFO: Функция wait_forever прервана до завершения.")
+
+    def test_generator_lazy(self):
+        """Генератор не читается заранее, элементы считаются, send и throw передаются."""
+        produced = []
+
+        @logger(handle=self.stream)
+        def numbers(n):
+            total = 0
+            for i in range(n):
+                produced.append(i)
+                try:
+                    received = yield i
+                except KeyError:
+                    received = 100
+                total += received or 0
+            return total
+
+        generator = numbers(3)
+        self.assertEqual((produced, self.stream.getvalue()), ([], ""))
+        self.assertEqual(next(generator), 0)
+        self.assertEqual(produced, [0])
+        self.assertEqual(generator.send(5), 1)
+        self.assertEqual(generator.throw(KeyError()), 2)
+        with self.assertRaises(StopIteration) as stop:
+            next(generator)
+        self.assertEqual(stop.exception.value, 105)
+        self.assertEqual(self.lines()[-1],
+                         "INFO: Функция numbers завершилась успешно. Элементов: 3. Результат: 105")
+
+        generator = numbers(10)
+        next(generator)
+        generator.close()
+        self.assertEqual(self.lines()[-1], "INFO: Функция numbers прервана до завершения. Элементов: 1.")
+
+    def test_generator_error(self):
+        """Исключение внутри генератора логируется как ошибка."""
+        @logger(handle=self.stream)
+        def broken():
+            yield 1
+            raise RuntimeError("сбой")
+
+        with self.assertRaises(RuntimeError):
+            list(broken())
+        self.assertEqual(self.lines()[-1], "ERROR: Ошибка в функции broken: RuntimeError: сбой")
+
+    def test_async_generator(self):
+        """Асинхронный генератор: элементы по одному, aclose - прерывание."""
+        @logger(handle=self.stream)
+        async def ticks(n):
+            for i in range(n):
+                await asyncio.sleep(0)
+                yield i
+
+        async def main():
+            collected = [i async for i in ticks(3)]
+            partial = ticks(5)
+            first = await partial.__anext__()
+            await partial.aclose()
+            return collected, first
+
+        self.assertEqual(asyncio.run(main()), ([0, 1, 2], 0))
+        self.assertEqual(self.lines()[1], "INFO: Функция ticks завершилась успешно. Элементов: 3. Результат: None")
+        self.assertEqual(self.lines()[-1], "INFO: Функция ticks прервана до завершения. Элементов: 1.")
+
+    def test_timed_coroutine_and_generator(self):
+        """Время считается до фактического завершения, процессорное - без приостановки."""
+        registry = MetricsRegistry()
+
+        @timed(registry=registry)
+        async def sleeper():
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        @timed(registry=registry)
+        def items():
+            yield 1
+            raise ValueError("сбой")
+
+        self.assertEqual(asyncio.run(sleeper()), "ok")
+        with self.assertRaises(ValueError):
+            list(items())
+
+        data = registry.to_dict()
+        wall = data["TestAsyncAndGenerators.test_timed_coroutine_and_generator.<locals>.sleeper"]['wall']
+        cpu = data["TestAsyncAndGenerators.test_timed_coroutine_and_generator.<locals>.sleeper"]['cpu']
+        self.assertGreaterEqual(wall['sum'], 0.05)
+        self.assertLess(cpu['sum'], 0.025)
+        self.assertEqual(data["TestAsyncAndGenerators.test_timed_coroutine_and_generator.<locals>.items"]['errors'], 1)
+
+
+@unittest.skipIf(np is None, "numpy не установлен")
+class TestSolveQuadraticBatch(unittest.TestCase):
+    """Тесты solve_quadratic_batch."""
+
+    def test_matches_scalar(self):
+        """Результаты совпадают с solve_quadratic."""
+        rng = np.random.default_rng(0)
+        a, b, c = rng.uniform(-10, 10, (3, 2000))
+        b[:50] = 2 * np.sqrt(a[:50] * c[:50], where=a[:50] * c[:50] > 0, out=np.zeros(50))
+        x1, x2, count = solve_quadratic_batch(a, b, c)
+        for i in range(len(a)):
+            expected = solve_quadratic(float(a[i]), float(b[i]), float(c[i]))
+            if expected is None:
+                self.assertEqual(count[i], 0)
+                self.assertTrue(np.isnan(x1[i]) and np.isnan(x2[i]))
+            elif isinstance(expected, float):
+                self.assertEqual(count[i], 1)
+                self.assertAlmostEqual(x1[i], expected)
+            else:
+                self.assertEqual(count[i], 2)
+                self.assertAlmostEqual(x1[i], expected[0], places=9)
+                self.assertAlmostEqual(x2[i], expected[1], places=9)
+
+    def test_counts_and_special_cases(self):
+        """Маска числа корней, a = 0 и broadcasting."""
+        x1, x2, count = solve_quadratic_batch([1, 1, 1, 0, 2, 1], [-5, -4, 2, 2, 0, 0], [6, 4, 5, 3, -8, 0])
+        self.assertEqual(count.tolist(), [2, 1, 0, -1, 2, 1])
+        self.assertEqual(count.dtype, np.int8)
+        np.testing.assert_array_equal(x1, [3, 2, np.nan, np.nan, 2, 0])
+        np.testing.assert_array_equal(x2, [2, 2, np.nan, np.nan, -2, 0])
+
+        x1, x2, count = solve_quadratic_batch(1, np.array([[-3], [-5]]), [2, 6])
+        self.assertEqual(count.shape, (2, 2))
+        self.assertEqual((x1[1, 1], x2[1, 1]), (3.0, 2.0))
+
+        x1, x2, count = solve_quadratic_batch(1, -3, 2)
+        self.assertEqual((float(x1), float(x2), int(count)), (2.0, 1.0, 2))
+
+    def test_stable_small_root(self):
+        """При b² ≫ 4ac меньший корень не теряет точность."""
+        x1, x2, count = solve_quadratic_batch(1.0, [1e8, -1e10], 1.0)
+        self.assertEqual(count.tolist(), [2, 2])
+        self.assertAlmostEqual(x1[0] / -1e-8, 1, places=12)
+        self.assertAlmostEqual(x2[1] / 1e-10, 1, places=12)
+        self.assertAlmostEqual(x2[0] / -1e8, 1, places=12)
+
+    def test_invalid_types(self):
+        """Нечисловые коэффициенты отклоняются."""
+        with self.assertRaises(TypeError):
+            solve_quadratic_batch(["1"], [2], [3])
+
+
 class TestIntegration(unittest.TestCase):
     """Интеграционные тесты декоратора и функции get_currencies."""
 
@@ -0,0 +1,253 @@
+"""Асинхронный HTTP-сервер и ASGI-адаптер для маршрутов приложения."""
+
+import asyncio
+from concurrent.futures import Executor
+from contextlib import suppress
+from http import HTTPStatus
+from typing import Callable, Optional
+
+from utils.http_messages import FileBody, Request, Response, chunked_body, error_response
+
+Dispatch = Callable[[Request], Response]
+IsBlocking = Callable[[Request], bool]
+
+MAX_HEADER_SIZE = 64 * 1024
+
+
+def _reason(status: int) -> str:
+    try:
+        return HTTPStatus(status).phrase
+    except ValueError:
+        return ''
+
+
+def serialize_response(response: Response, keep_alive: bool) -> bytes:
+    """Сериализовать Response в байты HTTP/1.1."""
+    lines = [f"HTTP/1.1 {response.status} {_reason(response.status)}"]
+    lines.extend(f"{name}: {value}" for name, value in response.header_items())
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    head = ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+    return head + response.body
+
+
+async def call_route(dispatch: Dispatch, request: Request, is_blocking: Optional[IsBlocking] = None,
+                     executor: Optional[Executor] = None) -> Response:
+    """
+    Выполнить маршрут, не блокируя цикл событий.
+
+    Запросы, для которых is_blocking возвращает True (например, загрузка
+    курсов по сети), выполняются в пуле потоков, остальные - прямо в цикле.
+    """
+    if is_blocking is not None and is_blocking(request):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, dispatch, request)
+    return dispatch(request)
+
+
+async def send_file(writer: asyncio.StreamWriter, file: FileBody) -> None:
+    """Отправить участок файла через loop.sendfile (os.sendfile или чтение с записью)."""
+    loop = asyncio.get_running_loop()
+    with open(file.path, 'rb') as f:
+        await loop.sendfile(writer.transport, f, file.offset, file.length)
+
+
+async def iterate_chunks(chunks, executor: Optional[Executor] = None):
+    """
+    Части потокового тела ответа.
+
+    Следующая часть вычисляется в пуле потоков: источник (например,
+    курсор SQLite) может блокировать.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = iter(chunks)
+    while True:
+        chunk = await loop.run_in_executor(executor, next, iterator, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+class AsyncHTTPServer:
+    """
+    HTTP/1.1-сервер на asyncio с поддержкой keep-alive.
+
+    Открытое соединение стоит одну корутину, а не поток, поэтому сервер
+    держит тысячи простаивающих keep-alive соединений. Соединение
+    закрывается после keepalive_timeout секунд без запросов.
+    """
+
+    def __init__(self, dispatch: Dispatch, is_blocking: Optional[IsBlocking] = None,
+                 executor: Optional[Executor] = None, keepalive_timeout: float = 15.0,
+                 max_body_size: int = 1024 * 1024):
+        """
+        Args:
+            dispatch: Функция, превращающая Request в Response
+            is_blocking: Признак запросов, которые нужно выполнять в пуле потоков
+            executor: Пул потоков для блокирующих запросов (None - пул по умолчанию)
+            keepalive_timeout: Время ожидания следующего запроса в секундах
+            max_body_size: Максимальный размер тела запроса в байтах
+        """
+        self.dispatch = dispatch
+        self.is_blocking = is_blocking
+        self.executor = executor
+        self.keepalive_timeout = keepalive_timeout
+        self.max_body_size = max_body_size
+
+        self.open_connections = 0
+        self.requests = 0
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """
+        Прочитать один запрос.
+
+        Returns:
+            Пара (Request, keep_alive), (None, False) при закрытом соединении
+            или (Response с ошибкой, False) при некорректном запросе
+        """
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None, False
+        except asyncio.LimitOverrunError:
+            return error_response(431, "Слишком большие заголовки"), False
+
+        lines = head.decode('latin-1').split("\r\n")
+        parts = lines[0].split()
+        if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+            return error_response(400, "Некорректная строка запроса"), False
+        method, target, version = parts
+
+        headers = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, sep, value = line.partition(':')
+            if not sep:
+                return error_response(400, "Некорректный заголовок"), False
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get('connection', '').lower()
+        if version == 'HTTP/1.1':
+            keep_alive = connection != 'close'
+        else:
+            keep_alive = connection == 'keep-alive'
+
+        if 'transfer-encoding' in headers:
+            return error_response(501, "Transfer-Encoding не поддерживается"), False
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            return error_response(400, "Некорректный Content-Length"), False
+        if length > self.max_body_size:
+            return error_response(413, "Слишком большое тело запроса"), False
+        try:
+            body = await reader.readexactly(length) if length else b''
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None, False
+
+        return Request.from_target(method, target, headers.items(), body, version), keep_alive
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Обслуживать запросы одного соединения, пока оно открыто."""
+        self.open_connections += 1
+        try:
+            keep_alive = True
+            while keep_alive:
+                request, keep_alive = await self._read_request(reader)
+                if request is None:
+                    break
+                if isinstance(request, Response):
+                    response = request
+                else:
+                    self.requests += 1
+                    try:
+                        response = await call_route(self.dispatch, request, self.is_blocking, self.executor)
+                    except Exception as e:
+                        print(f"Ошибка: {e}")
+                        response = error_response(500, f"Ошибка: {str(e)}")
+                writer.write(serialize_response(response, keep_alive))
+                await writer.drain()
+                if response.chunks is not None:
+                    async for piece in iterate_chunks(chunked_body(response.chunks), self.executor):
+                        writer.write(piece)
+                        await writer.drain()
+                elif response.file is not None:
+                    await send_file(writer, response.file)
+        except ConnectionError:
+            pass
+        finally:
+            self.open_connections -= 1
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def start(self, host: str = 'localhost', port: int = 8080) -> asyncio.AbstractServer:
+        """Начать приём соединений и вернуть объект сервера asyncio."""
+        return await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_SIZE)
+
+    async def serve_forever(self, host: str = 'localhost', port: int = 8080) -> None:
+        """Принимать соединения до отмены задачи."""
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def make_asgi_app(dispatch: Dispatch, is_blocking: Optional[IsBlocking] = None,
+                  executor: Optional[Executor] = None):
+    """
+    Обернуть маршруты в ASGI-приложение (для uvicorn, hypercorn и т.п.).
+
+    Args:
+        dispatch: Функция, превращающая Request в Response
+        is_blocking: Признак запросов, которые нужно выполнять в пуле потоков
+        executor: Пул потоков для блокирующих запросов
+    """
+    async def app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            raise ValueError(f"Неподдерживаемый тип ASGI: {scope['type']}")
+
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+        target = scope['path']
+        if scope.get('query_string'):
+            target += '?' + scope['query_string'].decode('latin-1')
+        headers = [(name.decode('latin-1'), value.decode('latin-1'))
+                   for name, value in scope.get('headers', [])]
+        request = Request.from_target(scope['method'], target, headers, body)
+
+        try:
+            response = await call_route(dispatch, request, is_blocking, executor)
+        except Exception as e:
+            print(f"Ошибка: {e}")
+            response = error_response(500, f"Ошибка: {str(e)}")
+
+        # Разбиение на части при потоковой отдаче выполняет ASGI-сервер
+        await send({
+            'type': 'http.response.start',
+            'status': response.status,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                        for name, value in response.header_items()
+                        if name != 'Transfer-Encoding']
+        })
+        chunks = response.file.read_chunks() if response.file is not None else response.chunks
+        if chunks is not None:
+            async for chunk in iterate_chunks(chunks, executor):
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        else:
+            await send({'type': 'http.response.body', 'body': response.body})
+
+    return app
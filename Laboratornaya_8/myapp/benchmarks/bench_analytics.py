@@ -0,0 +1,86 @@
+"""
+Сравнение векторизованной аналитики (utils.analytics) с наивными циклами.
+
+Запуск: python benchmarks/bench_analytics.py
+"""
+
+import math
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.analytics import sma, ema, rolling_volatility, RollingStats
+
+
+def naive_sma(rows, window):
+    """SMA двойным циклом по валютам и окну."""
+    n = len(rows[0])
+    result = []
+    for t in range(len(rows)):
+        if t < window - 1:
+            result.append([math.nan] * n)
+            continue
+        result.append([sum(rows[k][j] for k in range(t - window + 1, t + 1)) / window
+                       for j in range(n)])
+    return result
+
+
+def naive_ema(rows, span):
+    """EMA циклом по валютам и дням."""
+    alpha = 2 / (span + 1)
+    result = [list(rows[0])]
+    for t in range(1, len(rows)):
+        result.append([alpha * rows[t][j] + (1 - alpha) * result[-1][j] for j in range(len(rows[t]))])
+    return result
+
+
+def naive_volatility(rows, window):
+    """СКО лог-доходностей с пересчётом окна на каждом шаге."""
+    n = len(rows[0])
+    result = []
+    for t in range(len(rows)):
+        if t < window:
+            result.append([math.nan] * n)
+            continue
+        day = []
+        for j in range(n):
+            returns = [math.log(rows[k][j] / rows[k - 1][j]) for k in range(t - window + 1, t + 1)]
+            mean = sum(returns) / window
+            day.append(math.sqrt(sum((r - mean) ** 2 for r in returns) / (window - 1)))
+        result.append(day)
+    return result
+
+
+def best(func, repeat=3):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+if __name__ == '__main__':
+    days, currencies, window = 5 * 365, 43, 30
+    rng = np.random.default_rng(0)
+    values = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, (days, currencies)), axis=0))
+    rows = values.tolist()
+
+    print(f"История: {days} дней x {currencies} валют, окно {window}")
+    print(f"{'Показатель':<16}{'Циклы, мс':>12}{'NumPy, мс':>12}{'Ускорение':>12}")
+    for name, naive, vectorized in (
+            ('SMA', lambda: naive_sma(rows, window), lambda: sma(values, window)),
+            ('EMA', lambda: naive_ema(rows, window), lambda: ema(values, window)),
+            ('Волатильность', lambda: naive_volatility(rows, window),
+             lambda: rolling_volatility(values, window)),
+    ):
+        t_naive, t_vec = best(naive), best(vectorized)
+        print(f"{name:<16}{t_naive * 1000:>12.1f}{t_vec * 1000:>12.2f}{t_naive / t_vec:>11.0f}x")
+
+    # Новый день: пересчёт всей истории против инкрементального обновления
+    stats = RollingStats.from_history([str(j) for j in range(currencies)], values, window=window)
+    new_row = values[-1] * 1.001
+    t_recompute = best(lambda: (sma(values, window), ema(values, window),
+                                rolling_volatility(values, window)))
+    t_update = min(timeit.repeat(lambda: stats.update(new_row), number=1000, repeat=3)) / 1000
+    print(f"{'Новый день':<16}{t_recompute * 1000:>12.2f}{t_update * 1000:>12.4f}"
+          f"{t_recompute / t_update:>11.0f}x  (пересчёт / RollingStats.update)")
@@ -0,0 +1,51 @@
+"""
+Сериализация ответов JSON API: orjson против стандартного json.
+
+Запуск: python benchmarks/bench_json.py [--rows 100000]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from models import Currency
+from utils import json_api
+from utils.json_api import CURRENCY_FIELDS, dumps, records, stream_array
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Бенчмарк JSON API")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    currencies = Currency.from_rows(
+        ((i, '840', 'USD', 'Доллар США', 90.0 + i % 100 / 100, 1) for i in range(1, args.rows + 1)),
+        validate=False)
+    history = [[(f"2024-01-{i % 28 + 1:02d}", 90.0 + i / 1000, 1) for i in range(start, start + 1000)]
+               for start in range(0, args.rows, 1000)]
+
+    cases = [
+        ("модели -> словари", lambda: records(currencies, ('char_code', 'value'))),
+        ("валюты: все поля", lambda: dumps(records(currencies, CURRENCY_FIELDS))),
+        ("валюты: 2 поля", lambda: dumps(records(currencies, ('char_code', 'value')))),
+        ("история: поток", lambda: b''.join(stream_array(history, json_api.HISTORY_FIELDS,
+                                                          json_api.HISTORY_FIELDS))),
+    ]
+
+    backends = [('json', None)]
+    if json_api.orjson is not None:
+        backends.insert(0, ('orjson', json_api.orjson))
+
+    print(f"{args.rows} записей, лучшее из {args.repeat}, мс")
+    print(f"{'Операция':<22}" + "".join(f"{name:>10}" for name, _ in backends))
+    for title, run in cases:
+        cells = []
+        for _, module in backends:
+            with patch.object(json_api, 'orjson', module):
+                cells.append(min(timeit.repeat(run, number=1, repeat=args.repeat)) * 1000)
+        print(f"{title:<22}" + "".join(f"{ms:>10.1f}" for ms in cells))
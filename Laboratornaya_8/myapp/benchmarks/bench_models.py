@@ -0,0 +1,76 @@
+"""
+Память и время создания валют: словарь экземпляра против слотов,
+конструктор против from_rows без проверки.
+
+Запуск: python benchmarks/bench_models.py [--rows 300000]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from models import Currency
+
+
+@dataclass
+class DictCurrency:
+    """Прежний вариант Currency: словарь экземпляра и проверка в __post_init__."""
+
+    id: int
+    num_code: str
+    char_code: str
+    name: str
+    value: float
+    nominal: int
+
+    def __post_init__(self):
+        if not isinstance(self.id, int) or self.id <= 0:
+            raise ValueError("ID должен быть положительным целым числом")
+        if not isinstance(self.num_code, str) or len(self.num_code) != 3:
+            raise ValueError("Цифровой код должен состоять из 3 символов")
+        if not isinstance(self.char_code, str) or len(self.char_code) != 3:
+            raise ValueError("Символьный код должен состоять из 3 символов")
+        if not isinstance(self.value, (int, float)) or self.value <= 0:
+            raise ValueError("Курс должен быть положительным числом")
+        if not isinstance(self.nominal, int) or self.nominal <= 0:
+            raise ValueError("Номинал должен быть положительным целым числом")
+
+
+def memory_of(build):
+    """Память, занятая результатом build(), в байтах."""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Бенчмарк создания моделей")
+    parser.add_argument('--rows', type=int, default=300_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # Строки как из истории курсов: значения уже в нужных типах
+    rows = [(i, '840', 'USD', 'Доллар США', 90.0 + i % 100 / 100, 1)
+            for i in range(1, args.rows + 1)]
+
+    variants = [
+        ("dataclass, конструктор", lambda: [DictCurrency(*row) for row in rows]),
+        ("slots, конструктор", lambda: [Currency(*row) for row in rows]),
+        ("slots, from_rows без проверки", lambda: Currency.from_rows(rows, validate=False)),
+    ]
+
+    print(f"{args.rows} строк, лучшее из {args.repeat}")
+    print(f"{'Вариант':<32} {'время, мс':>10} {'мкс/строка':>11} {'память, МБ':>11}")
+    for title, build in variants:
+        seconds = min(timeit.repeat(build, number=1, repeat=args.repeat))
+        megabytes = memory_of(build) / 2 ** 20
+        print(f"{title:<32} {seconds * 1000:>10.1f} {seconds / args.rows * 1e6:>11.2f} "
+              f"{megabytes:>11.1f}")
@@ -0,0 +1,68 @@
+"""
+Пакетная запись и загрузка при старте для хранилища SQLite.
+
+Запуск: python benchmarks/bench_storage.py [--users 1000000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from models import User
+from utils.storage import Storage
+from utils.subscriptions import SubscriptionIndex
+from utils.user_repository import UserRepository
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Бенчмарк хранилища SQLite")
+    parser.add_argument('--users', type=int, default=200_000)
+    parser.add_argument('--subscriptions', type=int, default=3, help="Подписок на пользователя")
+    parser.add_argument('--single', type=int, default=2_000, help="Строк для построчной записи")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = Storage(os.path.join(tmp, 'bench.sqlite3'))
+
+        single_users = [User(i, f"Построчно {i}") for i in range(1, args.single + 1)]
+        _, t_single = timed(lambda: [storage.insert_user(u) for u in single_users])
+
+        offset = args.single
+        users = (User(offset + i, f"Пользователь {i}") for i in range(1, args.users + 1))
+        _, t_users = timed(lambda: storage.insert_users(users))
+
+        pairs = ((offset + i, (i + k) % 5 + 1) for i in range(1, args.users + 1)
+                 for k in range(args.subscriptions))
+        storage._connection().executemany(
+            "INSERT INTO currencies (id, num_code, char_code, name, value, nominal) "
+            "VALUES (?, '000', ?, ?, 1.0, 1)",
+            [(i, f"C{i:02d}", f"Валюта {i}") for i in range(1, 6)]
+        )
+        storage._connection().commit()
+        count, t_subs = timed(lambda: storage.insert_subscriptions(pairs))
+        storage.close()
+
+        restarted = Storage(os.path.join(tmp, 'bench.sqlite3'))
+        repository, t_load = timed(lambda: UserRepository.from_storage(restarted))
+        _, t_fanout = timed(lambda: restarted.currency_user_ids(1))
+        index, t_index_load = timed(lambda: SubscriptionIndex.from_storage(restarted))
+        _, t_index_fanout = timed(lambda: index.notify_targets([1]))
+        restarted.close()
+
+    print(f"Построчная вставка ({args.single}):   {t_single / args.single * 1e6:8.1f} мкс/строка")
+    print(f"Пакетная вставка ({args.users}):  {t_users / args.users * 1e6:8.1f} мкс/строка")
+    print(f"Подписки ({count}):           {t_subs / count * 1e6:8.1f} мкс/строка")
+    print(f"Загрузка {len(repository)} пользователей при старте: {t_load:.2f} с")
+    print(f"Подписчики одной валюты (по индексу): {t_fanout * 1000:.1f} мс")
+    print(f"Загрузка индекса подписок ({len(index)}): {t_index_load:.2f} с")
+    print(f"Подписчики одной валюты (в памяти): {t_index_fanout * 1000:.1f} мс")
@@ -0,0 +1,86 @@
+"""
+Сравнение полного разбора фида ЦБ (response.json()) и потокового
+разбора с выборкой нужных валют (utils.cbr_stream).
+
+Запуск: python benchmarks/bench_stream_parse.py
+"""
+
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.currencies_api import extract_currencies
+from utils.cbr_stream import parse_valute_stream
+
+CODES = [
+    'AUD', 'AZN', 'GBP', 'AMD', 'BYN', 'BGN', 'BRL', 'HUF', 'VND', 'HKD',
+    'GEL', 'DKK', 'AED', 'USD', 'EUR', 'EGP', 'INR', 'IDR', 'KZT', 'CAD',
+    'QAR', 'KGS', 'CNY', 'MDL', 'NZD', 'NOK', 'PLN', 'RON', 'XDR', 'SGD',
+    'TJS', 'THB', 'TRY', 'TMT', 'UZS', 'UAH', 'CZK', 'SEK', 'CHF', 'RSD',
+    'ZAR', 'KRW', 'JPY'
+]
+
+
+def make_payload(day: int) -> bytes:
+    """Синтетический фид в формате daily_json.js (43 валюты)."""
+    valute = {}
+    for i, code in enumerate(CODES):
+        valute[code] = {
+            'ID': f'R01{i:03d}',
+            'NumCode': f'{100 + i:03d}',
+            'CharCode': code,
+            'Nominal': 1 if i % 3 else 100,
+            'Name': f'Валюта {code}',
+            'Value': 10.0 + i + day / 100,
+            'Previous': 10.0 + i
+        }
+    feed = {
+        'Date': f'2024-01-{day % 28 + 1:02d}T11:30:00+03:00',
+        'PreviousDate': '2024-01-01T11:30:00+03:00',
+        'PreviousURL': '//www.cbr-xml-daily.ru/archive/2024/01/01/daily_json.js',
+        'Timestamp': '2024-01-01T20:00:00+03:00',
+        'Valute': valute
+    }
+    return json.dumps(feed, ensure_ascii=False, indent=4).encode('utf-8')
+
+
+def chunked(payload: bytes, size: int = 4096):
+    """Разбить тело ответа на фрагменты, как iter_content."""
+    return [payload[i:i + size] for i in range(0, len(payload), size)]
+
+
+def full_parse(payloads, codes):
+    """Текущий подход: полный json.loads и выборка из data['Valute']."""
+    return [extract_currencies(json.loads(p)['Valute'], codes) for p in payloads]
+
+
+def stream_parse(payloads, codes):
+    """Потоковый разбор только нужных записей."""
+    return [parse_valute_stream(chunked(p), codes, fields=('Value', 'Nominal')) for p in payloads]
+
+
+def measure(func, payloads, codes, repeat: int = 5):
+    """Среднее время и пиковая память одного прогона."""
+    times = timeit.repeat(lambda: func(payloads, codes), number=1, repeat=repeat)
+    tracemalloc.start()
+    result = func(payloads, codes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return min(times), peak
+
+
+if __name__ == '__main__':
+    payloads = [make_payload(day) for day in range(365)]
+    print(f"Архив: {len(payloads)} дней, {sum(map(len, payloads)) / 1024:.0f} КБ")
+    print(f"{'Коды':<22}{'Подход':<12}{'Время, мс':>12}{'Пик памяти, КБ':>18}")
+
+    for codes in (['USD'], ['USD', 'EUR', 'GBP', 'CNY', 'JPY'], CODES):
+        label = ','.join(codes) if len(codes) < 6 else f'все ({len(codes)})'
+        for name, func in (('json.loads', full_parse), ('stream', stream_parse)):
+            seconds, peak = measure(func, payloads, codes)
+            print(f"{label:<22}{name:<12}{seconds * 1000:>12.1f}{peak / 1024:>18.0f}")
@@ -0,0 +1,73 @@
+"""
+Время запуска окружения Jinja2 и задержка первого запроса.
+
+Сравниваются три варианта:
+- lazy: шаблоны компилируются при первом обращении (как PackageLoader раньше);
+- source: все шаблоны компилируются из исходников при старте;
+- bundle: все шаблоны загружаются из пакета utils.template_bundle.
+
+Запуск: python benchmarks/bench_templates.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from jinja2 import FileSystemLoader
+
+from models import App, Author, Currency, User
+from utils.template_bundle import TEMPLATES_DIR, compile_bundle, load_environment, make_environment
+
+REPEATS = 20
+
+APP = App(name="Currency Tracker", version="1.0.0", author=Author(name="Автор", group="P3121"))
+CONTEXT = {
+    'myapp': APP,
+    'author': APP.author,
+    'navigation': [{'caption': 'Главная', 'href': '/'}],
+    'title': 'Пользователи',
+    'users': [User(id=i, name=f"Пользователь {i}") for i in range(1, 51)],
+    'currencies': [Currency(1, '840', 'USD', 'Доллар США', 90.5, 1)]
+}
+
+
+def render_all(env):
+    """Отрендерить каждый шаблон один раз."""
+    for name in FileSystemLoader(TEMPLATES_DIR).list_templates():
+        env.get_template(name).render(**CONTEXT)
+
+
+def measure(make_env):
+    """Среднее время старта, первого и установившегося рендера в мс."""
+    startup = first = steady = 0.0
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        env = make_env()
+        t1 = time.perf_counter()
+        render_all(env)
+        t2 = time.perf_counter()
+        render_all(env)
+        t3 = time.perf_counter()
+        startup += t1 - t0
+        first += t2 - t1
+        steady += t3 - t2
+    return startup / REPEATS * 1000, first / REPEATS * 1000, steady / REPEATS * 1000
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as bundle_dir:
+        compile_bundle(TEMPLATES_DIR, bundle_dir)
+        variants = [
+            ('lazy', lambda: make_environment(FileSystemLoader(TEMPLATES_DIR))),
+            ('source', lambda: load_environment(bundle_dir=None)),
+            ('bundle', lambda: load_environment(bundle_dir=bundle_dir))
+        ]
+
+        print(f"Все шаблоны, среднее по {REPEATS} запускам")
+        print(f"{'вариант':<8} {'старт, мс':>10} {'1-й рендер, мс':>15} {'далее, мс':>10}")
+        for name, make_env in variants:
+            startup, first, steady = measure(make_env)
+            print(f"{name:<8} {startup:>10.2f} {first:>15.2f} {steady:>10.2f}")
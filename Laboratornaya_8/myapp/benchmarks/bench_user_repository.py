@@ -0,0 +1,50 @@
+"""
+Сравнение UserRepository с линейными проходами по списку пользователей.
+
+Запуск: python benchmarks/bench_user_repository.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from models import User
+from utils.user_repository import UserRepository
+
+SIZES = (1_000, 10_000, 100_000)
+NUMBER = 200
+
+
+def list_add(users, name):
+    """Добавление как в прежних обработчиках: проверка any() и max() по списку."""
+    if any(u.name == name for u in users):
+        return None
+    user = User(id=max(u.id for u in users) + 1, name=name)
+    users.append(user)
+    return user
+
+
+def list_lookup(users, user_id):
+    return next((u for u in users if u.id == user_id), None)
+
+
+if __name__ == '__main__':
+    print(f"Время одной операции, мкс (среднее по {NUMBER})")
+    print(f"{'N':>8} {'поиск: список':>14} {'поиск: индекс':>14} "
+          f"{'добавл.: список':>16} {'добавл.: индекс':>16}")
+    for n in SIZES:
+        users = [User(id=i, name=f"Пользователь {i}") for i in range(1, n + 1)]
+        repo = UserRepository(users)
+        target = n // 2
+
+        t_list_get = timeit.timeit(lambda: list_lookup(users, target), number=NUMBER)
+        t_repo_get = timeit.timeit(lambda: repo.get(target), number=NUMBER)
+
+        counter = iter(range(10 ** 9))
+        t_list_add = timeit.timeit(lambda: list_add(users, f"Новый {next(counter)}"), number=NUMBER)
+        t_repo_add = timeit.timeit(lambda: repo.add(f"Новый {next(counter)}"), number=NUMBER)
+
+        print(f"{n:>8} {t_list_get / NUMBER * 1e6:>14.2f} {t_repo_get / NUMBER * 1e6:>14.2f} "
+              f"{t_list_add / NUMBER * 1e6:>16.2f} {t_repo_add / NUMBER * 1e6:>16.2f}")
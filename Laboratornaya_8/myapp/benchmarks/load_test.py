@@ -0,0 +1,119 @@
+"""
+Нагрузочный тест режимов сервера (single / threaded / prefork / async).
+
+Для каждого режима запускает myapp.py отдельным процессом и в течение
+заданного времени опрашивает его несколькими параллельными клиентами.
+
+Запуск: python benchmarks/load_test.py --clients 32 --duration 10 --path /users
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, timeout: float = 30.0) -> None:
+    """Дождаться, пока сервер начнёт отвечать."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    raise RuntimeError(f"Сервер не ответил за {timeout} с: {url}")
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return sorted_values[index]
+
+
+def run_load(url: str, clients: int, duration: float) -> Dict:
+    """
+    Опрашивать url параллельными клиентами duration секунд.
+
+    Returns:
+        Словарь с числом запросов, ошибок, req/s и задержками p50/p99 в мс
+    """
+    latencies: List[List[float]] = [[] for _ in range(clients)]
+    errors = [0] * clients
+    deadline = time.monotonic() + duration
+
+    def worker(i: int) -> None:
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=10) as response:
+                    response.read()
+            except (urllib.error.URLError, OSError):
+                errors[i] += 1
+                continue
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    merged = sorted(t for per_client in latencies for t in per_client)
+    return {
+        'requests': len(merged),
+        'errors': sum(errors),
+        'rps': len(merged) / elapsed,
+        'p50': _percentile(merged, 0.50) * 1000,
+        'p99': _percentile(merged, 0.99) * 1000
+    }
+
+
+def bench_mode(mode: str, args) -> Dict:
+    """Запустить сервер в режиме mode и измерить его под нагрузкой."""
+    port = _free_port()
+    command = [sys.executable, 'myapp.py', '--mode', mode, '--port', str(port),
+               '--workers', str(args.workers), '--processes', str(args.processes)]
+    server = subprocess.Popen(command, cwd=APP_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://localhost:{port}{args.path}"
+    try:
+        _wait_ready(url)
+        return run_load(url, args.clients, args.duration)
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Нагрузочный тест режимов сервера")
+    parser.add_argument('--modes', nargs='+', default=['single', 'threaded', 'prefork', 'async'])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--path', default='/users')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    print(f"Клиентов: {args.clients}, длительность: {args.duration} с, маршрут: {args.path}")
+    print(f"{'режим':<10} {'запросов':>9} {'ошибок':>7} {'req/s':>9} {'p50, мс':>9} {'p99, мс':>9}")
+    for mode in args.modes:
+        r = bench_mode(mode, args)
+        print(f"{mode:<10} {r['requests']:>9} {r['errors']:>7} {r['rps']:>9.1f} "
+              f"{r['p50']:>9.2f} {r['p99']:>9.2f}")
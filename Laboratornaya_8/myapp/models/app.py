@@ -5,7 +5,7 @@ from typing import Optional
 from .author import Author
 
 
-@dataclass
+@dataclass(slots=True)
 class App:
     """Класс, представляющий приложение."""
 
@@ -1,16 +1,18 @@
 """Модель пользователя."""
 
-from typing import List, Optional
+from typing import Iterable, List, Optional, Set, Tuple
 from dataclasses import dataclass, field
 
 
-@dataclass
+@dataclass(slots=True)
 class User:
     """Класс, представляющий пользователя системы."""
 
     id: int
     name: str
     subscribed_currencies: List['Currency'] = field(default_factory=list)
+    # id подписанных валют для проверки за O(1)
+    _subscription_ids: Set[int] = field(default_factory=set, init=False, repr=False, compare=False)
 
     def __post_init__(self):
         """Проверка корректности данных после инициализации."""
@@ -18,14 +20,48 @@ class User:
             raise ValueError("ID должен быть положительным целым числом")
         if not isinstance(self.name, str) or len(self.name.strip()) < 2:
             raise ValueError("Имя должно быть строкой длиной не менее 2 символов")
+        self._subscription_ids = {c.id for c in self.subscribed_currencies}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, str]], validate: bool = True) -> List['User']:
+        """
+        Создать пользователей без подписок из строк (id, name).
+
+        Args:
+            rows: Строки с id и именем
+            validate: False - строки уже проверены, True - каждая строка
+                проверяется конструктором
+
+        Raises:
+            ValueError: Если id или имя какой-либо строки некорректны
+        """
+        if validate:
+            return [cls(*row) for row in rows]
+
+        new = object.__new__
+        result = []
+        append = result.append
+        for user_id, name in rows:
+            user = new(cls)
+            user.id = user_id
+            user.name = name
+            user.subscribed_currencies = []
+            user._subscription_ids = set()
+            append(user)
+        return result
 
     def subscribe_to_currency(self, currency: 'Currency') -> None:
         """Добавить валюту в список подписок пользователя."""
-        if currency not in self.subscribed_currencies:
+        if currency.id not in self._subscription_ids:
+            self._subscription_ids.add(currency.id)
             self.subscribed_currencies.append(currency)
 
     def unsubscribe_from_currency(self, currency_id: int) -> None:
         """Удалить валюту из списка подписок."""
+        if currency_id not in self._subscription_ids:
+            return
+        self._subscription_ids.discard(currency_id)
+        # Список подписок пользователя не длиннее списка валют
         self.subscribed_currencies = [
             c for c in self.subscribed_currencies
             if c.id != currency_id
@@ -1,9 +1,10 @@
 """Модель связи пользователь-валюта."""
 
 from dataclasses import dataclass
+from typing import Iterable, List, Tuple
 
 
-@dataclass
+@dataclass(slots=True)
 class UserCurrency:
     """Класс, представляющий связь между пользователем и валютой."""
 
@@ -15,4 +16,32 @@ class UserCurrency:
         """Проверка корректности данных после инициализации."""
         if not all(isinstance(x, int) and x > 0
                    for x in [self.id, self.user_id, self.currency_id]):
-            raise ValueError("Все ID должны быть положительными целыми числами")
\ No newline at end of file
+            raise ValueError("Все ID должны быть положительными целыми числами")
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, int, int]],
+                  validate: bool = True) -> List['UserCurrency']:
+        """
+        Создать связи из строк (id, user_id, currency_id).
+
+        Args:
+            rows: Строки с полями связи
+            validate: False - строки уже проверены, True - каждая строка
+                проверяется конструктором
+
+        Raises:
+            ValueError: Если какой-либо id некорректен
+        """
+        if validate:
+            return [cls(*row) for row in rows]
+
+        new = object.__new__
+        result = []
+        append = result.append
+        for id_, user_id, currency_id in rows:
+            record = new(cls)
+            record.id = id_
+            record.user_id = user_id
+            record.currency_id = currency_id
+            append(record)
+        return result
\ No newline at end of file
@@ -1,17 +1,40 @@
 """Основной файл приложения - сервер и маршрутизация."""
 
-import json
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
-from jinja2 import Environment, PackageLoader, select_autoescape
-from typing import Dict, List, Optional
+import argparse
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler
+from operator import attrgetter
+from typing import Dict, List, Optional, Tuple
 
 from models import Author, App, User, Currency, UserCurrency
-from utils.currencies_api import get_currencies
-
-
-class CurrencyAppHandler(BaseHTTPRequestHandler):
-    """Обработчик HTTP-запросов для приложения валют."""
+from utils.currencies_api import get_currencies_guarded, get_history_store
+from utils.http_messages import Request, Response, chunked_body, html_response, error_response
+from utils.compression import CompressionCache, compress_response
+from utils.page_cache import PageCache, etag_matches, make_etag
+from utils.json_api import (CURRENCY_FIELDS, HISTORY_FIELDS, JSON_CONTENT_TYPE, USER_FIELDS,
+                            json_response, parse_fields, records, stream_array)
+from utils.pagination import Page, clamp_page, paginate, paging_params, query_int
+from utils.template_bundle import load_environment
+from utils.static_files import STATIC_PREFIX, static_files
+from utils.user_repository import DuplicateUserError, UserNotFoundError, UserRepository
+from utils.storage import DEFAULT_DB_PATH, Storage
+from utils.subscriptions import SubscriptionIndex
+from utils.rates_refresher import RatesRefresher
+from servers import SERVER_MODES, make_server, serve_prefork
+from async_server import AsyncHTTPServer, make_asgi_app
+
+
+class CurrencyRoutes:
+    """
+    Маршруты приложения, не зависящие от транспорта.
+
+    Каждый обработчик получает Request и возвращает Response, поэтому
+    одни и те же маршруты обслуживаются и http.server, и asyncio-сервером.
+    """
 
     # Общие данные для приложения
     app_instance = App(
@@ -20,196 +43,338 @@ class CurrencyAppHandler(BaseHTTPRequestHandler):
         author=Author(name="Осипов Тимофей Максимович", group="P3121")
     )
 
-    # Пример данных (в реальном приложении будут из БД)
-    users = [
+    # Хранилище SQLite (подключается в run_server, см. attach_storage)
+    storage: Optional[Storage] = None
+
+    # Пример данных; при подключённом хранилище загружаются из базы
+    user_repository = UserRepository([
         User(id=1, name="Алексей Петров"),
         User(id=2, name="Мария Сидорова"),
         User(id=3, name="Дмитрий Козлов")
-    ]
+    ])
 
-    # Кэш валют
-    currencies_cache: List[Currency] = []
-
-    # Инициализация Jinja2
-    env = Environment(
-        loader=PackageLoader("myapp"),
-        autoescape=select_autoescape()
-    )
+    # Подписки пользователей на валюты (индекс в обе стороны)
+    subscriptions = SubscriptionIndex()
 
-    def do_POST(self):
-        """Обработка POST-запросов."""
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
-
-        print(f"POST запрос на: {path}")
-
-        if path == '/users':
-            self._handle_add_user()
-        elif path == '/edit-user':
-            self._handle_edit_user()
-        elif path == '/delete-user':
-            self._handle_delete_user()
+    # Кэш валют (подменяется целиком, см. RatesRefresher)
+    currencies_cache: List[Currency] = []
+    currencies_updated_at: Optional[str] = None
+    currencies_lock = threading.Lock()
+
+    # Версия курсов: увеличивается при каждой публикации снимка
+    currencies_version = 0
+
+    # Только чтение: POST-маршруты отвечают 405 (режим prefork без базы, где
+    # у каждого процесса свои пользователи и подписки в памяти)
+    read_only = False
+
+    # Перезагрузка индексов после изменения базы другим процессом
+    storage_sync_lock = threading.Lock()
+
+    # Инициализация Jinja2: все шаблоны загружаются при старте,
+    # из скомпилированного пакета, если он собран (python -m utils.template_bundle)
+    env = load_environment()
+
+    # Статические файлы (static_url() в шаблонах - адрес с отпечатком содержимого)
+    static_files = static_files
+
+    # Таблица маршрутов: (метод, путь) -> имя обработчика
+    routes = {
+        ('GET', '/'): '_handle_home',
+        ('GET', '/users'): '_handle_users',
+        ('GET', '/user'): '_handle_user_detail',
+        ('GET', '/currencies'): '_handle_currencies',
+        ('GET', '/author'): '_handle_author',
+        ('POST', '/users'): '_handle_add_user',
+        ('POST', '/edit-user'): '_handle_edit_user',
+        ('POST', '/delete-user'): '_handle_delete_user',
+        ('POST', '/subscribe'): '_handle_subscribe',
+        ('POST', '/unsubscribe'): '_handle_unsubscribe',
+        ('GET', '/api/currencies'): '_handle_api_currencies',
+        ('GET', '/api/users'): '_handle_api_users'
+    }
+
+    # Маршруты с параметром в пути: (метод, префикс) -> обработчик(request, остаток пути)
+    prefix_routes = {
+        ('GET', '/api/user/'): '_handle_api_user',
+        ('GET', '/api/history/'): '_handle_api_history'
+    }
+
+    # Страницы, которые зависят только от перечисленных версий данных
+    # (и параметров запроса), кэшируются целиком: путь -> имена версий
+    cached_pages = {
+        '/': ('users', 'currencies'),
+        '/users': ('users', 'subscriptions'),
+        '/currencies': ('currencies',),
+        '/author': (),
+        '/api/currencies': ('currencies',),
+        '/api/users': ('users', 'subscriptions')
+    }
+    # То же для путей с параметром: префикс -> имена версий
+    cached_prefixes = {
+        '/api/user/': ('users', 'subscriptions')
+    }
+    page_cache = PageCache()
+
+    # История курсов для /api/history/ (None - общее хранилище get_history_store())
+    history_store = None
+    # Диапазоны истории длиннее этого числа дней отдаются по частям
+    history_stream_days = 400
+    history_max_days = 3660
+
+    # Сжатие ответов: тела меньше порога отправляются как есть
+    compression_cache = CompressionCache()
+    compress_min_size = 1024
+
+    # Столбцы таблицы валют, по которым можно сортировать: ?sort= -> ключ
+    currency_sort_keys = {
+        'char_code': attrgetter('char_code'),
+        'name': attrgetter('name'),
+        'value': attrgetter('value_per_unit'),
+        'nominal': attrgetter('nominal'),
+    }
+
+    @property
+    def users(self) -> List[User]:
+        """Все пользователи (общий список только для чтения)."""
+        return self.user_repository.all()
+
+    @property
+    def users_version(self) -> int:
+        """Версия данных пользователей: меняется при каждом изменении."""
+        return self.user_repository.version
+
+    @property
+    def subscriptions_version(self) -> int:
+        """Версия подписок: меняется при каждой подписке и отписке."""
+        return self.subscriptions.version
+
+    def dispatch(self, request: Request) -> Response:
+        """Обработать запрос и сжать ответ, если клиент это поддерживает."""
+        if self.storage is not None and not request.path.startswith(STATIC_PREFIX):
+            self._sync_with_storage()
+        version_names = self._cache_versions(request) if request.method == 'GET' else None
+        if version_names is not None:
+            response = self._cached_page(request, version_names)
         else:
-            self._send_error_response(405, "Метод не поддерживается")
+            response = self._route(request)
+        if response.chunks is not None and request.version == 'HTTP/1.0':
+            # В HTTP/1.0 нет Transfer-Encoding: chunked - тело собирается целиком
+            response = response.buffered()
+        if request.path.startswith(STATIC_PREFIX):
+            # Статика сжимается заранее (python -m utils.static_files)
+            return response
+        return compress_response(response, request.headers.get('accept-encoding'),
+                                 self.compression_cache, self.compress_min_size)
+
+    def _sync_with_storage(self) -> None:
+        """
+        Перезагрузить пользователей и подписки, если базу изменил другой процесс.
+
+        Собственные записи процесса попадают в индексы сразу и счётчик
+        изменений не сбивают, поэтому перезагрузка нужна только после
+        чужих записей (соседних процессов prefork или другого сервера с
+        той же базой). Версии для кэша страниц после замены продолжают расти.
+        """
+        versions = self.storage.versions()
+        if (versions['users'] == self.user_repository.storage_version
+                and versions['subscriptions'] == self.subscriptions.storage_version):
+            return
+        with self.storage_sync_lock:
+            versions = self.storage.versions()
+            repository = CurrencyRoutes.user_repository
+            if versions['users'] != repository.storage_version:
+                fresh = UserRepository.from_storage(self.storage)
+                fresh.version = repository.version + 1
+                CurrencyRoutes.user_repository = fresh
+            subscriptions = CurrencyRoutes.subscriptions
+            if versions['subscriptions'] != subscriptions.storage_version:
+                fresh = SubscriptionIndex.from_storage(self.storage)
+                fresh.version = subscriptions.version + 1
+                CurrencyRoutes.subscriptions = fresh
+
+    def _cache_versions(self, request: Request) -> Optional[Tuple[str, ...]]:
+        """Имена версий, от которых зависит страница, или None, если она не кэшируется."""
+        names = self.cached_pages.get(request.path)
+        if names is None:
+            for prefix, prefix_names in self.cached_prefixes.items():
+                if request.path.startswith(prefix):
+                    return prefix_names
+        return names
+
+    def _cached_page(self, request: Request, version_names: Tuple[str, ...]) -> Response:
+        """
+        Отдать страницу из кэша, отрендерив её только при изменении данных.
+
+        Если ETag совпадает с If-None-Match, возвращается 304 без тела.
+        """
+        versions = tuple(getattr(self, f'{name}_version') for name in version_names)
+        query = tuple(sorted((name, tuple(values)) for name, values in request.query.items()))
+        key = (request.path, query) + versions
+        page = self.page_cache.get(key)
+        if page is None:
+            response = self._route(request)
+            if response.status != 200:
+                return response
+            page = self.page_cache.put(key, response.body, response.content_type)
+
+        headers = {'ETag': page.etag, 'Cache-Control': 'no-cache'}
+        if etag_matches(request.headers.get('if-none-match'), page.etag):
+            return Response(304, headers=headers)
+        return Response(200, page.body, page.content_type, headers)
+
+    def _route(self, request: Request) -> Response:
+        """Выбрать обработчик по методу и пути и выполнить его."""
+        if request.method == 'POST':
+            print(f"POST запрос на: {request.path}")
+            if self.read_only:
+                return error_response(405, "Сервер работает в режиме только для чтения")
+
+        handler_name = self.routes.get((request.method, request.path))
+        if handler_name is not None:
+            return getattr(self, handler_name)(request)
+        for (method, prefix), handler_name in self.prefix_routes.items():
+            if request.method == method and request.path.startswith(prefix):
+                return getattr(self, handler_name)(request, request.path[len(prefix):])
+        if request.method == 'GET' and request.path.startswith(STATIC_PREFIX):
+            return self._handle_static(request)
+        if request.method == 'GET':
+            return self._handle_404(request)
+        return error_response(405, "Метод не поддерживается")
+
+    def is_blocking(self, request: Request) -> bool:
+        """
+        Может ли запрос надолго заблокировать поток.
+
+        Блокирующими считаются сетевой запрос курсов, чтение истории,
+        POST-маршруты (изменения записываются в SQLite) и статические
+        файлы (чтение с диска). Асинхронный сервер выполняет такие
+        запросы в пуле потоков.
+        """
+        if request.method == 'POST':
+            return True
+        if request.path.startswith(('/api/history/', STATIC_PREFIX)):
+            return True
+        return request.path in ('/currencies', '/api/currencies') and not self.currencies_cache
+
+    def _users_page(self, **messages) -> Response:
+        """Страница пользователей с сообщением об успехе или ошибке."""
+        template = self.env.get_template('users.html')
+        html = template.render(
+            myapp=self.app_instance,
+            author=self.app_instance.author,
+            title='Пользователи',
+            **self._users_context({}),
+            **messages
+        )
+        return html_response(html)
+
+    def _users_context(self, query: Dict[str, List[str]]) -> Dict:
+        """
+        Одна страница пользователей по параметрам запроса.
+
+        ?q= - поиск по началу имени, ?after= - курсорная выдача после
+        указанного id, иначе - страница ?page= размером ?per_page=.
+        """
+        page, per_page = paging_params(query)
+        search = query.get('q', [''])[0].strip()
+
+        if search:
+            users, total = self.user_repository.find_by_prefix(
+                search, (page - 1) * per_page, per_page)
+            if not users and total:
+                # Номер страницы за концом выдачи - показываем последнюю
+                page = clamp_page(page, per_page, total)
+                users, total = self.user_repository.find_by_prefix(
+                    search, (page - 1) * per_page, per_page)
+            users_page = Page(users, page, per_page, total)
+        elif 'after' in query:
+            after = query_int(query, 'after', 0, minimum=0)
+            users = self.user_repository.page_after(after, per_page)
+            users_page = Page(users, 1, per_page, len(self.user_repository))
+            if len(users) == per_page:
+                users_page.next_cursor = users[-1].id
+        else:
+            # Срез по упорядоченному индексу id, без копирования всего списка
+            total = len(self.user_repository)
+            page = clamp_page(page, per_page, total)
+            users = self.user_repository.page((page - 1) * per_page, per_page)
+            users_page = Page(users, page, per_page, total)
+
+        return {
+            'users': users_page.items,
+            'users_page': users_page,
+            'search': search,
+            'subscriptions': self.subscriptions,
+        }
 
-    def _handle_add_user(self):
+    def _handle_add_user(self, request: Request) -> Response:
         """Обработка добавления пользователя."""
         try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length).decode('utf-8')
-            params = parse_qs(post_data)
+            params = request.form
             user_name = params.get('name', [''])[0].strip()
 
             if not user_name or len(user_name) < 2:
-                template = self.env.get_template('users.html')
-                html = template.render(
-                    myapp=self.app_instance,
-                    author=self.app_instance.author,
-                    users=self.users,
-                    error_message="Имя пользователя должно содержать минимум 2 символа",
-                    title='Пользователи'
-                )
-                self._send_html_response(html)
-                return
-
-            if any(user.name == user_name for user in self.users):
-                template = self.env.get_template('users.html')
-                html = template.render(
-                    myapp=self.app_instance,
-                    author=self.app_instance.author,
-                    users=self.users,
-                    error_message=f"Пользователь '{user_name}' уже существует",
-                    title='Пользователи'
-                )
-                self._send_html_response(html)
-                return
-
-            new_id = max([u.id for u in self.users]) + 1 if self.users else 1
-            new_user = User(id=new_id, name=user_name)
-            self.users.append(new_user)
-
-            print(f"Добавлен пользователь: {user_name} (ID: {new_id})")
-
-            template = self.env.get_template('users.html')
-            html = template.render(
-                myapp=self.app_instance,
-                author=self.app_instance.author,
-                users=self.users,
-                success_message=f"Пользователь '{user_name}' успешно добавлен",
-                title='Пользователи'
-            )
-            self._send_html_response(html)
+                return self._users_page(error_message="Имя пользователя должно содержать минимум 2 символа")
+
+            try:
+                new_user = self.user_repository.add(user_name)
+            except DuplicateUserError:
+                return self._users_page(error_message=f"Пользователь '{user_name}' уже существует")
+
+            print(f"Добавлен пользователь: {user_name} (ID: {new_user.id})")
+            return self._users_page(success_message=f"Пользователь '{user_name}' успешно добавлен")
 
         except Exception as e:
             print(f"Ошибка: {e}")
-            self._send_error_response(500, f"Ошибка: {str(e)}")
+            return error_response(500, f"Ошибка: {str(e)}")
 
-    def _handle_edit_user(self):
+    def _handle_edit_user(self, request: Request) -> Response:
         """Обработка редактирования пользователя."""
         try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length).decode('utf-8')
-            params = parse_qs(post_data)
+            params = request.form
 
             user_id = int(params.get('user_id', [0])[0])
             new_name = params.get('name', [''])[0].strip()
 
             if not new_name or len(new_name) < 2:
-                template = self.env.get_template('users.html')
-                html = template.render(
-                    myapp=self.app_instance,
-                    author=self.app_instance.author,
-                    users=self.users,
-                    error_message="Имя пользователя должно содержать минимум 2 символа",
-                    title='Пользователи'
-                )
-                self._send_html_response(html)
-                return
-
-            user = next((u for u in self.users if u.id == user_id), None)
-            if not user:
-                template = self.env.get_template('users.html')
-                html = template.render(
-                    myapp=self.app_instance,
-                    author=self.app_instance.author,
-                    users=self.users,
-                    error_message="Пользователь не найден",
-                    title='Пользователи'
-                )
-                self._send_html_response(html)
-                return
-
-            if any(u.id != user_id and u.name == new_name for u in self.users):
-                template = self.env.get_template('users.html')
-                html = template.render(
-                    myapp=self.app_instance,
-                    author=self.app_instance.author,
-                    users=self.users,
-                    error_message=f"Пользователь '{new_name}' уже существует",
-                    title='Пользователи'
-                )
-                self._send_html_response(html)
-                return
-
-            old_name = user.name
-            user.name = new_name
+                return self._users_page(error_message="Имя пользователя должно содержать минимум 2 символа")
 
-            print(f"Пользователь изменен: {old_name} -> {new_name}")
+            try:
+                old_name = self.user_repository.rename(user_id, new_name)
+            except UserNotFoundError:
+                return self._users_page(error_message="Пользователь не найден")
+            except DuplicateUserError:
+                return self._users_page(error_message=f"Пользователь '{new_name}' уже существует")
 
-            template = self.env.get_template('users.html')
-            html = template.render(
-                myapp=self.app_instance,
-                author=self.app_instance.author,
-                users=self.users,
-                success_message=f"Пользователь '{old_name}' изменен на '{new_name}'",
-                title='Пользователи'
-            )
-            self._send_html_response(html)
+            print(f"Пользователь изменен: {old_name} -> {new_name}")
+            return self._users_page(success_message=f"Пользователь '{old_name}' изменен на '{new_name}'")
 
         except Exception as e:
             print(f"Ошибка: {e}")
-            self._send_error_response(500, f"Ошибка: {str(e)}")
+            return error_response(500, f"Ошибка: {str(e)}")
 
-    def _handle_delete_user(self):
+    def _handle_delete_user(self, request: Request) -> Response:
         """Обработка удаления пользователя."""
         try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length).decode('utf-8')
-            params = parse_qs(post_data)
+            params = request.form
 
             user_id = int(params.get('user_id', [0])[0])
 
-            user_to_delete = next((u for u in self.users if u.id == user_id), None)
-            if not user_to_delete:
-                template = self.env.get_template('users.html')
-                html = template.render(
-                    myapp=self.app_instance,
-                    author=self.app_instance.author,
-                    users=self.users,
-                    error_message="Пользователь не найден",
-                    title='Пользователи'
-                )
-                self._send_html_response(html)
-                return
+            try:
+                user_to_delete = self.user_repository.delete(user_id)
+            except UserNotFoundError:
+                return self._users_page(error_message="Пользователь не найден")
 
             user_name = user_to_delete.name
-            self.users = [u for u in self.users if u.id != user_id]
+            self.subscriptions.remove_user(user_id)
 
             print(f"Пользователь удален: {user_name}")
-
-            template = self.env.get_template('users.html')
-            html = template.render(
-                myapp=self.app_instance,
-                author=self.app_instance.author,
-                users=self.users,
-                success_message=f"Пользователь '{user_name}' удален",
-                title='Пользователи'
-            )
-            self._send_html_response(html)
+            return self._users_page(success_message=f"Пользователь '{user_name}' удален")
 
         except Exception as e:
             print(f"Ошибка: {e}")
-            self._send_error_response(500, f"Ошибка: {str(e)}")
+            return error_response(500, f"Ошибка: {str(e)}")
 
     def _get_navigation(self) -> List[Dict[str, str]]:
         """Получить меню навигации."""
@@ -231,89 +396,114 @@ class CurrencyAppHandler(BaseHTTPRequestHandler):
         base_context.update(context)
         return template.render(**base_context)
 
-    def do_GET(self):
-        """Обработка GET-запросов."""
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
-        query_params = parse_qs(parsed_path.query)
-
-        # Маршрутизация
-        if path == '/':
-            self._handle_home()
-        elif path == '/users':
-            self._handle_users()
-        elif path == '/user':
-            self._handle_user_detail(query_params)
-        elif path == '/currencies':
-            self._handle_currencies()
-        elif path == '/author':
-            self._handle_author()
-        elif path.startswith('/static/'):
-            self._handle_static()
-        else:
-            self._handle_404()
-
-    def _handle_home(self):
+    def _handle_home(self, request: Request) -> Response:
         """Обработка главной страницы."""
-        # Добавьте этот код перед рендерингом
-        from datetime import datetime
-
+        # Страница кэшируется по версиям пользователей и курсов, поэтому
+        # текущее время в неё не передаётся - оно осталось бы в кэше
         html_content = self._render_template(
             'index.html',
             title='Главная страница',
             welcome_message='Добро пожаловать в приложение для отслеживания валют!',
             users=self.users,  # Добавляем пользователей
             currencies=self.currencies_cache,  # Добавляем валюты
-            last_updated=self._get_current_time(),  # Время обновления
-            now=datetime.now()  # Текущее время для футера
+            last_updated=self.currencies_updated_at  # Время публикации курсов
         )
-        self._send_html_response(html_content)
+        return html_response(html_content)
 
-    def _handle_users(self):
+    def _handle_users(self, request: Request) -> Response:
         """Обработка страницы пользователей."""
         html_content = self._render_template(
             'users.html',
             title='Пользователи',
-            users=self.users
+            **self._users_context(request.query)
         )
-        self._send_html_response(html_content)
+        return html_response(html_content)
 
-    def _handle_user_detail(self, query_params: Dict):
+    def _handle_user_detail(self, request: Request) -> Response:
         """Обработка страницы конкретного пользователя."""
-        user_id = int(query_params.get('id', [1])[0])
-        user = next((u for u in self.users if u.id == user_id), None)
+        user_id = int(request.query.get('id', [1])[0])
+        user = self.user_repository.get(user_id)
 
         if not user:
-            self._send_error_response(404, "Пользователь не найден")
-            return
+            return error_response(404, "Пользователь не найден")
 
-        # Получаем валюты для пользователя (пример)
-        user_currencies = self._get_user_currencies(user.id)
+        return self._user_page(user)
 
+    def _user_page(self, user: User, **messages) -> Response:
+        """Страница пользователя с его подписками."""
         html_content = self._render_template(
             'user.html',
             title=f'Пользователь: {user.name}',
             user=user,
-            currencies=user_currencies
+            currencies=self._get_user_currencies(user.id),
+            all_currencies=self.currencies_cache,
+            **messages
         )
-        self._send_html_response(html_content)
+        return html_response(html_content)
+
+    def _change_subscription(self, request: Request, subscribe: bool) -> Response:
+        """Подписать пользователя на валюту или отписать от неё."""
+        try:
+            params = request.form
+            user_id = int(params.get('user_id', [0])[0])
+            currency_id = int(params.get('currency_id', [0])[0])
+
+            user = self.user_repository.get(user_id)
+            if not user:
+                return error_response(404, "Пользователь не найден")
+            currency = next((c for c in self.currencies_cache if c.id == currency_id), None)
+            if not currency:
+                return self._user_page(user, error_message="Валюта не найдена")
+
+            if subscribe:
+                self.subscriptions.subscribe(user_id, currency_id)
+                message = f"Подписка на {currency.char_code} оформлена"
+            else:
+                self.subscriptions.unsubscribe(user_id, currency_id)
+                message = f"Подписка на {currency.char_code} отменена"
+            return self._user_page(user, success_message=message)
+
+        except Exception as e:
+            print(f"Ошибка: {e}")
+            return error_response(500, f"Ошибка: {str(e)}")
+
+    def _handle_subscribe(self, request: Request) -> Response:
+        """Обработка подписки на валюту."""
+        return self._change_subscription(request, subscribe=True)
+
+    def _handle_unsubscribe(self, request: Request) -> Response:
+        """Обработка отписки от валюты."""
+        return self._change_subscription(request, subscribe=False)
 
-    def _handle_currencies(self):
+    def _handle_currencies(self, request: Request) -> Response:
         """Обработка страницы валют."""
         try:
-            # Инициализируем курсы, если они пустые
+            # Курсы обновляет RatesRefresher; без него загружаем при первом запросе
             if not self.currencies_cache:
                 self._update_currencies()
 
+            sort = request.query.get('sort', [''])[0]
+            descending = request.query.get('order', ['asc'])[0] == 'desc'
+            currencies = self.currencies_cache
+            if sort in self.currency_sort_keys:
+                currencies = sorted(currencies, key=self.currency_sort_keys[sort],
+                                    reverse=descending)
+            page, per_page = paging_params(request.query)
+            currencies_page = paginate(currencies, page, per_page)
+
             html_content = self._render_template(
                 'currencies.html',
                 title='Курсы валют',
-                currencies=self.currencies_cache,
-                last_updated=self._get_current_time()
+                currencies=currencies_page.items,
+                currencies_page=currencies_page,
+                sort=sort if sort in self.currency_sort_keys else '',
+                order='desc' if descending else 'asc',
+                last_updated=self.currencies_updated_at or self._get_current_time()
             )
-            self._send_html_response(html_content)
+            return html_response(html_content)
         except Exception as e:
-            # Даже если ошибка, покажем страницу с сообщением
+            # Даже если ошибка, покажем страницу с сообщением; статус 503,
+            # чтобы страница ошибки не попала в кэш страниц
             html_content = f"""
             <html>
             <body>
@@ -323,90 +513,333 @@ class CurrencyAppHandler(BaseHTTPRequestHandler):
             </body>
             </html>
             """
-            self._send_html_response(html_content)
+            return html_response(html_content, status=503)
 
-    def _handle_author(self):
+    def _handle_api_currencies(self, request: Request) -> Response:
+        """JSON: текущие курсы валют."""
+        try:
+            fields = parse_fields(request.query, CURRENCY_FIELDS)
+        except ValueError as e:
+            return error_response(400, str(e))
+        if not self.currencies_cache:
+            try:
+                self._update_currencies()
+            except Exception as e:
+                return error_response(503, f"Курсы недоступны: {e}")
+        return json_response({
+            'updated_at': self.currencies_updated_at,
+            'items': records(self.currencies_cache, fields)
+        })
+
+    def _user_records(self, users: List[User], fields: Tuple[str, ...]) -> List[Dict]:
+        """Пользователи для JSON; subscriptions - id валют из индекса подписок."""
+        plain_fields = tuple(name for name in fields if name != 'subscriptions')
+        items = records(users, plain_fields) if plain_fields else [{} for _ in users]
+        if 'subscriptions' in fields:
+            for item, user in zip(items, users):
+                item['subscriptions'] = sorted(self.subscriptions.currencies_of(user.id))
+        return items
+
+    def _handle_api_users(self, request: Request) -> Response:
+        """JSON: страница пользователей (те же ?page=, ?per_page=, ?after=, ?q=, что у /users)."""
+        try:
+            fields = parse_fields(request.query, USER_FIELDS)
+        except ValueError as e:
+            return error_response(400, str(e))
+        users_page = self._users_context(request.query)['users_page']
+        return json_response({
+            'items': self._user_records(users_page.items, fields),
+            'page': users_page.page,
+            'per_page': users_page.per_page,
+            'total': users_page.total,
+            'next_cursor': users_page.next_cursor
+        })
+
+    def _handle_api_user(self, request: Request, user_id: str) -> Response:
+        """JSON: пользователь по id из пути /api/user/<id>."""
+        try:
+            fields = parse_fields(request.query, USER_FIELDS)
+        except ValueError as e:
+            return error_response(400, str(e))
+        user = self.user_repository.get(int(user_id)) if user_id.isdigit() else None
+        if user is None:
+            return error_response(404, "Пользователь не найден")
+        return json_response(self._user_records([user], fields)[0])
+
+    def _history_period(self, query: Dict[str, List[str]]) -> Tuple[date, date]:
+        """
+        Период истории из ?start=&end= (ISO-даты) или ?days= до сегодняшнего дня.
+
+        Raises:
+            ValueError: Если даты некорректны или период слишком длинный
+        """
+        end = date.fromisoformat(query['end'][0]) if 'end' in query else date.today()
+        if 'start' in query:
+            start = date.fromisoformat(query['start'][0])
+        else:
+            days = query_int(query, 'days', 90, maximum=self.history_max_days)
+            start = end - timedelta(days=days - 1)
+        if start > end:
+            raise ValueError("Начало периода позже конца")
+        if (end - start).days >= self.history_max_days:
+            raise ValueError(f"Период длиннее {self.history_max_days} дней")
+        return start, end
+
+    def _handle_api_history(self, request: Request, char_code: str) -> Response:
+        """
+        JSON: курсы валюты за период по дням публикации ЦБ.
+
+        Длинные периоды отдаются по частям, не собирая весь ответ в памяти
+        (клиентам HTTP/1.0 - целиком, см. dispatch). ETag зависит от
+        содержимого периода: числа строк, последней даты и контрольной суммы.
+        """
+        char_code = char_code.upper()
+        if len(char_code) != 3 or not char_code.isalpha():
+            return error_response(400, "Код валюты должен состоять из 3 букв")
+        try:
+            fields = parse_fields(request.query, HISTORY_FIELDS)
+            start, end = self._history_period(request.query)
+        except ValueError as e:
+            return error_response(400, str(e))
+
+        store = self.history_store or get_history_store()
+        digest = store.range_digest(char_code, start, end)
+        etag = make_etag(f"{char_code}|{start}|{end}|{','.join(fields)}|{digest}".encode())
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return Response(304, headers=headers)
+
+        chunks = stream_array(store.iter_range(char_code, start, end), HISTORY_FIELDS, fields)
+        if (end - start).days < self.history_stream_days:
+            return Response(200, b''.join(chunks), JSON_CONTENT_TYPE, headers)
+        return Response(200, content_type=JSON_CONTENT_TYPE, headers=headers, chunks=chunks)
+
+    def _handle_author(self, request: Request) -> Response:
         """Обработка страницы об авторе."""
         html_content = self._render_template(
             'author.html',
             title='Об авторе'
         )
-        self._send_html_response(html_content)
+        return html_response(html_content)
 
-    def _handle_static(self):
+    def _handle_static(self, request: Request) -> Response:
         """Обработка статических файлов."""
-        # Реализация для статических файлов
-        self._send_error_response(404, "Статические файлы не реализованы")
+        return self.static_files.serve(request)
 
-    def _handle_404(self):
+    def _handle_404(self, request: Request) -> Response:
         """Обработка 404 ошибки."""
         html_content = self._render_template(
             '404.html',
             title='Страница не найдена'
         )
-        self.send_response(404)
-        self.send_header('Content-Type', 'text/html; charset=utf-8')
-        self.end_headers()
-        self.wfile.write(html_content.encode('utf-8'))
+        return html_response(html_content, status=404)
 
     def _update_currencies(self):
-        """Обновить кэш курсов валют."""
-        try:
-            # Получаем курсы через API
-            currencies_data = get_currencies(['USD', 'EUR', 'GBP', 'CNY', 'JPY'])
-
-            # Преобразуем в объекты Currency
-            self.currencies_cache = []
-            for idx, (code, data) in enumerate(currencies_data.items()):
-                currency = Currency(
-                    id=idx + 1,
-                    num_code=data.get('num_code', '000'),
-                    char_code=code,
-                    name=data.get('name', code),
-                    value=float(data.get('value', 0).replace(',', '.')),
-                    nominal=int(data.get('nominal', 1))
-                )
-                self.currencies_cache.append(currency)
-        except Exception:
-            # Если API не работает, используем примерные данные
-            self.currencies_cache = [
-                Currency(1, '840', 'USD', 'Доллар США', 90.5, 1),
-                Currency(2, '978', 'EUR', 'Евро', 99.8, 1),
-                Currency(3, '826', 'GBP', 'Фунт стерлингов', 115.2, 1)
-            ]
+        """Обновить кэш курсов валют (если фоновое обновление не запущено)."""
+        _publish_currencies(load_currencies())
 
     def _get_user_currencies(self, user_id: int) -> List[Currency]:
-        """Получить валюты пользователя (заглушка)."""
-        return self.currencies_cache[:2]  # Пример
+        """Получить валюты, на которые подписан пользователь."""
+        currency_ids = self.subscriptions.currencies_of(user_id)
+        return [c for c in self.currencies_cache if c.id in currency_ids]
 
     def _get_current_time(self):
         """Получить текущее время (заглушка)."""
         from datetime import datetime
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    def _send_html_response(self, content: str):
-        """Отправить HTML-ответ."""
-        self.send_response(200)
-        self.send_header('Content-Type', 'text/html; charset=utf-8')
-        self.end_headers()
-        self.wfile.write(content.encode('utf-8'))
 
-    def _send_error_response(self, code: int, message: str):
-        """Отправить ответ с ошибкой."""
-        self.send_response(code)
-        self.send_header('Content-Type', 'application/json; charset=utf-8')
+class CurrencyAppHandler(CurrencyRoutes, BaseHTTPRequestHandler):
+    """Обработчик HTTP-запросов для приложения валют (http.server)."""
+
+    # Постоянные соединения HTTP/1.1: ответы всегда содержат Content-Length
+    # (в режиме 'single' make_server переключает обработчик на HTTP/1.0)
+    protocol_version = 'HTTP/1.1'
+
+    # Простаивающее keep-alive соединение закрывается через timeout секунд
+    # (в режимах 'threaded' и 'prefork' - раньше, если поток нужен другому)
+    timeout = 5
+
+    def do_GET(self):
+        """Обработка GET-запросов."""
+        self._send_response(self.dispatch(self._build_request()))
+
+    def do_POST(self):
+        """Обработка POST-запросов."""
+        self._send_response(self.dispatch(self._build_request()))
+
+    def _build_request(self) -> Request:
+        """Прочитать тело и собрать Request из данных http.server."""
+        content_length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(content_length) if content_length else b''
+        return Request.from_target(self.command, self.path, self.headers.items(), body,
+                                   self.request_version)
+
+    def _send_response(self, response: Response):
+        """Отправить Response клиенту."""
+        if response.chunks is not None and self.protocol_version == 'HTTP/1.0':
+            # В HTTP/1.0 нет Transfer-Encoding: chunked
+            response = response.buffered()
+        self.send_response(response.status)
+        for name, value in response.header_items():
+            self.send_header(name, value)
         self.end_headers()
-        response = {'error': message, 'code': code}
-        self.wfile.write(json.dumps(response).encode('utf-8'))
+        if response.chunks is not None:
+            for piece in chunked_body(response.chunks):
+                self.wfile.write(piece)
+        elif response.file is not None:
+            # socket.sendfile использует os.sendfile, где он доступен
+            self.wfile.flush()
+            with open(response.file.path, 'rb') as f:
+                self.connection.sendfile(f, response.file.offset, response.file.length)
+        else:
+            self.wfile.write(response.body)
+
+
+# Идентификаторы валют без БД: код получает номер при первом появлении
+# и сохраняет его между обновлениями, даже если фид изменил состав
+_currency_ids: Dict[str, int] = {}
+_currency_ids_lock = threading.Lock()
 
 
+def _currency_id(char_code: str) -> int:
+    """Стабильный id валюты по её буквенному коду."""
+    with _currency_ids_lock:
+        return _currency_ids.setdefault(char_code, len(_currency_ids) + 1)
 
-def run_server():
-    """Запустить сервер."""
-    server_address = ('localhost', 8080)
-    httpd = HTTPServer(server_address, CurrencyAppHandler)
 
-    print(f"Сервер запущен на http://{server_address[0]}:{server_address[1]}")
+def load_currencies() -> List[Currency]:
+    """
+    Загрузить курсы и построить новый список Currency.
+
+    Вызывается вне обработки запросов (из RatesRefresher), результат
+    публикуется целиком и после этого не изменяется.
+
+    Примерные курсы используются только при холодном старте (кэш курсов
+    пуст); иначе ошибка пробрасывается, и RatesRefresher оставляет
+    текущий снимок до следующей попытки.
+
+    Raises:
+        ConnectionError: Если курсы недоступны, а кэш уже заполнен
+    """
+    # Получаем курсы через API (при недоступности - последние известные)
+    currencies_data = get_currencies_guarded(['USD', 'EUR', 'GBP', 'CNY', 'JPY'],
+                                             static_fallback=not CurrencyRoutes.currencies_cache)
+
+    # Преобразуем в объекты Currency
+    currencies = []
+    for code, data in currencies_data.items():
+        currency = Currency(
+            id=_currency_id(code),
+            num_code=data.get('num_code', '000'),
+            char_code=code,
+            name=data.get('name', code),
+            value=float(str(data.get('value', 0)).replace(',', '.')),
+            nominal=int(data.get('nominal', 1))
+        )
+        currencies.append(currency)
+    return currencies
+
+
+def _rates_key(currencies: List[Currency]) -> List[tuple]:
+    """Содержимое снимка курсов без id (id зависят от хранилища)."""
+    return [(c.char_code, c.num_code, c.name, c.value, c.nominal) for c in currencies]
+
+
+def _publish_currencies(currencies: List[Currency]) -> None:
+    """
+    Атомарно подменить снимок курсов, который читают обработчики.
+
+    Если курсы не изменились, снимок, версия и время обновления остаются
+    прежними: кэш страниц и ETag не сбрасываются при каждом обновлении.
+    """
+    from datetime import datetime
+
+    with CurrencyRoutes.currencies_lock:
+        if (CurrencyRoutes.currencies_cache
+                and _rates_key(currencies) == _rates_key(CurrencyRoutes.currencies_cache)):
+            return
+
+    storage = CurrencyRoutes.storage
+    if storage is not None:
+        # Курсы сохраняются в базу, id валют берутся из неё (устойчивые для подписок)
+        ids = storage.upsert_currencies(currencies)
+        currencies = [replace(c, id=ids[c.char_code]) for c in currencies]
+
+    with CurrencyRoutes.currencies_lock:
+        previous = {c.id: c.value_per_unit for c in CurrencyRoutes.currencies_cache}
+        CurrencyRoutes.currencies_cache = currencies
+        CurrencyRoutes.currencies_updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # Версия увеличивается после подмены данных: новая версия - новые данные
+        CurrencyRoutes.currencies_version += 1
+
+    # Кого затронуло изменение курсов: по одному уведомлению на подписчика
+    changed = [c.id for c in currencies if c.id in previous and previous[c.id] != c.value_per_unit]
+    targets = CurrencyRoutes.subscriptions.notify_targets(changed)
+    if targets:
+        print(f"Изменились курсы {len(changed)} валют, уведомлений подписчикам: {len(targets)}")
+
+
+def attach_storage(path: str = DEFAULT_DB_PATH) -> Storage:
+    """
+    Подключить хранилище SQLite и загрузить из него пользователей и подписки.
+
+    При первом запуске (пустая база) в неё записываются пользователи
+    по умолчанию.
+    """
+    storage = Storage(path)
+    if storage.next_user_id() == 1:
+        storage.insert_users(CurrencyRoutes.user_repository.all())
+    CurrencyRoutes.storage = storage
+    CurrencyRoutes.user_repository = UserRepository.from_storage(storage)
+    CurrencyRoutes.subscriptions = SubscriptionIndex.from_storage(storage)
+    return storage
+
+
+# ASGI-приложение с теми же маршрутами (например, uvicorn myapp:application)
+_routes = CurrencyRoutes()
+application = make_asgi_app(_routes.dispatch, _routes.is_blocking)
+
+
+def run_server(host: str = 'localhost', port: int = 8080, mode: str = 'single',
+               workers: int = 8, max_queue: int = 64, processes: int = 4,
+               db_path: Optional[str] = DEFAULT_DB_PATH):
+    """
+    Запустить сервер.
+
+    Args:
+        host: Адрес для прослушивания
+        port: Порт
+        mode: Режим обработки запросов:
+            'single' - по одному запросу (HTTPServer);
+            'threaded' - пул из workers потоков с очередью max_queue;
+            'prefork' - processes процессов на общем сокете, в каждом пул потоков;
+              изменения записываются в общую базу, остальные процессы
+              перезагружают из неё пользователей и подписки; без базы
+              (db_path=None) - только чтение, POST-маршруты отвечают 405;
+            'async' - asyncio-сервер с keep-alive, загрузка курсов в пуле из workers потоков
+        workers: Число рабочих потоков на процесс
+        max_queue: Лимит ожидающих соединений, сверх него - ответ 503
+        processes: Число процессов в режиме prefork
+        db_path: Путь к базе SQLite (None - хранить пользователей только в памяти)
+    """
+    if db_path is not None:
+        attach_storage(db_path)
+
+    server_address = (host, port)
+    if mode == 'async':
+        _run_async_server(server_address, workers)
+        return
+
+    httpd = make_server(server_address, CurrencyAppHandler, mode=mode,
+                        workers=workers, max_queue=max_queue)
+
+    # Первый снимок курсов строится до приёма запросов, дальше - в фоне
+    refresher = RatesRefresher(loader=load_currencies, publish=_publish_currencies)
+    if mode != 'prefork':
+        refresher.start(prime=True)
+
+    print(f"Сервер запущен на http://{server_address[0]}:{server_address[1]} (режим: {mode})")
     print(f"Приложение: {CurrencyAppHandler.app_instance}")
     print("Доступные маршруты:")
     print("  / - Главная страница")
@@ -414,15 +847,59 @@ def run_server():
     print("  /user?id=<id> - Информация о пользователе")
     print("  /currencies - Курсы валют")
     print("  /author - Об авторе")
+    print("  /api/currencies, /api/users, /api/user/<id>, /api/history/<код> - JSON API")
+    print("  POST /subscribe, /unsubscribe - Подписка пользователя на валюту")
 
     try:
-        httpd.serve_forever()
+        if mode == 'prefork':
+            # Потоки и соединения SQLite не переживают fork: дочерние процессы
+            # открывают свои соединения и запускают обновление курсов сами
+            if CurrencyRoutes.storage is not None:
+                CurrencyRoutes.storage.close()
+            else:
+                # Без общей базы изменения одного процесса не видны остальным
+                CurrencyRoutes.read_only = True
+            serve_prefork(httpd, processes, on_child_start=lambda: refresher.start(prime=True))
+        else:
+            httpd.serve_forever()
     except KeyboardInterrupt:
         print("\nСервер остановлен")
     finally:
+        refresher.stop(timeout=1)
         httpd.server_close()
 
 
+def _run_async_server(server_address, workers: int):
+    """Запустить AsyncHTTPServer с фоновым обновлением курсов."""
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='blocking-route')
+    server = AsyncHTTPServer(_routes.dispatch, _routes.is_blocking, executor=executor)
+
+    refresher = RatesRefresher(loader=load_currencies, publish=_publish_currencies)
+    refresher.start(prime=True)
+
+    print(f"Сервер запущен на http://{server_address[0]}:{server_address[1]} (режим: async)")
+    try:
+        asyncio.run(server.serve_forever(*server_address))
+    except KeyboardInterrupt:
+        print("\nСервер остановлен")
+    finally:
+        refresher.stop(timeout=1)
+        executor.shutdown(wait=False)
+
 
 if __name__ == '__main__':
-    run_server()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Сервер приложения Currency Tracker")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--mode', choices=SERVER_MODES, default='single',
+                        help="Режим сервера; prefork с --no-db - только чтение (POST-запросы "
+                             "отклоняются, так как у каждого процесса свои данные в памяти)")
+    parser.add_argument('--workers', type=int, default=8, help="Потоков на процесс")
+    parser.add_argument('--max-queue', type=int, default=64, help="Лимит очереди соединений")
+    parser.add_argument('--processes', type=int, default=4, help="Процессов в режиме prefork")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="Путь к базе SQLite")
+    parser.add_argument('--no-db', action='store_true', help="Не сохранять пользователей в базу")
+    args = parser.parse_args()
+
+    run_server(args.host, args.port, args.mode, args.workers, args.max_queue, args.processes,
+               db_path=None if args.no_db else args.db)
\ No newline at end of file
@@ -0,0 +1,250 @@
+"""HTTP-серверы с разными режимами параллельной обработки запросов."""
+
+import os
+import select
+import signal
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer
+from typing import Callable, List, Optional
+
+SERVER_MODES = ('single', 'threaded', 'prefork', 'async')
+
+_OVERLOAD_BODY = b'{"error": "Server overloaded", "code": 503}'
+_OVERLOAD_RESPONSE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: application/json; charset=utf-8\r\n"
+    b"Content-Length: " + str(len(_OVERLOAD_BODY)).encode() + b"\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n"
+    b"\r\n" + _OVERLOAD_BODY
+)
+
+
+class _ReclaimableKeepAlive:
+    """
+    Примесь к обработчику: ожидание следующего запроса keep-alive, которое
+    сервер может прервать.
+
+    Между запросами соединение числится у сервера простаивающим; когда
+    новому соединению не хватает рабочего потока, сервер закрывает одно
+    из простаивающих и поток освобождается, не дожидаясь таймаута.
+    """
+
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection:
+            if not self.server._await_request(self):
+                break
+            self.handle_one_request()
+
+
+class PooledHTTPServer(HTTPServer):
+    """
+    HTTP-сервер с ограниченным пулом рабочих потоков.
+
+    Одновременно обрабатывается не более workers соединений, ещё max_queue
+    ждут в очереди пула. Соединения сверх этого лимита сразу получают
+    503, чтобы перегрузка не превращалась в бесконечный рост очереди.
+
+    Постоянное соединение (keep-alive) занимает поток, пока ждёт
+    следующего запроса, поэтому при нехватке потоков простаивающие
+    соединения закрываются (клиент откроет новое), а при очереди к пулу
+    новые простаивать не остаются.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, server_address, handler_class, workers: int = 8, max_queue: int = 64,
+                 bind_and_activate: bool = True):
+        """
+        Args:
+            server_address: Пара (хост, порт)
+            handler_class: Класс обработчика запросов
+            workers: Число рабочих потоков
+            max_queue: Сколько принятых соединений может ждать свободного потока
+        """
+        # Очередь ядра на listen() не меньше очереди пула
+        self.request_queue_size = max(HTTPServer.request_queue_size, max_queue)
+        if not issubclass(handler_class, _ReclaimableKeepAlive):
+            handler_class = type(handler_class.__name__, (_ReclaimableKeepAlive, handler_class), {})
+        super().__init__(server_address, handler_class, bind_and_activate)
+        self.workers = workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http-worker')
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self.rejected = 0
+        self.reclaimed = 0
+
+        self._conn_lock = threading.Lock()
+        # Соединения в пуле (в обработке, в простое и в очереди)
+        self._connections = 0
+        # Соединения keep-alive, ждущие следующего запроса
+        self._idle = set()
+
+    def process_request(self, request, client_address):
+        """Передать соединение в пул или отклонить при переполнении."""
+        acquired = self._slots.acquire(blocking=False)
+        if not acquired and self._reclaim_idle():
+            # Место освободится, как только поток закроет простаивающее соединение
+            acquired = self._slots.acquire(timeout=1.0)
+        if not acquired:
+            self.rejected += 1
+            try:
+                request.sendall(_OVERLOAD_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        with self._conn_lock:
+            self._connections += 1
+            saturated = self._connections > self.workers
+        if saturated:
+            self._reclaim_idle()
+        self._pool.submit(self._process_in_worker, request, client_address)
+
+    def _process_in_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._conn_lock:
+                self._connections -= 1
+            self._slots.release()
+
+    def _reclaim_idle(self) -> bool:
+        """Закрыть одно простаивающее соединение keep-alive, чтобы освободить поток."""
+        with self._conn_lock:
+            if not self._idle:
+                return False
+            conn = self._idle.pop()
+            self.reclaimed += 1
+            try:
+                # Ожидание в select() завершается, чтение вернёт конец потока
+                conn.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+        return True
+
+    def _await_request(self, handler) -> bool:
+        """
+        Дождаться следующего запроса keep-alive (вызывается рабочим потоком).
+
+        Returns:
+            False, если соединение нужно закрыть: истёк таймаут простоя или
+            поток нужен соединениям из очереди.
+        """
+        conn = handler.connection
+        if self._request_buffered(handler):
+            return True
+        with self._conn_lock:
+            if self._connections > self.workers:
+                return False
+            self._idle.add(conn)
+        try:
+            readable, _, _ = select.select([conn], [], [], handler.timeout)
+        except (OSError, ValueError):
+            readable = []
+        finally:
+            with self._conn_lock:
+                self._idle.discard(conn)
+        return bool(readable)
+
+    @staticmethod
+    def _request_buffered(handler) -> bool:
+        """Есть ли начало следующего запроса в буфере чтения или в сокете."""
+        conn = handler.connection
+        conn.setblocking(False)
+        try:
+            return bool(handler.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            conn.settimeout(handler.timeout)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+
+def make_server(server_address, handler_class, mode: str = 'single',
+                workers: int = 8, max_queue: int = 64) -> HTTPServer:
+    """
+    Создать сервер для режимов 'single', 'threaded' и 'prefork'.
+
+    В режиме 'single' ответы отправляются по HTTP/1.0 (без keep-alive),
+    в остальных - с протоколом handler_class.
+
+    Raises:
+        ValueError: При неизвестном режиме
+    """
+    if mode == 'single':
+        # Единственный поток: соединение keep-alive занимало бы сервер до
+        # таймаута простоя, поэтому соединение закрывается после ответа
+        if handler_class.protocol_version != 'HTTP/1.0':
+            handler_class = type(handler_class.__name__, (handler_class,),
+                                 {'protocol_version': 'HTTP/1.0'})
+        return HTTPServer(server_address, handler_class)
+    if mode in ('threaded', 'prefork'):
+        return PooledHTTPServer(server_address, handler_class, workers=workers, max_queue=max_queue)
+    if mode == 'async':
+        raise ValueError("Режим 'async' обслуживается AsyncHTTPServer из async_server.py")
+    raise ValueError(f"Неизвестный режим сервера: {mode}")
+
+
+def serve_prefork(httpd: HTTPServer, processes: int,
+                  on_child_start: Optional[Callable[[], None]] = None) -> None:
+    """
+    Обслуживать уже открытый сокет несколькими процессами.
+
+    Родитель создаёт слушающий сокет и делает fork; каждый дочерний
+    процесс принимает соединения с того же сокета (ядро распределяет
+    их между процессами). Состояние в памяти у каждого процесса своё,
+    поэтому общие данные приложение должно хранить вне процесса (myapp
+    записывает изменения в SQLite и перезагружает индексы по счётчику
+    изменений базы).
+
+    Args:
+        httpd: Сервер с открытым сокетом (созданный до fork)
+        processes: Число дочерних процессов
+        on_child_start: Вызывается в каждом дочернем процессе после fork
+            (например, для запуска фоновых потоков, которые fork не копирует)
+
+    Raises:
+        RuntimeError: Если платформа не поддерживает fork
+    """
+    if not hasattr(os, 'fork'):
+        raise RuntimeError("Режим prefork доступен только на POSIX-системах")
+
+    children: List[int] = []
+    for _ in range(processes):
+        pid = os.fork()
+        if pid == 0:
+            # Дочерний процесс
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                if on_child_start is not None:
+                    on_child_start()
+                httpd.serve_forever()
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def _terminate(signum=None, frame=None):
+        for child in children:
+            try:
+                os.kill(child, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, lambda s, f: (_terminate(), os._exit(0)))
+    try:
+        for child in children:
+            os.waitpid(child, 0)
+    finally:
+        _terminate()
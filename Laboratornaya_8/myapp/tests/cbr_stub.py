@@ -0,0 +1,118 @@
+"""
+Локальный HTTP-сервер, имитирующий фид курсов ЦБ, для тестов без сети.
+"""
+
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional
+
+
+def make_feed(rates: Optional[Dict[str, float]] = None,
+              date: str = '2024-01-13T11:30:00+03:00',
+              timestamp: str = '2024-01-12T20:00:00+03:00') -> Dict:
+    """Собрать JSON фида в формате daily_json.js."""
+    if rates is None:
+        rates = {'USD': 89.6883, 'EUR': 98.2167, 'JPY': 61.7542}
+    names = {'USD': ('840', 'Доллар США', 1), 'EUR': ('978', 'Евро', 1),
+             'JPY': ('392', 'Японских иен', 100), 'GBP': ('826', 'Фунт стерлингов', 1),
+             'CNY': ('156', 'Китайский юань', 1)}
+    valute = {}
+    for code, value in rates.items():
+        num_code, name, nominal = names.get(code, ('999', code, 1))
+        valute[code] = {
+            'ID': 'R0' + num_code,
+            'NumCode': num_code,
+            'CharCode': code,
+            'Nominal': nominal,
+            'Name': name,
+            'Value': value,
+            'Previous': value
+        }
+    return {
+        'Date': date,
+        'PreviousDate': date,
+        'PreviousURL': '//www.cbr-xml-daily.ru/archive/2024/01/12/daily_json.js',
+        'Timestamp': timestamp,
+        'Valute': valute
+    }
+
+
+class CBRStubServer:
+    """
+    Заглушка фида ЦБ на случайном порту.
+
+    Атрибуты:
+        routes: Словарь {путь: JSON-объект} для ответов 200
+        etag: Значение ETag (None - не отправлять)
+        fail: Если True, все запросы завершаются ошибкой 503
+        requests_log: Список (путь, заголовки) принятых запросов
+    """
+
+    def __init__(self, routes: Optional[Dict[str, Dict]] = None, etag: Optional[str] = '"v1"'):
+        self.routes = routes if routes is not None else {'/daily_json.js': make_feed()}
+        self.etag = etag
+        self.fail = False
+        self.delay = 0.0
+        self.requests_log: List = []
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Базовый URL сервера."""
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def url(self, path: str = '/daily_json.js') -> str:
+        """Полный URL для пути."""
+        return self.base_url + path
+
+    def __enter__(self) -> 'CBRStubServer':
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests_log.append((self.path, dict(self.headers)))
+                if stub.delay:
+                    time.sleep(stub.delay)
+
+                if stub.fail:
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                if self.path not in stub.routes:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                if stub.etag and self.headers.get('If-None-Match') == stub.etag:
+                    self.send_response(304)
+                    self.send_header('ETag', stub.etag)
+                    self.end_headers()
+                    return
+
+                body = json.dumps(stub.routes[self.path], ensure_ascii=False).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/javascript; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                if stub.etag:
+                    self.send_header('ETag', stub.etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
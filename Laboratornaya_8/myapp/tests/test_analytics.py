@@ -0,0 +1,148 @@
+"""
+Тесты векторизованной аналитики курсов.
+"""
+
+import math
+import unittest
+import sys
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from models import Currency
+from utils.analytics import (history_matrix, sma, ema, rolling_volatility,
+                             cross_rate, RollingStats)
+from utils.history_store import HistoryStore
+
+
+def _prices(days: int = 60, n: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(42)
+    return 50 * np.exp(np.cumsum(rng.normal(0, 0.01, (days, n)), axis=0))
+
+
+class TestBatchAnalytics(unittest.TestCase):
+    """Сравнение векторных функций с наивными циклами."""
+
+    def test_sma_matches_loop(self):
+        """SMA совпадает с наивным расчётом."""
+        values = _prices()
+        result = sma(values, 5)
+        self.assertTrue(np.isnan(result[3]).all())
+        for j in range(values.shape[1]):
+            expected = sum(values[10 - k, j] for k in range(5)) / 5
+            self.assertAlmostEqual(result[10, j], expected)
+        print("test_sma_matches_loop пройден")
+
+    def test_ema_matches_loop(self):
+        """EMA совпадает с рекуррентной формулой."""
+        values = _prices()
+        alpha = 2 / 11
+        expected = values[0, 1]
+        for t in range(1, len(values)):
+            expected = alpha * values[t, 1] + (1 - alpha) * expected
+        self.assertAlmostEqual(ema(values, 10)[-1, 1], expected)
+        print("test_ema_matches_loop пройден")
+
+    def test_volatility_matches_loop(self):
+        """Волатильность - выборочное СКО лог-доходностей за окно."""
+        values = _prices()
+        result = rolling_volatility(values, 10)
+        returns = [math.log(values[t, 0] / values[t - 1, 0]) for t in range(41, 51)]
+        mean = sum(returns) / 10
+        expected = math.sqrt(sum((r - mean) ** 2 for r in returns) / 9)
+        self.assertAlmostEqual(result[50, 0], expected)
+        self.assertTrue(np.isnan(result[9]).all())
+        print("test_volatility_matches_loop пройден")
+
+    def test_cross_rate(self):
+        """EUR/USD через рубль."""
+        values = np.array([[90.0, 99.0], [91.0, 100.1]])
+        np.testing.assert_allclose(cross_rate(values, ['USD', 'EUR'], 'EUR', 'USD'), [1.1, 1.1])
+        print("test_cross_rate пройден")
+
+    def test_history_matrix_from_store(self):
+        """Матрица истории строится по хранилищу с учётом номинала."""
+        store = HistoryStore(':memory:')
+        for offset in range(5):
+            day = date.today() - timedelta(days=offset)
+            store.append_day(day, {'USD': {'Value': 90.0, 'Nominal': 1},
+                                   'JPY': {'Value': 60.0, 'Nominal': 100}})
+        dates, values = history_matrix(['USD', 'JPY'], days=5, store=store)
+        self.assertEqual(len(dates), 5)
+        self.assertEqual(dates[-1], date.today().isoformat())
+        np.testing.assert_allclose(values[-1], [90.0, 0.6])
+        store.close()
+        print("test_history_matrix_from_store пройден")
+
+
+class TestRollingStats(unittest.TestCase):
+    """Инкрементальный расчёт совпадает с пакетным."""
+
+    def test_incremental_matches_batch(self):
+        """После каждого дня показатели совпадают с пересчётом с нуля."""
+        values = _prices(days=40)
+        stats = RollingStats(['A', 'B', 'C'], window=7, span=5)
+        batch_sma, batch_ema, batch_vol = sma(values, 7), ema(values, 5), rolling_volatility(values, 7)
+        for t, row in enumerate(values):
+            stats.update(row)
+            np.testing.assert_allclose(stats.sma, batch_sma[t])
+            np.testing.assert_allclose(stats.ema, batch_ema[t])
+            np.testing.assert_allclose(stats.volatility, batch_vol[t], rtol=1e-6)
+        print("test_incremental_matches_batch пройден")
+
+    def test_update_from_currencies(self):
+        """Новый день можно передать списком моделей Currency."""
+        stats = RollingStats(['USD', 'JPY'], window=2)
+        for value in (90.0, 92.0):
+            stats.update_from_currencies([
+                Currency(1, '840', 'USD', 'Доллар США', value, 1),
+                Currency(2, '392', 'JPY', 'Японская иена', 60.0, 100),
+            ])
+        np.testing.assert_allclose(stats.sma, [91.0, 0.6])
+        self.assertEqual(set(stats.snapshot()), {'USD', 'JPY'})
+        print("test_update_from_currencies пройден")
+
+    def test_missing_day(self):
+        """Пропуск не портит показатели: после выхода из окна они совпадают с пакетными."""
+        values = _prices(days=30)
+        gapped = values.copy()
+        gapped[5, 1] = np.nan
+        stats = RollingStats(['A', 'B', 'C'], window=7, span=5)
+        for row in gapped[:8]:
+            stats.update(row)
+        np.testing.assert_allclose(stats.sma[1], np.mean(np.delete(values[1:8, 1], 4)))
+        self.assertTrue(np.isfinite(stats.ema).all())
+        self.assertTrue(np.isfinite(stats.volatility).all())
+
+        # Через окно после пропуска SMA и волатильность снова точные
+        for row in gapped[8:]:
+            stats.update(row)
+        np.testing.assert_allclose(stats.sma, sma(values, 7)[-1])
+        np.testing.assert_allclose(stats.volatility, rolling_volatility(values, 7)[-1], rtol=1e-6)
+        print("test_missing_day пройден")
+
+    def test_gaps_match_batch(self):
+        """С пропусками (в том числе до первой записи валюты) пакетный и инкрементальный расчёты совпадают."""
+        gapped = _prices(days=40)
+        gapped[:3, 0] = np.nan
+        gapped[[10, 11, 25], 1] = np.nan
+        gapped[30, :] = np.nan
+        stats = RollingStats(['A', 'B', 'C'], window=7, span=5)
+        batch_sma, batch_ema = sma(gapped, 7), ema(gapped, 5)
+        batch_vol = rolling_volatility(gapped, 7)
+        self.assertTrue(np.isfinite(batch_ema[3:]).all())
+        for t, row in enumerate(gapped):
+            stats.update(row)
+            np.testing.assert_allclose(stats.sma, batch_sma[t])
+            np.testing.assert_allclose(stats.ema, batch_ema[t])
+            np.testing.assert_allclose(stats.volatility, batch_vol[t], rtol=1e-6)
+        print("test_gaps_match_batch пройден")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,136 @@
+"""
+Тесты асинхронного клиента API курсов валют.
+"""
+
+import asyncio
+import threading
+import unittest
+import sys
+import os
+from datetime import date
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from cbr_stub import CBRStubServer, make_feed
+from utils.async_currencies_api import AsyncCurrencyClient, get_currencies_sync
+
+
+class TestAsyncCurrencyClient(unittest.TestCase):
+    """Тесты AsyncCurrencyClient против локальной заглушки фида."""
+
+    def test_get_currencies(self):
+        """Асинхронное получение курсов в формате синхронного API."""
+        with CBRStubServer() as stub:
+            client = AsyncCurrencyClient(url=stub.url(), mirror_urls=())
+            result = asyncio.run(client.get_currencies(['USD', 'JPY']))
+
+        self.assertEqual(result['USD']['value'], 89.6883)
+        self.assertEqual(result['JPY']['nominal'], 100)
+        print("test_get_currencies пройден")
+
+    def test_concurrent_callers_share_one_fetch(self):
+        """Одновременные вызовы объединяются в один запрос."""
+        with CBRStubServer() as stub:
+            stub.delay = 0.2
+            client = AsyncCurrencyClient(url=stub.url(), mirror_urls=())
+
+            async def run():
+                return await asyncio.gather(*(client.fetch_json(stub.url()) for _ in range(5)))
+
+            results = asyncio.run(run())
+
+        self.assertEqual(len(stub.requests_log), 1)
+        self.assertTrue(all(r == results[0] for r in results))
+        print("test_concurrent_callers_share_one_fetch пройден")
+
+    def test_mirror_fallback(self):
+        """Если основной адрес не отвечает, используется зеркало."""
+        with CBRStubServer(routes={'/mirror.js': make_feed({'USD': 91.0})}) as stub:
+            client = AsyncCurrencyClient(url=stub.url('/missing.js'),
+                                         mirror_urls=[stub.url('/mirror.js')])
+            result = get_currencies_sync(['USD'], client)
+
+        self.assertEqual(result['USD']['value'], 91.0)
+        print("test_mirror_fallback пройден")
+
+    def test_mirror_only_when_needed(self):
+        """Зеркало не запрашивается, пока основной источник отвечает вовремя."""
+        with CBRStubServer(routes={'/daily_json.js': make_feed(),
+                                   '/mirror.js': make_feed({'USD': 91.0})}) as stub:
+            stub.delay = 0.1
+            client = AsyncCurrencyClient(url=stub.url(), mirror_urls=[stub.url('/mirror.js')],
+                                         hedge_delay=1.0)
+            result = asyncio.run(client.get_currencies(['USD']))
+
+        self.assertEqual(result['USD']['value'], 89.6883)
+        self.assertEqual([path for path, _ in stub.requests_log], ['/daily_json.js'])
+        print("test_mirror_only_when_needed пройден")
+
+    def test_slow_primary_hedged(self):
+        """Если основной источник долго не отвечает, запрашивается зеркало."""
+        with CBRStubServer() as slow, \
+                CBRStubServer(routes={'/mirror.js': make_feed({'USD': 91.0})}) as mirror:
+            slow.delay = 1.0
+            client = AsyncCurrencyClient(url=slow.url(), mirror_urls=[mirror.url('/mirror.js')],
+                                         hedge_delay=0.05)
+            result = asyncio.run(client.get_currencies(['USD']))
+
+        self.assertEqual(result['USD']['value'], 91.0)
+        self.assertEqual(len(mirror.requests_log), 1)
+        print("test_slow_primary_hedged пройден")
+
+    def test_non_object_json(self):
+        """Ответ не-объект считается ошибкой источника, а не TypeError."""
+        with CBRStubServer(routes={'/list.js': [1, 2], '/number.js': 5}) as stub:
+            client = AsyncCurrencyClient(url=stub.url('/list.js'), mirror_urls=[stub.url('/number.js')])
+            with self.assertRaises(ConnectionError):
+                asyncio.run(client.fetch_daily())
+        print("test_non_object_json пройден")
+
+    def test_sync_callers_share_one_fetch(self):
+        """Синхронные вызовы из разных потоков объединяются в одну загрузку."""
+        with CBRStubServer() as stub:
+            stub.delay = 0.2
+            client = AsyncCurrencyClient(url=stub.url(), mirror_urls=())
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(get_currencies_sync(['USD'], client)))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(len(stub.requests_log), 1)
+        print("test_sync_callers_share_one_fetch пройден")
+
+    def test_all_sources_down(self):
+        """Ошибка всех источников приводит к ConnectionError."""
+        with CBRStubServer() as stub:
+            stub.fail = True
+            client = AsyncCurrencyClient(url=stub.url(), mirror_urls=[stub.url()])
+            with self.assertRaises(ConnectionError):
+                get_currencies_sync(['USD'], client)
+        print("test_all_sources_down пройден")
+
+    def test_fetch_archive_skips_missing_dates(self):
+        """Архивные даты загружаются параллельно, отсутствующие пропускаются."""
+        routes = {
+            '/archive/2024/01/11/daily_json.js': make_feed({'USD': 89.0}),
+            '/archive/2024/01/12/daily_json.js': make_feed({'USD': 89.5}),
+        }
+        with CBRStubServer(routes=routes) as stub:
+            client = AsyncCurrencyClient(
+                archive_url=stub.base_url + '/archive/{date:%Y/%m/%d}/daily_json.js')
+            days = [date(2024, 1, 11), date(2024, 1, 12), date(2024, 1, 13)]
+            archive = asyncio.run(client.fetch_archive(days))
+
+        self.assertEqual(sorted(archive), days[:2])
+        self.assertEqual(archive[date(2024, 1, 12)]['Valute']['USD']['Value'], 89.5)
+        print("test_fetch_archive_skips_missing_dates пройден")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,191 @@
+"""
+Тесты маршрутов без транспорта, асинхронного сервера и ASGI-адаптера.
+"""
+
+import asyncio
+import threading
+import unittest
+import sys
+import os
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from async_server import AsyncHTTPServer, make_asgi_app
+from models import User
+from myapp import CurrencyRoutes
+from utils.user_repository import UserRepository
+from utils.http_messages import Request, Response, html_response
+
+
+class TestCurrencyRoutes(unittest.TestCase):
+    """Маршруты вызываются напрямую, без сокетов."""
+
+    def setUp(self):
+        self.routes = CurrencyRoutes()
+        self._repository = CurrencyRoutes.user_repository
+        CurrencyRoutes.user_repository = UserRepository(
+            [User(u.id, u.name) for u in self._repository.all()])
+
+    def tearDown(self):
+        CurrencyRoutes.user_repository = self._repository
+
+    def test_get_routes(self):
+        """GET-маршруты возвращают Response с HTML."""
+        response = self.routes.dispatch(Request.from_target('GET', '/users'))
+        self.assertEqual(response.status, 200)
+        self.assertIn("Алексей Петров", response.body.decode('utf-8'))
+
+        response = self.routes.dispatch(Request.from_target('GET', '/nowhere'))
+        self.assertEqual(response.status, 404)
+        print("test_get_routes пройден")
+
+    def test_post_routes(self):
+        """POST-маршруты читают форму из тела запроса."""
+        body = "name=Анна Смирнова".encode('utf-8')
+        response = self.routes.dispatch(Request.from_target('POST', '/users', body=body))
+        self.assertEqual(response.status, 200)
+        self.assertIn("Анна Смирнова", [u.name for u in self.routes.users])
+
+        response = self.routes.dispatch(Request.from_target('POST', '/unknown'))
+        self.assertEqual(response.status, 405)
+        print("test_post_routes пройден")
+
+    def test_blocking_routes(self):
+        """Запись в базу и чтение файлов выполняются вне цикла событий."""
+        for method, path in (('POST', '/users'), ('POST', '/subscribe'),
+                             ('GET', '/static/css/style.css'), ('GET', '/api/history/USD')):
+            self.assertTrue(self.routes.is_blocking(Request.from_target(method, path)), path)
+        self.assertFalse(self.routes.is_blocking(Request.from_target('GET', '/users')))
+        print("test_blocking_routes пройден")
+
+
+def _echo_dispatch(request: Request) -> Response:
+    return html_response(f"{request.method} {request.path} {threading.current_thread().name}")
+
+
+class TestAsyncHTTPServer(unittest.TestCase):
+    """Тесты AsyncHTTPServer."""
+
+    async def _exchange(self, server: AsyncHTTPServer, raw_requests):
+        """Отправить запросы по одному соединению и прочитать ответы."""
+        listener = await server.start('127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            responses = []
+            for raw in raw_requests:
+                writer.write(raw)
+                await writer.drain()
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+                responses.append(head + await reader.readexactly(length))
+            writer.close()
+            return responses
+        finally:
+            listener.close()
+            await listener.wait_closed()
+
+    def test_keep_alive(self):
+        """Несколько запросов обслуживаются по одному соединению."""
+        server = AsyncHTTPServer(_echo_dispatch)
+        raw = b"GET /a HTTP/1.1\r\nHost: x\r\n\r\n"
+        responses = asyncio.run(self._exchange(server, [raw, raw.replace(b"/a", b"/b")]))
+
+        self.assertIn(b"Connection: keep-alive", responses[0])
+        self.assertTrue(responses[0].endswith(b"GET /a MainThread"))
+        self.assertTrue(responses[1].endswith(b"GET /b MainThread"))
+        self.assertEqual(server.requests, 2)
+        print("test_keep_alive пройден")
+
+    def test_blocking_route_in_executor(self):
+        """Блокирующие запросы выполняются вне цикла событий."""
+        server = AsyncHTTPServer(_echo_dispatch, is_blocking=lambda r: r.path == '/slow')
+        responses = asyncio.run(self._exchange(server, [b"GET /slow HTTP/1.1\r\n\r\n"]))
+        self.assertNotIn(b"MainThread", responses[0])
+        print("test_blocking_route_in_executor пройден")
+
+    def test_streamed_response(self):
+        """Тело из частей отправляется с Transfer-Encoding: chunked."""
+        server = AsyncHTTPServer(lambda r: Response(chunks=iter([b"ab", b"", b"cde"])))
+
+        async def exchange():
+            listener = await server.start('127.0.0.1', 0)
+            port = listener.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n")
+            data = await reader.read()
+            writer.close()
+            listener.close()
+            await listener.wait_closed()
+            return data
+
+        data = asyncio.run(exchange())
+        self.assertIn(b"Transfer-Encoding: chunked", data)
+        self.assertNotIn(b"Content-Length", data)
+        self.assertTrue(data.endswith(b"\r\n\r\n2\r\nab\r\n3\r\ncde\r\n0\r\n\r\n"))
+        print("test_streamed_response пройден")
+
+    def test_bad_request(self):
+        """Некорректная строка запроса - 400 и закрытие соединения."""
+        server = AsyncHTTPServer(_echo_dispatch)
+        responses = asyncio.run(self._exchange(server, [b"NONSENSE\r\n\r\n"]))
+        self.assertTrue(responses[0].startswith(b"HTTP/1.1 400"))
+        self.assertIn(b"Connection: close", responses[0])
+        print("test_bad_request пройден")
+
+
+class TestASGIApp(unittest.TestCase):
+    """Тесты make_asgi_app."""
+
+    def test_http_request(self):
+        """ASGI-приложение передаёт путь, параметры и тело в маршрут."""
+        seen = []
+
+        def dispatch(request):
+            seen.append(request)
+            return html_response("ok", status=201)
+
+        app = make_asgi_app(dispatch)
+        messages = [{'type': 'http.request', 'body': b'name=x', 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'POST', 'path': '/users', 'query_string': b'a=1',
+                 'headers': [(b'content-type', b'application/x-www-form-urlencoded')]}
+        asyncio.run(app(scope, receive, send))
+
+        self.assertEqual(seen[0].form, {'name': ['x']})
+        self.assertEqual(seen[0].query, {'a': ['1']})
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertEqual(sent[1]['body'], b"ok")
+        print("test_http_request пройден")
+
+    def test_streamed_response(self):
+        """Части тела передаются отдельными сообщениями more_body."""
+        app = make_asgi_app(lambda r: Response(chunks=iter([b"ab", b"cd"])))
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(app({'type': 'http', 'method': 'GET', 'path': '/'}, receive, send))
+        header_names = [name for name, _ in sent[0]['headers']]
+        self.assertNotIn(b'transfer-encoding', header_names)
+        self.assertNotIn(b'content-length', header_names)
+        self.assertEqual([m['body'] for m in sent[1:]], [b"ab", b"cd", b""])
+        self.assertFalse(sent[-1].get('more_body', False))
+        print("test_streamed_response пройден")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Тесты потокового разбора фида ЦБ.
+"""
+
+import json
+import unittest
+import sys
+import os
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from cbr_stub import CBRStubServer, make_feed
+from utils.cbr_stream import parse_valute, parse_valute_stream, fetch_currency_columns
+from utils.currencies_api import extract_currencies
+
+
+def _chunks(payload: bytes, size: int):
+    return [payload[i:i + size] for i in range(0, len(payload), size)]
+
+
+class TestStreamParsing(unittest.TestCase):
+    """Тесты parse_valute_stream."""
+
+    def setUp(self):
+        self.feed = make_feed({'USD': 89.6883, 'EUR': 98.2167, 'JPY': 61.7542, 'GBP': 113.9})
+        self.payload = json.dumps(self.feed, ensure_ascii=False, indent=2).encode('utf-8')
+
+    def test_matches_full_parse_for_any_chunking(self):
+        """Результат не зависит от размера фрагментов (в т.ч. разрыва UTF-8)."""
+        codes = ['JPY', 'USD', 'XYZ']
+        expected = extract_currencies(self.feed['Valute'], codes)
+        for size in (1, 3, 17, 4096):
+            columns = parse_valute_stream(_chunks(self.payload, size), codes)
+            self.assertEqual(columns.to_dict(), expected, f"размер фрагмента {size}")
+            self.assertEqual(columns.date, self.feed['Date'])
+        print("test_matches_full_parse_for_any_chunking пройден")
+
+    def test_field_selection(self):
+        """Извлекаются только запрошенные поля в колонки array."""
+        columns = parse_valute(self.payload, ['EUR', 'JPY'], fields=('Value', 'Nominal'))
+
+        self.assertEqual(list(columns.nominal), [1, 100])
+        self.assertEqual(columns.value.typecode, 'd')
+        self.assertIsNone(columns.name)
+        self.assertEqual(columns.get('EUR'), {'char_code': 'EUR', 'value': 98.2167, 'nominal': 1})
+        print("test_field_selection пройден")
+
+    def test_stops_after_all_codes_found(self):
+        """Чтение прекращается, как только найдены все коды."""
+        consumed = []
+
+        def source():
+            for chunk in _chunks(self.payload, 16):
+                consumed.append(chunk)
+                yield chunk
+
+        parse_valute_stream(source(), ['USD'])
+        self.assertLess(len(consumed), len(_chunks(self.payload, 16)))
+        print("test_stops_after_all_codes_found пройден")
+
+    def test_braces_inside_strings(self):
+        """Скобки и экранирование в строках не ломают разбор."""
+        self.feed['Valute']['USD']['Name'] = 'Доллар {США} \\"}'
+        payload = json.dumps(self.feed).encode('utf-8')
+        columns = parse_valute(payload, ['USD', 'EUR'], fields=('Name',))
+        self.assertEqual(columns.name, ['Доллар {США} \\"}', 'Евро'])
+        print("test_braces_inside_strings пройден")
+
+    def test_invalid_payloads(self):
+        """Отсутствие Valute и обрыв фида приводят к ошибкам."""
+        with self.assertRaises(KeyError):
+            parse_valute(b'{"Date": "2024-01-13"}', ['USD'])
+        with self.assertRaises(ValueError):
+            parse_valute(self.payload[:self.payload.index(b'"USD"') + 40], ['USD'])
+        with self.assertRaises(ValueError):
+            parse_valute(self.payload, ['USD'], fields=('Previous',))
+        print("test_invalid_payloads пройден")
+
+    def test_fetch_from_stub_server(self):
+        """Потоковая загрузка с локальной заглушки фида."""
+        with CBRStubServer() as stub:
+            columns = fetch_currency_columns(['USD', 'JPY'], url=stub.url(), chunk_size=32)
+        self.assertEqual(columns.char_code, ['USD', 'JPY'])
+        self.assertEqual(list(columns.value), [89.6883, 61.7542])
+        print("test_fetch_from_stub_server пройден")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
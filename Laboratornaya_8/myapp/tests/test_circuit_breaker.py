@@ -0,0 +1,241 @@
+"""
+Тесты выключателя и резервных уровней данных о курсах.
+"""
+
+import os
+import tempfile
+import time
+import unittest
+import sys
+from unittest.mock import patch
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import myapp
+from models import Currency
+from cbr_stub import CBRStubServer, make_feed
+from utils import currencies_api
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+from utils.rates_cache import RatesCache, RatesSnapshot
+from utils.rates_refresher import RatesRefresher
+
+
+def _failing():
+    raise ConnectionError("нет связи")
+
+
+def _raise(error):
+    raise error
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Тесты состояний CircuitBreaker."""
+
+    def test_trips_after_threshold(self):
+        """После порога ошибок вызовы отклоняются без обращения к источнику."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                breaker.call(_failing)
+        self.assertEqual(breaker.state, OPEN)
+
+        calls = []
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(calls.append, 1)
+        self.assertEqual(calls, [])
+        self.assertEqual(breaker.stats()['short_circuited'], 1)
+        self.assertEqual(breaker.stats()['transitions'], {'closed->open': 1})
+        print("test_trips_after_threshold пройден")
+
+    def test_half_open_trial_call(self):
+        """Без фоновой пробы первый вызов после паузы становится пробным."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        with self.assertRaises(ConnectionError):
+            breaker.call(_failing)
+        time.sleep(0.02)
+
+        self.assertEqual(breaker.call(lambda: 'ok'), 'ok')
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.stats()['transitions'],
+                         {'closed->open': 1, 'open->half_open': 1, 'half_open->closed': 1})
+        print("test_half_open_trial_call пройден")
+
+    def test_background_probe_closes_circuit(self):
+        """Фоновая проба замыкает цепь, когда источник восстановился."""
+        healthy = []
+
+        def probe():
+            if not healthy:
+                raise ConnectionError("ещё недоступен")
+
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.02, probe=probe)
+        with self.assertRaises(ConnectionError):
+            breaker.call(_failing)
+        time.sleep(0.05)
+        self.assertIn(breaker.state, (OPEN, HALF_OPEN))
+
+        healthy.append(True)
+        deadline = time.time() + 2
+        while breaker.state != CLOSED and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertGreaterEqual(breaker.stats()['transitions']['half_open->open'], 1)
+        print("test_background_probe_closes_circuit пройден")
+
+    def test_probe_repeats_last_failed_call(self):
+        """probe_last_call проверяет источник тем же вызовом, что и разомкнул цепь."""
+        probed = []
+
+        def fetch(url):
+            probed.append(url)
+            if len(probed) == 1:
+                raise ConnectionError("нет связи")
+
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.02, probe_last_call=True)
+        with self.assertRaises(ConnectionError):
+            breaker.call(fetch, 'http://mirror/feed.js')
+        deadline = time.time() + 2
+        while breaker.state != CLOSED and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(probed, ['http://mirror/feed.js'] * 2)
+        print("test_probe_repeats_last_failed_call пройден")
+
+    def test_unexpected_error_reopens_circuit(self):
+        """Неожиданное исключение пробы или пробного вызова возвращает цепь в open."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01,
+                                 expected_exceptions=(ConnectionError,))
+        with self.assertRaises(ConnectionError):
+            breaker.call(_failing)
+        time.sleep(0.02)
+        with self.assertRaises(RuntimeError):
+            breaker.call(_raise, RuntimeError("сбой"))
+        self.assertEqual(breaker.state, OPEN)
+        time.sleep(0.02)
+        self.assertEqual(breaker.call(lambda: 'ok'), 'ok')
+
+        attempts = []
+
+        def probe():
+            attempts.append(True)
+            if len(attempts) == 1:
+                raise RuntimeError("сбой пробы")
+
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.02, probe=probe,
+                                 expected_exceptions=(ConnectionError,))
+        with self.assertRaises(ConnectionError):
+            breaker.call(_failing)
+        deadline = time.time() + 2
+        while breaker.state != CLOSED and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(len(attempts), 2)
+        print("test_unexpected_error_reopens_circuit пройден")
+
+
+class TestGuardedCurrencies(unittest.TestCase):
+    """Тесты get_currencies_guarded с резервными уровнями."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.patches = [
+            patch.object(currencies_api, 'rates_cache', RatesCache(min_ttl=0)),
+            patch.object(currencies_api, 'rates_snapshot',
+                         RatesSnapshot(os.path.join(self.tmp.name, 'last_rates.json'))),
+            patch.object(currencies_api, 'currency_breaker',
+                         CircuitBreaker(failure_threshold=1, reset_timeout=60,
+                                        expected_exceptions=currencies_api._SOURCE_ERRORS)),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+    def test_snapshot_used_after_restart(self):
+        """После «перезапуска» при недоступном источнике используется снимок с диска."""
+        with CBRStubServer(routes={'/daily_json.js': make_feed({'USD': 77.7})}) as stub:
+            fresh = currencies_api.get_currencies_guarded(['USD'], url=stub.url())
+            self.assertEqual(fresh['USD']['value'], 77.7)
+
+            # Новый процесс: пустой кэш в памяти, источник не отвечает
+            currencies_api.rates_cache.clear()
+            stub.fail = True
+            restored = currencies_api.get_currencies_guarded(['USD'], url=stub.url())
+            requests_before = len(stub.requests_log)
+
+            # Выключатель разомкнут - сеть больше не используется
+            again = currencies_api.get_currencies_guarded(['USD'], url=stub.url())
+            self.assertEqual(len(stub.requests_log), requests_before)
+
+        self.assertEqual(restored['USD']['value'], 77.7)
+        self.assertEqual(again['USD']['value'], 77.7)
+        self.assertEqual(currencies_api.currency_breaker.state, OPEN)
+        print("test_snapshot_used_after_restart пройден")
+
+    def test_static_fallback_without_snapshot(self):
+        """Без снимка используется статическая заглушка."""
+        with CBRStubServer() as stub:
+            stub.fail = True
+            result = currencies_api.get_currencies_guarded(['USD'], url=stub.url())
+        self.assertEqual(result['USD']['value'], 90.5)
+        print("test_static_fallback_without_snapshot пройден")
+
+    def test_snapshot_write_error_ignored(self):
+        """Ошибка записи снимка на диск не мешает отдать свежие курсы."""
+        with CBRStubServer(routes={'/daily_json.js': make_feed({'USD': 77.7})}) as stub, \
+                patch.object(currencies_api.rates_snapshot, 'save',
+                             side_effect=OSError("No space left on device")):
+            result = currencies_api.get_currencies_guarded(['USD'], url=stub.url())
+        self.assertEqual(result['USD']['value'], 77.7)
+        self.assertEqual(currencies_api.currency_breaker.state, CLOSED)
+        print("test_snapshot_write_error_ignored пройден")
+
+    def test_refresh_keeps_rates_without_data(self):
+        """Заглушка - только для холодного старта, обновление без данных оставляет снимок."""
+        saved = myapp.CurrencyRoutes.currencies_cache
+        published = []
+        with CBRStubServer() as stub:
+            stub.fail = True
+            guarded = lambda codes, **kwargs: currencies_api.get_currencies_guarded(
+                codes, url=stub.url(), **kwargs)
+            with self.assertRaises(ConnectionError):
+                guarded(['USD'], static_fallback=False)
+            try:
+                with patch.object(myapp, 'get_currencies_guarded', guarded):
+                    myapp.CurrencyRoutes.currencies_cache = []
+                    self.assertEqual(myapp.load_currencies()[0].value, 90.5)
+
+                    myapp.CurrencyRoutes.currencies_cache = [
+                        Currency(1, '840', 'USD', 'Доллар США', 77.7, 1)]
+                    refresher = RatesRefresher(myapp.load_currencies, publish=published.append)
+                    self.assertFalse(refresher.refresh())
+            finally:
+                myapp.CurrencyRoutes.currencies_cache = saved
+        self.assertEqual(published, [])
+        print("test_refresh_keeps_rates_without_data пройден")
+
+    def test_currency_ids_stable(self):
+        """Id валюты не сдвигается, когда фид меняет состав."""
+        feeds = [
+            {'USD': {'value': 90.0}, 'EUR': {'value': 99.0}, 'GBP': {'value': 115.0}},
+            {'EUR': {'value': 98.0}, 'GBP': {'value': 114.0}},
+            {'USD': {'value': 91.0}, 'GBP': {'value': 116.0}, 'EUR': {'value': 97.0}},
+        ]
+        loaded = []
+        for feed in feeds:
+            with patch.object(myapp, 'get_currencies_guarded', lambda codes, **kwargs: feed):
+                loaded.append({c.char_code: c.id for c in myapp.load_currencies()})
+        for ids in loaded[1:]:
+            for code, currency_id in ids.items():
+                self.assertEqual(currency_id, loaded[0][code])
+        self.assertEqual(len(set(loaded[0].values())), 3)
+        print("test_currency_ids_stable пройден")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,110 @@
+"""
+Тесты сжатия ответов и постоянных соединений HTTP/1.1.
+"""
+
+import gzip
+import http.client
+import threading
+import unittest
+import zlib
+import sys
+import os
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from myapp import CurrencyAppHandler
+from servers import PooledHTTPServer
+from utils.compression import CompressionCache, choose_encoding, compress_response
+from utils.http_messages import Response, html_response
+
+
+class TestNegotiation(unittest.TestCase):
+    """Тесты выбора кодировки по Accept-Encoding."""
+
+    def test_choose_encoding(self):
+        """Учитываются q-значения и '*'."""
+        self.assertEqual(choose_encoding("gzip, deflate, br"), 'gzip')
+        self.assertEqual(choose_encoding("gzip;q=0.5, deflate"), 'deflate')
+        self.assertEqual(choose_encoding("gzip;q=0, *;q=0.1"), 'deflate')
+        self.assertEqual(choose_encoding("br"), None)
+        self.assertEqual(choose_encoding(None), None)
+        print("test_choose_encoding пройден")
+
+
+class TestCompressResponse(unittest.TestCase):
+    """Тесты compress_response."""
+
+    def setUp(self):
+        self.page = html_response("<p>Курс доллара</p>" * 200)
+
+    def test_gzip_and_deflate(self):
+        """Сжатое тело распаковывается в исходное."""
+        gz = compress_response(self.page, "gzip")
+        self.assertEqual(gz.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(gz.body), self.page.body)
+        self.assertLess(len(gz.body), len(self.page.body))
+
+        zl = compress_response(self.page, "deflate")
+        self.assertEqual(zlib.decompress(zl.body), self.page.body)
+        print("test_gzip_and_deflate пройден")
+
+    def test_threshold_and_types(self):
+        """Маленькие тела и несжимаемые типы отправляются как есть."""
+        small = compress_response(html_response("<p>ok</p>"), "gzip")
+        self.assertNotIn('Content-Encoding', small.headers)
+        self.assertEqual(small.headers['Vary'], 'Accept-Encoding')
+
+        png = Response(200, b"\x89PNG" * 1000, 'image/png')
+        self.assertIs(compress_response(png, "gzip"), png)
+        print("test_threshold_and_types пройден")
+
+    def test_cache_reuses_compressed_body(self):
+        """Неизменившаяся страница сжимается один раз."""
+        cache = CompressionCache()
+        first = compress_response(self.page, "gzip", cache)
+        second = compress_response(html_response(self.page.body.decode('utf-8')), "gzip", cache)
+        self.assertIs(first.body, second.body)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'entries': 1})
+        print("test_cache_reuses_compressed_body пройден")
+
+
+class TestKeepAlive(unittest.TestCase):
+    """Постоянные соединения у CurrencyAppHandler."""
+
+    def setUp(self):
+        self.httpd = PooledHTTPServer(('127.0.0.1', 0), CurrencyAppHandler, workers=2)
+        self.thread = threading.Thread(target=self.httpd.serve_forever,
+                                       kwargs={'poll_interval': 0.05}, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def test_requests_share_connection(self):
+        """Два запроса проходят по одному TCP-соединению, второй - со сжатием."""
+        conn = http.client.HTTPConnection('127.0.0.1', self.httpd.server_address[1], timeout=5)
+        try:
+            conn.request('GET', '/users')
+            first = conn.getresponse()
+            plain = first.read()
+            sock = conn.sock
+
+            conn.request('GET', '/users', headers={'Accept-Encoding': 'gzip'})
+            second = conn.getresponse()
+            body = second.read()
+
+            self.assertIs(conn.sock, sock)
+            self.assertEqual(first.version, 11)
+            self.assertEqual(int(first.getheader('Content-Length')), len(plain))
+            self.assertEqual(second.getheader('Content-Encoding'), 'gzip')
+            self.assertEqual(gzip.decompress(body), plain)
+        finally:
+            conn.close()
+        print("test_requests_share_connection пройден")
+
+
+if __name__ == '__main__':
+    unittest.main()
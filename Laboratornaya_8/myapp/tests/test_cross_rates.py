@@ -0,0 +1,102 @@
+"""
+Тесты матрицы кросс-курсов.
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from cbr_stub import CBRStubServer, make_feed
+from models import Currency
+from utils.cross_rates import CrossRateMatrix, CrossRateEngine
+from utils.rates_cache import CacheEntry, RatesCache
+
+
+class TestCrossRateMatrix(unittest.TestCase):
+    """Тесты CrossRateMatrix."""
+
+    def setUp(self):
+        self.matrix = CrossRateMatrix.from_valute(make_feed({'USD': 90.0, 'EUR': 99.0, 'JPY': 60.0})['Valute'])
+
+    def test_pair_lookup(self):
+        """Курс любой пары, включая рубль и номинал."""
+        self.assertAlmostEqual(self.matrix.rate('EUR', 'USD'), 1.1)
+        self.assertAlmostEqual(self.matrix.rate('USD', 'JPY'), 150.0)
+        self.assertAlmostEqual(self.matrix.rate('RUB', 'USD'), 1 / 90)
+        self.assertEqual(self.matrix.rate('EUR', 'EUR'), 1.0)
+        self.assertEqual(self.matrix.matrix.shape, (4, 4))
+        print("test_pair_lookup пройден")
+
+    def test_bulk_convert(self):
+        """Пакетный пересчёт с массивами и скалярами."""
+        result = self.matrix.convert([100, 10, 1], ['USD', 'EUR', 'USD'], ['RUB', 'USD', 'JPY'])
+        np.testing.assert_allclose(result, [9000.0, 11.0, 150.0])
+        np.testing.assert_allclose(self.matrix.convert([1, 2], 'EUR', 'RUB'), [99.0, 198.0])
+        print("test_bulk_convert пройден")
+
+    def test_unknown_code(self):
+        """Неизвестный код вызывает ValueError."""
+        with self.assertRaises(ValueError):
+            self.matrix.rate('XYZ', 'USD')
+        with self.assertRaises(ValueError):
+            self.matrix.convert([1], ['USD'], ['XYZ'])
+        print("test_unknown_code пройден")
+
+    def test_from_currencies(self):
+        """Матрица строится из моделей Currency."""
+        matrix = CrossRateMatrix.from_currencies([
+            Currency(1, '840', 'USD', 'Доллар США', 90.0, 1),
+            Currency(2, '392', 'JPY', 'Японская иена', 60.0, 100),
+        ])
+        self.assertAlmostEqual(matrix.rate('JPY', 'USD'), 0.6 / 90)
+        print("test_from_currencies пройден")
+
+
+class TestCrossRateEngine(unittest.TestCase):
+    """Тесты CrossRateEngine."""
+
+    def test_matrix_cached_per_feed(self):
+        """Матрица пересобирается только при смене фида."""
+        cache = RatesCache(min_ttl=0)
+        with CBRStubServer() as stub:
+            engine = CrossRateEngine(cache=cache, url=stub.url())
+            first = engine.matrix()
+            second = engine.matrix()
+            self.assertIs(first, second)
+
+            stub.etag = None
+            stub.routes['/daily_json.js'] = make_feed({'USD': 100.0, 'EUR': 120.0},
+                                                      timestamp='2024-01-13T20:00:00+03:00')
+            third = engine.matrix()
+
+        self.assertIsNot(first, third)
+        self.assertAlmostEqual(engine.rate('EUR', 'USD'), 1.2)
+        print("test_matrix_cached_per_feed пройден")
+
+    def test_refresh_between_reads(self):
+        """Обновление фида во время чтения не связывает новую метку со старой таблицей."""
+        old = make_feed({'USD': 90.0, 'EUR': 99.0})
+        new = make_feed({'USD': 100.0, 'EUR': 120.0}, timestamp='2024-01-13T20:00:00+03:00')
+
+        class RefreshingCache(RatesCache):
+            def get(self, url, **kwargs):
+                # Фид обновился сразу после того, как get() вернул таблицу
+                self._entries[url] = CacheEntry(valute=new['Valute'], expires_at=0,
+                                                timestamp=new['Timestamp'])
+                return old['Valute']
+
+        engine = CrossRateEngine(cache=RefreshingCache(), url='feed')
+        matrix = engine.matrix()
+        self.assertEqual(matrix.timestamp, new['Timestamp'])
+        self.assertAlmostEqual(matrix.rate('EUR', 'USD'), 1.2)
+        print("test_refresh_between_reads пройден")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
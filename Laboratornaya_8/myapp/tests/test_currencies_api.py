@@ -5,6 +5,7 @@
 import unittest
 import sys
 import os
+from datetime import date, timedelta
 
 # Добавляем текущую директорию в путь Python
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -12,6 +13,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'
 
 try:
     from utils.currencies_api import get_currencies, get_currency_history
+    from utils.history_store import HistoryStore
     print("Модуль currencies_api импортирован успешно")
 except ImportError as e:
     print(f"Ошибка импорта: {e}")
@@ -58,7 +60,12 @@ class TestCurrenciesAPI(unittest.TestCase):
 
     def test_get_currency_history(self):
         """Тест получения исторических данных."""
-        history = get_currency_history('USD', days=7)
+        store = HistoryStore(':memory:')
+        for offset in range(10):
+            day = date.today() - timedelta(days=offset)
+            store.append_day(day, {'USD': {'Value': 90.0 + offset, 'Nominal': 1}})
+
+        history = get_currency_history('USD', days=7, store=store)
 
         # Проверяем структуру
         self.assertIsInstance(history, list)
@@ -0,0 +1,121 @@
+"""
+Тесты хранилища исторических курсов.
+"""
+
+import unittest
+import sys
+import os
+from datetime import date
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from cbr_stub import CBRStubServer, make_feed
+from utils.async_currencies_api import AsyncCurrencyClient
+from utils.history_store import HistoryStore, backfill, append_latest
+
+
+class TestHistoryStore(unittest.TestCase):
+    """Тесты HistoryStore."""
+
+    def setUp(self):
+        self.store = HistoryStore(':memory:')
+        # Пятница, понедельник и вторник - выходных в данных нет
+        for day, value in ((date(2024, 1, 12), 89.0), (date(2024, 1, 15), 88.5),
+                           (date(2024, 1, 16), 88.0)):
+            self.store.append_day(day, {'USD': {'Value': value, 'Nominal': 1},
+                                        'JPY': {'Value': value / 1.5, 'Nominal': 100}})
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_range_query(self):
+        """Выборка за период возвращает записи по возрастанию даты."""
+        rows = self.store.get_range('USD', date(2024, 1, 13), date(2024, 1, 16))
+        self.assertEqual([r['date'] for r in rows], ['2024-01-15', '2024-01-16'])
+        self.assertEqual(rows[0]['value'], 88.5)
+        print("test_range_query пройден")
+
+    def test_rate_on_weekend(self):
+        """На выходные действует последний опубликованный курс."""
+        self.assertEqual(self.store.rate_on('USD', date(2024, 1, 14))['date'], '2024-01-12')
+        self.assertEqual(self.store.rate_on('JPY', date(2024, 1, 16))['nominal'], 100)
+        self.assertIsNone(self.store.rate_on('USD', date(2024, 1, 1)))
+        print("test_rate_on_weekend пройден")
+
+    def test_append_replaces_existing_day(self):
+        """Повторная запись дня не создаёт дубликатов."""
+        self.store.append_day(date(2024, 1, 16), {'USD': {'Value': 87.0, 'Nominal': 1}})
+        rows = self.store.get_range('USD', date(2024, 1, 16), date(2024, 1, 16))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['value'], 87.0)
+        self.assertEqual(self.store.last_date(), date(2024, 1, 16))
+        print("test_append_replaces_existing_day пройден")
+
+    def test_daily_history_fills_calendar_days(self):
+        """Курс на каждый календарный день периода."""
+        history = self.store.daily_history('USD', date(2024, 1, 11), date(2024, 1, 16))
+        self.assertEqual(history[0][0], date(2024, 1, 12))
+        self.assertEqual(len(history), 5)
+        self.assertEqual(history[2][1]['value'], 89.0)
+        print("test_daily_history_fills_calendar_days пройден")
+
+    def test_digest_detects_swapped_days(self):
+        """Обмен курсами между днями меняет сводку, хотя суммы те же."""
+        start, end = date(2024, 1, 12), date(2024, 1, 16)
+        before = self.store.range_digest('USD', start, end)
+        self.store.append_day(date(2024, 1, 12), {'USD': {'Value': 88.5, 'Nominal': 1}})
+        self.store.append_day(date(2024, 1, 15), {'USD': {'Value': 89.0, 'Nominal': 1}})
+        self.assertNotEqual(self.store.range_digest('USD', start, end), before)
+        self.assertEqual(self.store.range_digest('USD', start, end),
+                         self.store.range_digest('USD', start, end))
+        print("test_digest_detects_swapped_days пройден")
+
+    def test_iter_range_between_batches(self):
+        """Между пачками соединение свободно для записи и других запросов."""
+        batches = self.store.iter_range('USD', date(2024, 1, 1), date(2024, 1, 31), batch_size=2)
+        first = next(batches)
+        self.store.append_day(date(2024, 1, 17), {'USD': {'Value': 87.5, 'Nominal': 1}})
+        self.assertEqual(self.store.rate_on('USD', date(2024, 1, 17))['value'], 87.5)
+        rest = [row for batch in batches for row in batch]
+        self.assertEqual([d for d, _, _ in first], ['2024-01-12', '2024-01-15'])
+        self.assertEqual([d for d, _, _ in rest], ['2024-01-16', '2024-01-17'])
+        print("test_iter_range_between_batches пройден")
+
+
+class TestBackfill(unittest.TestCase):
+    """Тесты загрузки архива с локальной заглушки."""
+
+    def test_backfill_and_incremental_append(self):
+        """Архив загружается, выходные пропускаются, дозагрузка продолжает с последней даты."""
+        routes = {}
+        for day in (date(2024, 1, 11), date(2024, 1, 12)):
+            routes[day.strftime('/archive/%Y/%m/%d/daily_json.js')] = make_feed(
+                {'USD': 89.0 + day.day}, date=day.isoformat() + 'T11:30:00+03:00')
+        routes['/daily_json.js'] = make_feed({'USD': 91.0}, date='2024-01-16T11:30:00+03:00')
+
+        store = HistoryStore(':memory:')
+        with CBRStubServer(routes=routes) as stub:
+            client = AsyncCurrencyClient(
+                url=stub.url(), mirror_urls=(),
+                archive_url=stub.base_url + '/archive/{date:%Y/%m/%d}/daily_json.js')
+            loaded = backfill(store, date(2024, 1, 10), date(2024, 1, 14), client=client, batch_size=2)
+            latest = append_latest(store, client=client)
+
+            self.assertEqual(loaded, 2)
+            self.assertEqual(latest, date(2024, 1, 16))
+
+            # Дозагрузка начинается со дня после последней даты
+            stub.requests_log.clear()
+            backfill(store, end=date(2024, 1, 17), client=client)
+            self.assertEqual(stub.requests_log[0][0], '/archive/2024/01/17/daily_json.js')
+
+        self.assertEqual(store.rate_on('USD', date(2024, 1, 13))['value'], 101.0)
+        self.assertEqual(store.codes(), ['USD'])
+        store.close()
+        print("test_backfill_and_incremental_append пройден")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
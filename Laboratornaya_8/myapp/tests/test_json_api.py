@@ -0,0 +1,197 @@
+"""
+Тесты JSON API.
+"""
+
+import json
+import unittest
+from datetime import date, timedelta
+from unittest.mock import patch
+import sys
+import os
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from models import Currency, User
+from myapp import CurrencyRoutes
+from utils import json_api
+from utils.history_store import HistoryStore
+from utils.http_messages import Request, chunked_body
+from utils.json_api import CURRENCY_FIELDS, dumps, parse_fields, records, stream_array
+from utils.page_cache import PageCache
+from utils.subscriptions import SubscriptionIndex
+from utils.user_repository import UserRepository
+
+CURRENCIES = [Currency(1, '840', 'USD', 'Доллар США', 90.0, 1),
+              Currency(2, '978', 'EUR', 'Евро', 99.0, 1)]
+
+
+class TestSerialization(unittest.TestCase):
+    """Тесты сериализации."""
+
+    def test_dumps_fallback(self):
+        """Без orjson результат тот же, что и с ним."""
+        data = {'name': 'Евро', 'value': 99.5, 'items': [1, None, True]}
+        with patch.object(json_api, 'orjson', None):
+            plain = dumps(data)
+        self.assertEqual(json.loads(plain), data)
+        self.assertEqual(json.loads(dumps(data)), data)
+        self.assertNotIn(b' ', plain)
+        print("test_dumps_fallback пройден")
+
+    def test_parse_fields(self):
+        """Поля выбираются в порядке запроса, неизвестные отклоняются."""
+        self.assertEqual(parse_fields({}, CURRENCY_FIELDS), CURRENCY_FIELDS)
+        self.assertEqual(parse_fields({'fields': ['value, char_code,value']}, CURRENCY_FIELDS),
+                         ('value', 'char_code'))
+        with self.assertRaises(ValueError):
+            parse_fields({'fields': ['char_code,__class__']}, CURRENCY_FIELDS)
+        print("test_parse_fields пройден")
+
+    def test_records(self):
+        """Словари строятся по атрибутам моделей, JSON не зависит от библиотеки."""
+        self.assertEqual(records(CURRENCIES, ('char_code',)), [{'char_code': 'USD'}, {'char_code': 'EUR'}])
+        self.assertEqual(records(CURRENCIES[:1], ('id', 'value')), [{'id': 1, 'value': 90.0}])
+
+        fast = dumps(records(CURRENCIES, CURRENCY_FIELDS))
+        with patch.object(json_api, 'orjson', None):
+            plain = dumps(records(CURRENCIES, CURRENCY_FIELDS))
+        self.assertEqual(json.loads(fast), json.loads(plain))
+        self.assertEqual(json.loads(plain)[0]['name'], 'Доллар США')
+        print("test_records пройден")
+
+    def test_stream_array(self):
+        """Части потока вместе дают корректный JSON-массив."""
+        batches = [[('2024-01-01', 90.0, 1)], [], [('2024-01-02', 91.0, 1), ('2024-01-03', 92.0, 1)]]
+        body = b''.join(stream_array(batches, ('date', 'value', 'nominal'), ('value',)))
+        self.assertEqual(json.loads(body), [{'value': 90.0}, {'value': 91.0}, {'value': 92.0}])
+        self.assertEqual(json.loads(b''.join(stream_array([], ('date',), ('date',)))), [])
+        print("test_stream_array пройден")
+
+    def test_chunked_body(self):
+        """Кодирование chunked пропускает пустые части и завершается нулевой."""
+        self.assertEqual(b''.join(chunked_body([b'abc', b'', b'0123456789abcdef'])),
+                         b'3\r\nabc\r\n10\r\n0123456789abcdef\r\n0\r\n\r\n')
+        print("test_chunked_body пройден")
+
+
+class TestRoutesAPI(unittest.TestCase):
+    """Маршруты /api/."""
+
+    def setUp(self):
+        self.routes = CurrencyRoutes()
+        self._saved = {name: getattr(CurrencyRoutes, name) for name in
+                       ('user_repository', 'subscriptions', 'currencies_cache', 'history_store')}
+        CurrencyRoutes.user_repository = UserRepository([User(1, "Анна"), User(2, "Борис")])
+        CurrencyRoutes.subscriptions = SubscriptionIndex()
+        CurrencyRoutes.subscriptions.subscribe(1, 2)
+        CurrencyRoutes.currencies_cache = list(CURRENCIES)
+        CurrencyRoutes.page_cache = PageCache()
+
+        store = HistoryStore(':memory:')
+        first = date(2024, 1, 1)
+        for offset in range(30):
+            store.append_day(first + timedelta(days=offset),
+                             {'USD': {'Value': 90 + offset, 'Nominal': 1}})
+        CurrencyRoutes.history_store = store
+
+    def tearDown(self):
+        CurrencyRoutes.history_store.close()
+        for name, value in self._saved.items():
+            setattr(CurrencyRoutes, name, value)
+        CurrencyRoutes.page_cache = PageCache()
+
+    def _get(self, target, **headers):
+        return self.routes.dispatch(Request.from_target('GET', target, headers))
+
+    def test_currencies(self):
+        """Курсы с выбором полей и ETag."""
+        response = self._get('/api/currencies?fields=char_code,value')
+        self.assertEqual(response.content_type, 'application/json; charset=utf-8')
+        self.assertEqual(json.loads(response.body)['items'],
+                         [{'char_code': 'USD', 'value': 90.0}, {'char_code': 'EUR', 'value': 99.0}])
+        etag = response.headers['ETag']
+        self.assertEqual(self._get('/api/currencies?fields=char_code,value',
+                                   **{'If-None-Match': etag}).status, 304)
+        self.assertEqual(self._get('/api/currencies?fields=secret').status, 400)
+        print("test_currencies пройден")
+
+    def test_users(self):
+        """Пользователи постранично и по одному, с подписками."""
+        data = json.loads(self._get('/api/users?per_page=1&page=2').body)
+        self.assertEqual(data['items'], [{'id': 2, 'name': "Борис", 'subscriptions': []}])
+        self.assertEqual((data['total'], data['page']), (2, 2))
+
+        user = json.loads(self._get('/api/user/1?fields=subscriptions').body)
+        self.assertEqual(user, {'subscriptions': [2]})
+        self.assertEqual(self._get('/api/user/99').status, 404)
+        self.assertEqual(self._get('/api/user/abc').status, 404)
+        print("test_users пройден")
+
+    def test_user_cache_invalidated(self):
+        """Подписка меняет ответ /api/user/<id>."""
+        before = self._get('/api/user/2').headers['ETag']
+        CurrencyRoutes.subscriptions.subscribe(2, 1)
+        response = self._get('/api/user/2')
+        self.assertNotEqual(response.headers['ETag'], before)
+        self.assertEqual(json.loads(response.body)['subscriptions'], [1])
+        print("test_user_cache_invalidated пройден")
+
+    def test_history(self):
+        """Короткий период - обычный ответ с ETag."""
+        response = self._get('/api/history/usd?start=2024-01-01&end=2024-01-03&fields=date,value')
+        self.assertIsNone(response.chunks)
+        self.assertEqual(json.loads(response.body), [
+            {'date': '2024-01-01', 'value': 90.0},
+            {'date': '2024-01-02', 'value': 91.0},
+            {'date': '2024-01-03', 'value': 92.0}])
+        again = self._get('/api/history/USD?start=2024-01-01&end=2024-01-03&fields=date,value',
+                          **{'If-None-Match': response.headers['ETag']})
+        self.assertEqual(again.status, 304)
+        print("test_history пройден")
+
+    def test_history_etag_follows_range(self):
+        """Исправление дня внутри периода меняет ETag, хотя последняя дата прежняя."""
+        target = '/api/history/USD?start=2024-01-01&end=2024-01-10'
+        etag = self._get(target).headers['ETag']
+        CurrencyRoutes.history_store.append_day(date(2024, 1, 5), {'USD': {'Value': 50, 'Nominal': 1}})
+        response = self._get(target, **{'If-None-Match': etag})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(json.loads(response.body)[4]['value'], 50.0)
+
+        # Изменение вне периода ETag не меняет
+        etag = response.headers['ETag']
+        CurrencyRoutes.history_store.append_day(date(2024, 1, 20), {'USD': {'Value': 50, 'Nominal': 1}})
+        self.assertEqual(self._get(target, **{'If-None-Match': etag}).status, 304)
+        print("test_history_etag_follows_range пройден")
+
+    def test_history_streamed(self):
+        """Длинный период отдаётся по частям."""
+        self.routes.history_stream_days = 5
+        response = self._get('/api/history/USD?start=2024-01-01&end=2024-03-01')
+        self.assertIsNotNone(response.chunks)
+        self.assertEqual(dict(response.header_items())['Transfer-Encoding'], 'chunked')
+        rows = json.loads(b''.join(response.chunks))
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(rows[-1], {'date': '2024-01-30', 'value': 119.0, 'nominal': 1})
+
+        # Клиенту HTTP/1.0 тот же ответ отдаётся целиком, без chunked
+        response = self.routes.dispatch(Request.from_target(
+            'GET', '/api/history/USD?start=2024-01-01&end=2024-03-01', version='HTTP/1.0'))
+        self.assertIsNone(response.chunks)
+        self.assertNotIn('Transfer-Encoding', dict(response.header_items()))
+        self.assertEqual(len(json.loads(response.body)), 30)
+        print("test_history_streamed пройден")
+
+    def test_history_bad_input(self):
+        """Некорректные код и даты - 400."""
+        for target in ('/api/history/US1', '/api/history/USD?start=2024-13-01',
+                       '/api/history/USD?start=2024-02-01&end=2024-01-01',
+                       '/api/history/USD?start=1990-01-01&end=2024-01-01'):
+            self.assertEqual(self._get(target).status, 400, target)
+        print("test_history_bad_input пройден")
+
+
+if __name__ == '__main__':
+    unittest.main()
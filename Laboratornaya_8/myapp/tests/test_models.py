@@ -16,6 +16,7 @@ try:
     from models.user import User
     from models.currency import Currency
     from models.app import App
+    from models.user_currency import UserCurrency
     print("Все модели импортированы успешно")
 except ImportError as e:
     print(f"Ошибка импорта: {e}")
@@ -124,6 +125,55 @@ class TestAppModel(unittest.TestCase):
         print("test_app_creation пройден")
 
 
+class TestFromRows(unittest.TestCase):
+    """Тесты массового создания моделей из строк."""
+
+    ROWS = [(1, '840', 'USD', 'Доллар США', 90.5, 1),
+            (2, '978', 'EUR', 'Евро', 99.8, 1)]
+
+    def test_slots(self):
+        """У моделей нет словаря экземпляра."""
+        currency = Currency(*self.ROWS[0])
+        self.assertFalse(hasattr(currency, '__dict__'))
+        with self.assertRaises(AttributeError):
+            currency.rate = 1.0
+        print("test_slots пройден")
+
+    def test_currency_from_rows(self):
+        """from_rows даёт те же объекты, что и конструктор."""
+        self.assertEqual(Currency.from_rows(self.ROWS), [Currency(*row) for row in self.ROWS])
+        self.assertEqual(Currency.from_rows(iter(self.ROWS), validate=False)[1].value_per_unit, 99.8)
+        self.assertEqual(Currency.from_rows([]), [])
+        print("test_currency_from_rows пройден")
+
+    def test_from_rows_validation(self):
+        """Некорректная строка даёт ту же ошибку, что и конструктор."""
+        bad_rows = [
+            self.ROWS + [(3, '826', 'GBP', 'Фунт', -1.0, 1)],
+            self.ROWS + [(3, '826', 'GBPX', 'Фунт', 1.0, 1)],
+            self.ROWS + [(3.0, '826', 'GBP', 'Фунт', 1.0, 1)],
+        ]
+        for rows in bad_rows:
+            with self.assertRaises(ValueError):
+                Currency.from_rows(rows)
+        with self.assertRaises(TypeError):
+            Currency.from_rows([(1, '840', 'USD')])
+        with self.assertRaises(ValueError):
+            UserCurrency.from_rows([(1, 1, 1), (2, 0, 1)])
+        with self.assertRaises(ValueError):
+            User.from_rows([(1, "Анна"), (2, " ")])
+        print("test_from_rows_validation пройден")
+
+    def test_user_from_rows(self):
+        """Пользователи из строк поддерживают подписки."""
+        user = User.from_rows([(1, "Анна Смирнова")])[0]
+        self.assertEqual(user, User(1, "Анна Смирнова"))
+        user.subscribe_to_currency(Currency(*self.ROWS[0]))
+        self.assertEqual(user.get_subscription_ids(), [1])
+        self.assertEqual(UserCurrency.from_rows([(1, 2, 3)]), [UserCurrency(1, 2, 3)])
+        print("test_user_from_rows пройден")
+
+
 if __name__ == '__main__':
     print("=" * 50)
     print("Запуск тестов моделей...")
@@ -138,6 +188,7 @@ if __name__ == '__main__':
     suite.addTests(loader.loadTestsFromTestCase(TestUserModel))
     suite.addTests(loader.loadTestsFromTestCase(TestCurrencyModel))
     suite.addTests(loader.loadTestsFromTestCase(TestAppModel))
+    suite.addTests(loader.loadTestsFromTestCase(TestFromRows))
 
     # Запускаем тесты
     runner = unittest.TextTestRunner(verbosity=2)
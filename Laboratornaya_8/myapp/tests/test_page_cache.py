@@ -0,0 +1,136 @@
+"""
+Тесты кэша отрендеренных страниц.
+"""
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from models import Currency, User
+from myapp import CurrencyRoutes, _publish_currencies
+from utils.http_messages import Request
+from utils.page_cache import PageCache, etag_matches, make_etag
+from utils.user_repository import UserRepository
+
+
+class TestETag(unittest.TestCase):
+    """Тесты сравнения ETag."""
+
+    def test_etag_matches(self):
+        """If-None-Match сравнивается слабо, поддерживаются списки и '*'."""
+        etag = make_etag(b"page")
+        opaque = etag[2:]
+        self.assertTrue(etag_matches(etag, etag))
+        self.assertTrue(etag_matches(opaque, etag))
+        self.assertTrue(etag_matches(f'"other", {etag}', etag))
+        self.assertTrue(etag_matches('*', etag))
+        self.assertFalse(etag_matches('"other"', etag))
+        self.assertFalse(etag_matches(None, etag))
+        print("test_etag_matches пройден")
+
+    def test_lru_eviction(self):
+        """Старые записи вытесняются при переполнении."""
+        cache = PageCache(max_entries=2)
+        cache.put('a', b"1", 'text/html')
+        cache.put('b', b"2", 'text/html')
+        cache.get('a')
+        cache.put('c', b"3", 'text/html')
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        print("test_lru_eviction пройден")
+
+
+class TestRoutesPageCache(unittest.TestCase):
+    """Кэширование страниц в CurrencyRoutes."""
+
+    def setUp(self):
+        self.routes = CurrencyRoutes()
+        self._repository = CurrencyRoutes.user_repository
+        CurrencyRoutes.user_repository = UserRepository(
+            [User(u.id, u.name) for u in self._repository.all()])
+        self._currencies = CurrencyRoutes.currencies_cache
+        CurrencyRoutes.page_cache = PageCache()
+
+    def tearDown(self):
+        CurrencyRoutes.user_repository = self._repository
+        CurrencyRoutes.currencies_cache = self._currencies
+        CurrencyRoutes.page_cache = PageCache()
+
+    def _get(self, path, **headers):
+        return self.routes.dispatch(Request.from_target('GET', path, headers))
+
+    def test_page_rendered_once(self):
+        """Повторный запрос не обращается к шаблонизатору."""
+        first = self._get('/users')
+        with patch.object(CurrencyRoutes, '_render_template', side_effect=AssertionError("рендер")):
+            second = self._get('/users')
+        self.assertEqual(first.body, second.body)
+        self.assertEqual(CurrencyRoutes.page_cache.stats()['hits'], 1)
+        print("test_page_rendered_once пройден")
+
+    def test_not_modified(self):
+        """Совпавший ETag даёт 304 без тела."""
+        etag = self._get('/author').headers['ETag']
+        response = self._get('/author', **{'If-None-Match': etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(response.body, b'')
+        self.assertEqual(response.headers['ETag'], etag)
+        print("test_not_modified пройден")
+
+    def test_user_change_invalidates(self):
+        """Добавление пользователя меняет версию и страницу."""
+        before = self._get('/users')
+        self.routes.dispatch(Request.from_target('POST', '/users', body="name=Ольга Новикова".encode('utf-8')))
+        after = self._get('/users')
+        self.assertNotEqual(before.headers['ETag'], after.headers['ETag'])
+        self.assertIn("Ольга Новикова", after.body.decode('utf-8'))
+        print("test_user_change_invalidates пройден")
+
+    def test_rates_refresh_invalidates(self):
+        """Публикация новых курсов меняет страницу валют."""
+        _publish_currencies([Currency(1, '840', 'USD', 'Доллар США', 90.0, 1)])
+        before = self._get('/currencies')
+        _publish_currencies([Currency(1, '840', 'USD', 'Доллар США', 95.5, 1)])
+        after = self._get('/currencies')
+        self.assertNotEqual(before.headers['ETag'], after.headers['ETag'])
+        self.assertIn("95", after.body.decode('utf-8'))
+        print("test_rates_refresh_invalidates пройден")
+
+    def test_same_rates_keep_version(self):
+        """Обновление без изменения курсов не сбрасывает кэш страниц и ETag."""
+        _publish_currencies([Currency(1, '840', 'USD', 'Доллар США', 90.0, 1)])
+        version = CurrencyRoutes.currencies_version
+        updated_at = CurrencyRoutes.currencies_updated_at
+        etag = self._get('/currencies').headers['ETag']
+
+        _publish_currencies([Currency(1, '840', 'USD', 'Доллар США', 90.0, 1)])
+        self.assertEqual(CurrencyRoutes.currencies_version, version)
+        self.assertEqual(CurrencyRoutes.currencies_updated_at, updated_at)
+        self.assertEqual(self._get('/currencies').headers['ETag'], etag)
+        print("test_same_rates_keep_version пройден")
+
+    def test_error_page_not_cached(self):
+        """Страница ошибки загрузки курсов - 503 без ETag, не остаётся в кэше."""
+        CurrencyRoutes.currencies_cache = []
+        with patch.object(CurrencyRoutes, '_update_currencies',
+                          side_effect=ConnectionError("нет связи")):
+            failed = self._get('/currencies')
+        self.assertEqual(failed.status, 503)
+        self.assertNotIn('ETag', failed.headers)
+
+        _publish_currencies([Currency(1, '840', 'USD', 'Доллар США', 90.0, 1)])
+        # Та же версия курсов, что и при ошибке: кэш не должен отдать ошибку
+        CurrencyRoutes.currencies_version -= 1
+        response = self._get('/currencies')
+        self.assertEqual(response.status, 200)
+        self.assertIn("Доллар США", response.body.decode('utf-8'))
+        print("test_error_page_not_cached пройден")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Тесты постраничной выдачи, поиска и сортировки.
+"""
+
+import unittest
+import sys
+import os
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from models import Currency, User
+from myapp import CurrencyRoutes
+from utils.http_messages import Request
+from utils.page_cache import PageCache
+from utils.pagination import MAX_PER_PAGE, paginate, paging_params
+from utils.user_repository import UserRepository
+
+
+class TestPaginate(unittest.TestCase):
+    """Тесты paginate и разбора параметров."""
+
+    def test_paginate(self):
+        """Страница - срез списка, номер за концом заменяется последним."""
+        page = paginate(list(range(10)), 2, 4)
+        self.assertEqual(page.items, [4, 5, 6, 7])
+        self.assertEqual((page.pages, page.has_prev, page.has_next), (3, True, True))
+
+        last = paginate(list(range(10)), 99, 4)
+        self.assertEqual((last.page, last.items), (3, [8, 9]))
+        empty = paginate([], 1, 4)
+        self.assertEqual((empty.pages, empty.items, empty.has_next), (1, [], False))
+        print("test_paginate пройден")
+
+    def test_paging_params(self):
+        """Неверные параметры не приводят к ошибке, размер страницы ограничен."""
+        self.assertEqual(paging_params({'page': ['3'], 'per_page': ['10']}), (3, 10))
+        self.assertEqual(paging_params({'page': ['abc'], 'per_page': ['-5']}), (1, 1))
+        self.assertEqual(paging_params({'per_page': ['100000']})[1], MAX_PER_PAGE)
+        print("test_paging_params пройден")
+
+
+class TestRoutesPagination(unittest.TestCase):
+    """Страницы /users и /currencies с параметрами."""
+
+    def setUp(self):
+        self.routes = CurrencyRoutes()
+        self._repository = CurrencyRoutes.user_repository
+        self._currencies = CurrencyRoutes.currencies_cache
+        CurrencyRoutes.user_repository = UserRepository(
+            [User(i, f"Пользователь {i:03d}") for i in range(1, 121)] + [User(121, "Анна Смирнова")])
+        CurrencyRoutes.currencies_cache = [Currency(1, '840', 'USD', 'Доллар США', 90.0, 1),
+                                           Currency(2, '978', 'EUR', 'Евро', 99.0, 1),
+                                           Currency(3, '392', 'JPY', 'Иен', 60.0, 100)]
+        CurrencyRoutes.page_cache = PageCache()
+
+    def tearDown(self):
+        CurrencyRoutes.user_repository = self._repository
+        CurrencyRoutes.currencies_cache = self._currencies
+        CurrencyRoutes.page_cache = PageCache()
+
+    def _get(self, target):
+        response = self.routes.dispatch(Request.from_target('GET', target, {}))
+        self.assertEqual(response.status, 200)
+        return response.body.decode('utf-8')
+
+    def test_users_page_bounded(self):
+        """На странице не больше per_page пользователей."""
+        body = self._get('/users')
+        self.assertIn('Пользователь 050', body)
+        self.assertNotIn('Пользователь 051', body)
+
+        body = self._get('/users?page=2&per_page=10')
+        self.assertIn('Пользователь 011', body)
+        self.assertNotIn('Пользователь 010<', body)
+        self.assertNotIn('Пользователь 021', body)
+        self.assertIn('Страница 2 из 13', body)
+        print("test_users_page_bounded пройден")
+
+    def test_users_search(self):
+        """Поиск по началу имени без учёта регистра."""
+        body = self._get('/users?q=%D0%B0%D0%BD%D0%BD')  # 'анн'
+        self.assertIn('Анна Смирнова', body)
+        self.assertNotIn('Пользователь 001', body)
+        self.assertIn('не найдены', self._get('/users?q=zzz'))
+        print("test_users_search пройден")
+
+    def test_users_cursor(self):
+        """Курсор ?after= указывает на следующую страницу."""
+        body = self._get('/users?after=115&per_page=3')
+        self.assertIn('Пользователь 116', body)
+        self.assertIn('after=118', body)
+        self.assertNotIn('Пользователь 119', body)
+        print("test_users_cursor пройден")
+
+    def test_currencies_sort(self):
+        """Сортировка по курсу за единицу в обе стороны."""
+        body = self._get('/currencies?sort=value&order=desc')
+        self.assertLess(body.index('EUR'), body.index('USD'))
+        self.assertLess(body.index('USD'), body.index('JPY'))
+
+        body = self._get('/currencies?sort=value')
+        self.assertLess(body.index('JPY'), body.index('USD'))
+        # Неизвестный столбец - исходный порядок
+        body = self._get('/currencies?sort=__class__')
+        self.assertLess(body.index('USD'), body.index('EUR'))
+        print("test_currencies_sort пройден")
+
+    def test_query_in_cache_key(self):
+        """Разные страницы кэшируются отдельно."""
+        self.assertNotEqual(self._get('/users?page=1'), self._get('/users?page=2'))
+        print("test_query_in_cache_key пройден")
+
+
+if __name__ == '__main__':
+    unittest.main()
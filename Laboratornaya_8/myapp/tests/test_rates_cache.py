@@ -0,0 +1,99 @@
+"""
+Тесты кэша курсов валют (TTL, условные запросы, устаревшие данные).
+"""
+
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from cbr_stub import CBRStubServer, make_feed
+from utils.rates_cache import RatesCache, compute_expires_at
+from utils import currencies_api
+
+
+class TestRatesCache(unittest.TestCase):
+    """Тесты RatesCache против локальной заглушки фида."""
+
+    def test_fresh_entry_is_served_without_network(self):
+        """Повторный запрос в пределах TTL не обращается к серверу."""
+        cache = RatesCache(min_ttl=60)
+        with CBRStubServer() as stub:
+            first = cache.get(stub.url())
+            second = cache.get(stub.url())
+
+        self.assertIs(first, second)
+        self.assertEqual(len(stub.requests_log), 1)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+        print("test_fresh_entry_is_served_without_network пройден")
+
+    def test_conditional_revalidation(self):
+        """После истечения TTL отправляется If-None-Match и обрабатывается 304."""
+        cache = RatesCache(min_ttl=0)
+        with CBRStubServer() as stub:
+            cache.get(stub.url())
+            valute = cache.get(stub.url())
+
+        self.assertIn('USD', valute)
+        self.assertEqual(len(stub.requests_log), 2)
+        self.assertEqual(stub.requests_log[1][1].get('If-None-Match'), '"v1"')
+        self.assertEqual(cache.stats()['revalidated'], 1)
+        print("test_conditional_revalidation пройден")
+
+    def test_stale_data_on_upstream_error(self):
+        """При ошибке источника возвращаются последние известные данные."""
+        cache = RatesCache(min_ttl=0)
+        with CBRStubServer() as stub:
+            cache.get(stub.url())
+            stub.fail = True
+            valute = cache.get(stub.url())
+
+        self.assertEqual(valute['USD']['Value'], 89.6883)
+        self.assertEqual(cache.stats()['stale_hits'], 1)
+        print("test_stale_data_on_upstream_error пройден")
+
+    def test_error_without_cached_data(self):
+        """Без данных в кэше ошибка источника пробрасывается."""
+        cache = RatesCache()
+        with CBRStubServer() as stub:
+            stub.fail = True
+            with self.assertRaises(Exception):
+                cache.get(stub.url())
+        print("test_error_without_cached_data пройден")
+
+    def test_expiry_aligned_to_feed(self):
+        """Срок жизни берётся из NextDate или Timestamp фида."""
+        feed = make_feed(timestamp='2024-01-12T20:00:00+03:00')
+        published = datetime(2024, 1, 12, 20, tzinfo=timezone(timedelta(hours=3))).timestamp()
+        now = published + 3600
+
+        self.assertAlmostEqual(compute_expires_at(feed, now, 300), published + 86400)
+
+        feed['NextDate'] = '2024-01-16T11:30:00+03:00'
+        self.assertGreater(compute_expires_at(feed, now, 300), published + 86400)
+
+        # Устаревший фид перепроверяется через min_ttl
+        self.assertEqual(compute_expires_at(feed, now + 10 ** 7, 300), now + 10 ** 7 + 300)
+        print("test_expiry_aligned_to_feed пройден")
+
+    def test_get_currencies_uses_cache(self):
+        """get_currencies использует общий кэш модуля."""
+        currencies_api.rates_cache.clear()
+        with CBRStubServer() as stub:
+            currencies_api.get_currencies(['USD'], url=stub.url())
+            result = currencies_api.get_currencies(['USD', 'EUR'], url=stub.url())
+
+        self.assertEqual(len(stub.requests_log), 1)
+        self.assertEqual(result['EUR']['num_code'], '978')
+        self.assertEqual(currencies_api.rates_cache.stats()['hits'], 1)
+        currencies_api.rates_cache.clear()
+        print("test_get_currencies_uses_cache пройден")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
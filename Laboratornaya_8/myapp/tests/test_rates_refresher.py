@@ -0,0 +1,115 @@
+"""
+Тесты фонового обновления курсов.
+"""
+
+import sqlite3
+import time
+import unittest
+import sys
+import os
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from models import Currency
+from utils.rates_cache import RatesCache, CacheEntry
+from utils.rates_refresher import RatesRefresher
+
+
+def _currencies(value: float):
+    return [Currency(1, '840', 'USD', 'Доллар США', value, 1)]
+
+
+class TestRatesRefresher(unittest.TestCase):
+    """Тесты RatesRefresher."""
+
+    def test_refresh_swaps_snapshot(self):
+        """Новый снимок подменяет старый целиком, старый не изменяется."""
+        values = iter([90.0, 91.0])
+        published = []
+        refresher = RatesRefresher(lambda: _currencies(next(values)), publish=published.append,
+                                   cache=RatesCache())
+        refresher.refresh()
+        first = published[-1]
+        refresher.refresh()
+
+        self.assertEqual(first[0].value, 90.0)
+        self.assertEqual(published[-1][0].value, 91.0)
+        self.assertIsNot(published[-1], first)
+        self.assertEqual(len(published), 2)
+        print("test_refresh_swaps_snapshot пройден")
+
+    def test_failed_refresh_keeps_previous(self):
+        """При ошибке загрузки остаётся предыдущий снимок."""
+        calls = []
+
+        def loader():
+            calls.append(1)
+            if len(calls) > 1:
+                raise ConnectionError("нет связи")
+            return _currencies(90.0)
+
+        published = []
+        refresher = RatesRefresher(loader, publish=published.append, cache=RatesCache())
+        self.assertTrue(refresher.refresh())
+        self.assertFalse(refresher.refresh())
+        self.assertEqual(len(published), 1)
+        self.assertEqual(published[0][0].value, 90.0)
+        self.assertIn("ConnectionError", refresher.last_error)
+        print("test_failed_refresh_keeps_previous пройден")
+
+    def test_publish_error_keeps_thread(self):
+        """Ошибка публикации (например, базы) не останавливает запуск и фоновый поток."""
+        attempts = []
+
+        def publish(currencies):
+            attempts.append(currencies)
+            raise sqlite3.OperationalError("database is locked")
+
+        refresher = RatesRefresher(lambda: _currencies(90.0), publish=publish,
+                                   cache=RatesCache(), min_interval=0.01, max_interval=0.01)
+        refresher.start(prime=True)
+        try:
+            deadline = time.time() + 2
+            while len(attempts) < 3 and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertTrue(refresher._thread.is_alive())
+        finally:
+            refresher.stop(timeout=1)
+        self.assertGreaterEqual(len(attempts), 3)
+        self.assertIsNone(refresher.last_refresh)
+        self.assertIn("OperationalError", refresher.last_error)
+        print("test_publish_error_keeps_thread пройден")
+
+    def test_next_delay_follows_feed_expiry(self):
+        """Пауза выравнивается по сроку устаревания фида в кэше."""
+        cache = RatesCache()
+        refresher = RatesRefresher(list, publish=[].append, cache=cache, url='feed',
+                                   min_interval=60, max_interval=7200)
+        self.assertEqual(refresher.next_delay(now=0), 60)
+
+        cache._entries['feed'] = CacheEntry(valute={}, expires_at=1000.0)
+        self.assertEqual(refresher.next_delay(now=0), 1000.0)
+        self.assertEqual(refresher.next_delay(now=990), 60)
+        self.assertEqual(refresher.next_delay(now=-10 ** 6), 7200)
+        print("test_next_delay_follows_feed_expiry пройден")
+
+    def test_background_thread(self):
+        """Фоновый поток обновляет снимок без участия вызывающего."""
+        published = []
+        refresher = RatesRefresher(lambda: _currencies(90.0), publish=published.append,
+                                   cache=RatesCache(), min_interval=0.01, max_interval=0.01)
+        refresher.start(prime=True)
+        try:
+            deadline = time.time() + 2
+            while len(published) < 3 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            refresher.stop(timeout=1)
+        self.assertGreaterEqual(len(published), 3)
+        print("test_background_thread пройден")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
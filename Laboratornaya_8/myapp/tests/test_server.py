@@ -34,7 +34,7 @@ class TestServerUnit(unittest.TestCase):
 
     def test_users_list_exists(self):
         """Тест наличия списка пользователей."""
-        users = CurrencyAppHandler.users
+        users = CurrencyAppHandler.user_repository.all()
         self.assertIsInstance(users, list)
         self.assertTrue(len(users) >= 3)  # Должно быть минимум 3 пользователя
 
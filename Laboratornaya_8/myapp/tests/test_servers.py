@@ -0,0 +1,207 @@
+"""
+Тесты режимов HTTP-сервера.
+"""
+
+import socket
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from servers import PooledHTTPServer, make_server
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    """Обработчик, ждущий события перед ответом."""
+
+    release = threading.Event()
+    started = threading.Semaphore(0)
+
+    def do_GET(self):
+        _SlowHandler.started.release()
+        _SlowHandler.release.wait(5)
+        body = b"ok"
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """Быстрый обработчик с постоянными соединениями HTTP/1.1."""
+
+    protocol_version = 'HTTP/1.1'
+    timeout = 5
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestPooledServer(unittest.TestCase):
+    """Тесты PooledHTTPServer."""
+
+    def setUp(self):
+        _SlowHandler.release = threading.Event()
+        _SlowHandler.started = threading.Semaphore(0)
+        self.httpd = PooledHTTPServer(('127.0.0.1', 0), _SlowHandler, workers=2, max_queue=0)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+        self.thread = threading.Thread(target=self.httpd.serve_forever,
+                                       kwargs={'poll_interval': 0.05}, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        _SlowHandler.release.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _fetch(self, results):
+        try:
+            with urllib.request.urlopen(self.url, timeout=5) as response:
+                results.append(response.status)
+        except urllib.error.HTTPError as e:
+            results.append(e.code)
+
+    def test_concurrent_requests(self):
+        """Запросы обрабатываются параллельно в пуле потоков."""
+        results = []
+        clients = [threading.Thread(target=self._fetch, args=(results,)) for _ in range(2)]
+        for client in clients:
+            client.start()
+        # Оба запроса одновременно внутри обработчика
+        self.assertTrue(_SlowHandler.started.acquire(timeout=5))
+        self.assertTrue(_SlowHandler.started.acquire(timeout=5))
+        _SlowHandler.release.set()
+        for client in clients:
+            client.join(5)
+        self.assertEqual(results, [200, 200])
+        print("test_concurrent_requests пройден")
+
+    def test_overload_returns_503(self):
+        """Соединения сверх лимита сразу получают 503."""
+        results = []
+        busy = [threading.Thread(target=self._fetch, args=(results,)) for _ in range(2)]
+        for client in busy:
+            client.start()
+        self.assertTrue(_SlowHandler.started.acquire(timeout=5))
+        self.assertTrue(_SlowHandler.started.acquire(timeout=5))
+
+        rejected = []
+        self._fetch(rejected)
+        self.assertEqual(rejected, [503])
+        self.assertEqual(self.httpd.rejected, 1)
+
+        _SlowHandler.release.set()
+        for client in busy:
+            client.join(5)
+        self.assertEqual(results, [200, 200])
+        print("test_overload_returns_503 пройден")
+
+    def test_idle_keep_alive_reclaimed(self):
+        """Простаивающие keep-alive соединения не задерживают клиентов сверх числа потоков."""
+        request = b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n"
+        for max_queue in (0, 4):
+            httpd = PooledHTTPServer(('127.0.0.1', 0), _KeepAliveHandler,
+                                     workers=2, max_queue=max_queue)
+            thread = threading.Thread(target=httpd.serve_forever,
+                                      kwargs={'poll_interval': 0.05}, daemon=True)
+            thread.start()
+            idle = []
+            try:
+                # Оба потока заняты соединениями, ждущими следующего запроса
+                for _ in range(2):
+                    client = socket.create_connection(httpd.server_address, timeout=5)
+                    client.sendall(request)
+                    self.assertIn(b"200", client.recv(1024))
+                    idle.append(client)
+                # Ответ может прийти раньше, чем поток начнёт ждать следующего запроса
+                deadline = time.time() + 2
+                while len(httpd._idle) < 2 and time.time() < deadline:
+                    time.sleep(0.005)
+
+                start = time.perf_counter()
+                with socket.create_connection(httpd.server_address, timeout=5) as third:
+                    third.sendall(request)
+                    response = third.recv(1024)
+                elapsed = time.perf_counter() - start
+            finally:
+                for client in idle:
+                    client.close()
+                httpd.shutdown()
+                httpd.server_close()
+            self.assertTrue(response.startswith(b"HTTP/1.1 200"))
+            self.assertLess(elapsed, 1.0)
+            self.assertEqual(httpd.reclaimed, 1)
+        print("test_idle_keep_alive_reclaimed пройден")
+
+
+class TestMakeServer(unittest.TestCase):
+    """Тесты make_server."""
+
+    def test_modes(self):
+        """Режимы создают серверы нужных классов."""
+        single = make_server(('127.0.0.1', 0), _SlowHandler, mode='single')
+        threaded = make_server(('127.0.0.1', 0), _SlowHandler, mode='threaded', workers=3)
+        try:
+            self.assertIs(type(single), HTTPServer)
+            self.assertIsInstance(threaded, PooledHTTPServer)
+            self.assertEqual(threaded.workers, 3)
+        finally:
+            single.server_close()
+            threaded.server_close()
+        print("test_modes пройден")
+
+    def test_single_mode_closes_connections(self):
+        """В режиме 'single' первое соединение не задерживает второго клиента."""
+        httpd = make_server(('127.0.0.1', 0), _KeepAliveHandler, mode='single')
+        thread = threading.Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.05},
+                                  daemon=True)
+        thread.start()
+        request = b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n"
+        try:
+            # Первый клиент получает ответ и не закрывает соединение
+            first = socket.create_connection(httpd.server_address, timeout=5)
+            first.sendall(request)
+            self.assertIn(b"200", first.recv(1024))
+
+            start = time.perf_counter()
+            with socket.create_connection(httpd.server_address, timeout=5) as second:
+                second.sendall(request)
+                response = b""
+                while chunk := second.recv(1024):
+                    response += chunk
+            elapsed = time.perf_counter() - start
+            first.close()
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+        self.assertTrue(response.startswith(b"HTTP/1.0 200"))
+        self.assertLess(elapsed, 1.0)
+        print("test_single_mode_closes_connections пройден")
+
+    def test_unknown_mode(self):
+        """Неизвестный режим - ValueError."""
+        with self.assertRaises(ValueError):
+            make_server(('127.0.0.1', 0), _SlowHandler, mode='forking')
+        print("test_unknown_mode пройден")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+"""
+Тесты раздачи статических файлов.
+"""
+
+import asyncio
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from async_server import AsyncHTTPServer
+from myapp import CurrencyRoutes
+from utils.http_messages import Request
+from utils.static_files import (CDN_FALLBACKS, IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL,
+                                StaticFiles, parse_range, precompress)
+
+CSS = b"body { color: #123456; }\n" * 100
+
+
+class TestParseRange(unittest.TestCase):
+    """Тесты parse_range."""
+
+    def test_ranges(self):
+        """Начало и длина для поддерживаемых форм заголовка."""
+        self.assertEqual(parse_range('bytes=0-9', 100), (0, 10))
+        self.assertEqual(parse_range('bytes=90-', 100), (90, 10))
+        self.assertEqual(parse_range('bytes=95-200', 100), (95, 5))
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 10))
+        self.assertEqual(parse_range('bytes=-500', 100), (0, 100))
+        print("test_ranges пройден")
+
+    def test_ignored_and_unsatisfiable(self):
+        """Неподдерживаемые и неверные диапазоны игнорируются, непересекающиеся - ошибка."""
+        self.assertIsNone(parse_range(None, 100))
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 100))
+        self.assertIsNone(parse_range('items=0-1', 100))
+        self.assertIsNone(parse_range('bytes=5-1', 100))
+        self.assertIsNone(parse_range('bytes=200-150', 100))
+        for header in ('bytes=100-', 'bytes=150-200', 'bytes=-0'):
+            with self.assertRaises(ValueError):
+                parse_range(header, 100)
+        print("test_ignored_and_unsatisfiable пройден")
+
+
+class TestStaticFiles(unittest.TestCase):
+    """Тесты StaticFiles.serve и url."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, 'css'))
+        with open(os.path.join(self.root, 'css', 'app.css'), 'wb') as f:
+            f.write(CSS)
+        with open(os.path.join(self.root, 'big.bin'), 'wb') as f:
+            f.write(bytes(range(256)) * 64)
+        self.static = StaticFiles(self.root, hot_max_file_size=4096)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _get(self, path, **headers):
+        return self.static.serve(Request.from_target('GET', path, headers))
+
+    def test_fingerprinted_url(self):
+        """Адрес с актуальным отпечатком кэшируется надолго, с устаревшим - перепроверяется."""
+        url = self.static.url('css/app.css')
+        self.assertRegex(url, r'^/static/css/app\.[0-9a-f]{10}\.css$')
+        response = self._get(url)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.body, CSS)
+        self.assertEqual(response.headers['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response.content_type, 'text/css; charset=utf-8')
+
+        stale = self._get('/static/css/app.0123456789.css')
+        self.assertEqual(stale.status, 200)
+        self.assertEqual(stale.headers['Cache-Control'], REVALIDATE_CACHE_CONTROL)
+        self.assertEqual(self._get('/static/css/app.css').headers['Cache-Control'],
+                         REVALIDATE_CACHE_CONTROL)
+        print("test_fingerprinted_url пройден")
+
+    def test_fingerprint_updated(self):
+        """После изменения файла отпечаток пересчитывается, запись на файл одна."""
+        path = os.path.join(self.root, 'css', 'app.css')
+        before = self.static.url('css/app.css')
+        with open(path, 'ab') as f:
+            f.write(b"a { color: red; }\n")
+        after = self.static.url('css/app.css')
+        self.assertNotEqual(before, after)
+        self.assertEqual(self.static.url('css/app.css'), after)
+        self.assertEqual(len(self.static._fingerprints), 1)
+        print("test_fingerprint_updated пройден")
+
+    def test_cdn_fallback(self):
+        """Отсутствующая библиотека берётся с CDN, отсутствующий файл - по обычному адресу."""
+        relative = 'vendor/bootstrap/bootstrap.min.css'
+        self.assertEqual(self.static.url(relative), CDN_FALLBACKS[relative])
+        self.assertEqual(self.static.url('js/missing.js'), '/static/js/missing.js')
+        print("test_cdn_fallback пройден")
+
+    def test_not_found(self):
+        """Несуществующие файлы и выход за пределы каталога - 404."""
+        for path in ('/static/nope.css', '/static/../myapp.py', '/static/css/../../etc/passwd',
+                     '/static/css', '/static/%2e%2e/myapp.py'):
+            self.assertEqual(self._get(path).status, 404, path)
+        print("test_not_found пройден")
+
+    def test_not_modified(self):
+        """Совпавший ETag - 304 без тела."""
+        etag = self._get('/static/css/app.css').headers['ETag']
+        response = self._get('/static/css/app.css', **{'If-None-Match': etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(response.body, b'')
+        print("test_not_modified пройден")
+
+    def test_range(self):
+        """Диапазон - 206 с Content-Range, непересекающийся - 416."""
+        response = self._get('/static/css/app.css', Range='bytes=5-9')
+        self.assertEqual(response.status, 206)
+        self.assertEqual(response.body, CSS[5:10])
+        self.assertEqual(response.headers['Content-Range'], f"bytes 5-9/{len(CSS)}")
+
+        response = self._get('/static/css/app.css', Range=f'bytes={len(CSS)}-')
+        self.assertEqual(response.status, 416)
+        self.assertEqual(response.headers['Content-Range'], f"bytes */{len(CSS)}")
+
+        # Неверный диапазон игнорируется - файл целиком
+        response = self._get('/static/css/app.css', Range='bytes=9-5')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.body, CSS)
+
+        # If-Range со старым ETag - файл изменился, отдаётся целиком
+        response = self._get('/static/css/app.css', Range='bytes=5-9', **{'If-Range': '"old"'})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.body, CSS)
+        print("test_range пройден")
+
+    def test_precompressed(self):
+        """Сжатая копия отдаётся клиентам с gzip под своим ETag."""
+        self.assertEqual(precompress(self.root), 1)
+        self.assertEqual(precompress(self.root), 0)
+
+        response = self._get('/static/css/app.css', **{'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.body), CSS)
+        self.assertTrue(response.headers['ETag'].endswith('-gz"'))
+
+        plain = self._get('/static/css/app.css')
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(plain.body, CSS)
+        self.assertEqual(self._get('/static/css/app.css',
+                                   **{'If-None-Match': response.headers['ETag']}).status, 304)
+        print("test_precompressed пройден")
+
+    def test_hot_cache_and_file_body(self):
+        """Небольшие файлы читаются с диска один раз, крупные отдаются через FileBody."""
+        self._get('/static/css/app.css')
+        self._get('/static/css/app.css')
+        self.assertEqual(self.static.stats(), {'entries': 1, 'hits': 1, 'misses': 1})
+
+        response = self._get('/static/big.bin', Range='bytes=256-511')
+        self.assertEqual(response.body, b'')
+        self.assertEqual((response.file.offset, response.file.length), (256, 256))
+        self.assertEqual(b''.join(response.file.read_chunks(100)), bytes(range(256)))
+        self.assertEqual(dict(response.header_items())['Content-Length'], '256')
+        print("test_hot_cache_and_file_body пройден")
+
+    def test_routes(self):
+        """Маршрут /static/ не сжимает ответ повторно."""
+        routes = CurrencyRoutes()
+        saved = CurrencyRoutes.static_files
+        CurrencyRoutes.static_files = self.static
+        try:
+            response = routes.dispatch(Request.from_target(
+                'GET', '/static/css/app.css', {'Accept-Encoding': 'gzip'}))
+        finally:
+            CurrencyRoutes.static_files = saved
+        self.assertEqual(response.body, CSS)
+        self.assertNotIn('Content-Encoding', response.headers)
+        print("test_routes пройден")
+
+    def test_async_sendfile(self):
+        """AsyncHTTPServer отправляет крупный файл через loop.sendfile."""
+        server = AsyncHTTPServer(self.static.serve)
+
+        async def exchange():
+            listener = await server.start('127.0.0.1', 0)
+            port = listener.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b"GET /static/big.bin HTTP/1.1\r\nConnection: close\r\n\r\n")
+            data = await reader.read()
+            writer.close()
+            listener.close()
+            await listener.wait_closed()
+            return data
+
+        head, _, body = asyncio.run(exchange()).partition(b"\r\n\r\n")
+        self.assertIn(b"Content-Length: 16384", head)
+        self.assertEqual(body, bytes(range(256)) * 64)
+        print("test_async_sendfile пройден")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Тесты хранилища SQLite.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+import sys
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from models import Currency, User
+from utils.storage import MIGRATIONS, Storage, migrate
+from utils.user_repository import DuplicateUserError, UserRepository
+
+
+class TestStorage(unittest.TestCase):
+    """Тесты Storage."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'app.sqlite3')
+        self.storage = Storage(self.path, batch_size=3)
+
+    def tearDown(self):
+        self.storage.close()
+        shutil.rmtree(self.tmp)
+
+    def test_migrations(self):
+        """Схема создаётся один раз, база в режиме WAL."""
+        conn = sqlite3.connect(self.path)
+        self.assertEqual(migrate(conn), 0)
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], len(MIGRATIONS))
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        conn.close()
+        print("test_migrations пройден")
+
+    def test_repository_survives_restart(self):
+        """Изменения пользователей сохраняются между запусками."""
+        repo = UserRepository.from_storage(self.storage)
+        anna = repo.add("Анна Смирнова")
+        boris = repo.add("Борис Орлов")
+        repo.rename(anna.id, "Анна Иванова")
+        repo.delete(boris.id)
+        self.storage.close()
+
+        restarted = UserRepository.from_storage(Storage(self.path))
+        self.assertEqual([(u.id, u.name) for u in restarted.all()], [(anna.id, "Анна Иванова")])
+        # id удалённого пользователя не выдаётся повторно
+        self.assertEqual(restarted.add("Вера Павлова").id, boris.id + 1)
+        restarted.storage.close()
+        print("test_repository_survives_restart пройден")
+
+    def test_shared_database(self):
+        """Два процесса с одной базой не выдают одинаковых id и имён."""
+        first = UserRepository.from_storage(self.storage)
+        other_storage = Storage(self.path)
+        second = UserRepository.from_storage(other_storage)
+        try:
+            anna = first.add("Анна Смирнова")
+            boris = second.add("Борис Орлов")
+            self.assertNotEqual(anna.id, boris.id)
+            # Имя занято в базе, хотя в памяти второго процесса его нет
+            with self.assertRaises(DuplicateUserError):
+                second.add("анна  смирнова")
+            with self.assertRaises(DuplicateUserError):
+                second.rename(boris.id, "Анна Смирнова")
+            self.assertEqual(second.get(boris.id).name, "Борис Орлов")
+        finally:
+            other_storage.close()
+        self.assertEqual([u.name for u in self.storage.load_users()], ["Анна Смирнова", "Борис Орлов"])
+        print("test_shared_database пройден")
+
+    def test_batch_insert(self):
+        """Пакетная вставка записывает все строки."""
+        users = [User(i, f"Пользователь {i}") for i in range(1, 11)]
+        self.assertEqual(self.storage.insert_users(users), 10)
+        self.assertEqual(len(self.storage.load_users()), 10)
+        self.assertEqual(self.storage.next_user_id(), 11)
+        print("test_batch_insert пройден")
+
+    def test_currency_ids_stable(self):
+        """Обновление курса не меняет id валюты."""
+        ids = self.storage.upsert_currencies([Currency(1, '840', 'USD', 'Доллар США', 90.0, 1),
+                                              Currency(2, '978', 'EUR', 'Евро', 99.0, 1)])
+        again = self.storage.upsert_currencies([Currency(7, '978', 'EUR', 'Евро', 101.0, 1)])
+        self.assertEqual(again, ids)
+        values = {c.char_code: c.value for c in self.storage.load_currencies()}
+        self.assertEqual(values['EUR'], 101.0)
+        print("test_currency_ids_stable пройден")
+
+    def test_subscriptions(self):
+        """Подписки ищутся в обе стороны и удаляются вместе с пользователем."""
+        self.storage.insert_users([User(1, "Анна"), User(2, "Борис")])
+        ids = self.storage.upsert_currencies([Currency(1, '840', 'USD', 'Доллар США', 90.0, 1)])
+        usd = ids['USD']
+        self.storage.insert_subscriptions([(1, usd), (2, usd), (1, usd)])
+
+        self.assertEqual(self.storage.user_currency_ids(1), [usd])
+        self.assertEqual(sorted(self.storage.currency_user_ids(usd)), [1, 2])
+
+        self.storage.delete_user(2)
+        self.assertEqual(self.storage.currency_user_ids(usd), [1])
+        self.storage.remove_subscription(1, usd)
+        self.assertEqual(self.storage.load_subscriptions(), [])
+        print("test_subscriptions пройден")
+
+    def test_indexes_used(self):
+        """Поиск подписок идёт по индексам, а не полным сканированием."""
+        conn = sqlite3.connect(self.path)
+        for sql in ("SELECT currency_id FROM user_currency WHERE user_id = 1",
+                    "SELECT user_id FROM user_currency WHERE currency_id = 1"):
+            plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql))
+            self.assertIn("INDEX", plan)
+        conn.close()
+        print("test_indexes_used пройден")
+
+    def test_connection_per_thread(self):
+        """Каждый поток получает своё соединение."""
+        connections = [self.storage._connection()]
+        thread = threading.Thread(target=lambda: connections.append(self.storage._connection()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(connections[0], connections[1])
+        print("test_connection_per_thread пройден")
+
+
+if __name__ == '__main__':
+    unittest.main()
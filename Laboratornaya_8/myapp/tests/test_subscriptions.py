@@ -0,0 +1,252 @@
+"""
+Тесты индекса подписок.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from models import Currency, User
+from myapp import CurrencyRoutes
+from utils.http_messages import Request
+from utils.page_cache import PageCache
+from utils.storage import Storage
+from utils.subscriptions import SubscriptionIndex
+from utils.user_repository import UserRepository
+
+
+class TestSubscriptionIndex(unittest.TestCase):
+    """Тесты SubscriptionIndex."""
+
+    def setUp(self):
+        self.index = SubscriptionIndex()
+
+    def test_subscribe_unsubscribe(self):
+        """Повторная подписка и отписка без подписки ничего не меняют."""
+        self.assertTrue(self.index.subscribe(1, 10))
+        self.assertFalse(self.index.subscribe(1, 10))
+        self.assertTrue(self.index.is_subscribed(1, 10))
+        self.assertEqual(len(self.index), 1)
+
+        version = self.index.version
+        self.assertTrue(self.index.unsubscribe(1, 10))
+        self.assertFalse(self.index.unsubscribe(1, 10))
+        self.assertFalse(self.index.is_subscribed(1, 10))
+        self.assertEqual(self.index.version, version + 1)
+        print("test_subscribe_unsubscribe пройден")
+
+    def test_both_directions(self):
+        """Подписки доступны со стороны пользователя и со стороны валюты."""
+        for user_id, currency_id in ((1, 10), (1, 20), (2, 10), (3, 30)):
+            self.index.subscribe(user_id, currency_id)
+        self.assertEqual(self.index.currencies_of(1), {10, 20})
+        self.assertEqual(self.index.subscribers_of(10), {1, 2})
+        self.assertEqual(self.index.subscribers_of(99), frozenset())
+        self.assertEqual(self.index.count_for_user(1), 2)
+        print("test_both_directions пройден")
+
+    def test_notify_targets(self):
+        """Каждый подписчик получает одно уведомление со своими валютами."""
+        for user_id, currency_id in ((1, 10), (1, 20), (2, 10), (3, 30)):
+            self.index.subscribe(user_id, currency_id)
+        self.assertEqual(self.index.notify_targets([10, 20]), {1: {10, 20}, 2: {10}})
+        self.assertEqual(self.index.notify_targets([]), {})
+        print("test_notify_targets пройден")
+
+    def test_remove_user(self):
+        """Удаление пользователя убирает его из подписчиков всех валют."""
+        self.index.subscribe(1, 10)
+        self.index.subscribe(1, 20)
+        self.index.subscribe(2, 10)
+        self.assertEqual(self.index.remove_user(1), 2)
+        self.assertEqual(self.index.subscribers_of(10), {2})
+        self.assertEqual(self.index.subscribers_of(20), frozenset())
+        self.assertEqual(self.index.remove_user(1), 0)
+        print("test_remove_user пройден")
+
+
+class TestStoredSubscriptions(unittest.TestCase):
+    """Подписки, сохранённые в SQLite."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'app.sqlite3')
+        self.storage = Storage(self.path)
+        self.storage.insert_users([User(1, "Анна"), User(2, "Борис")])
+        self.ids = self.storage.upsert_currencies([Currency(1, '840', 'USD', 'Доллар США', 90.0, 1),
+                                                   Currency(2, '978', 'EUR', 'Евро', 99.0, 1)])
+
+    def tearDown(self):
+        self.storage.close()
+        shutil.rmtree(self.tmp)
+
+    def test_survives_restart(self):
+        """Подписки загружаются заново с теми же id записей."""
+        index = SubscriptionIndex.from_storage(self.storage)
+        index.subscribe(1, self.ids['USD'])
+        index.subscribe(2, self.ids['USD'])
+        index.subscribe(1, self.ids['EUR'])
+        index.unsubscribe(1, self.ids['EUR'])
+        self.storage.close()
+
+        self.storage = Storage(self.path)
+        restarted = SubscriptionIndex.from_storage(self.storage)
+        self.assertEqual(restarted.subscribers_of(self.ids['USD']), {1, 2})
+        self.assertEqual(restarted.currencies_of(1), {self.ids['USD']})
+        self.assertEqual(sorted(r.id for r in restarted.records()),
+                         sorted(r.id for r in index.records()))
+        print("test_survives_restart пройден")
+
+
+class TestRoutesSubscriptions(unittest.TestCase):
+    """Подписки в CurrencyRoutes."""
+
+    def setUp(self):
+        self.routes = CurrencyRoutes()
+        self._repository = CurrencyRoutes.user_repository
+        self._subscriptions = CurrencyRoutes.subscriptions
+        self._currencies = CurrencyRoutes.currencies_cache
+        CurrencyRoutes.user_repository = UserRepository([User(1, "Анна"), User(2, "Борис")])
+        CurrencyRoutes.subscriptions = SubscriptionIndex()
+        CurrencyRoutes.currencies_cache = [Currency(1, '840', 'USD', 'Доллар США', 90.0, 1),
+                                           Currency(2, '978', 'EUR', 'Евро', 99.0, 1)]
+        CurrencyRoutes.page_cache = PageCache()
+
+    def tearDown(self):
+        CurrencyRoutes.user_repository = self._repository
+        CurrencyRoutes.subscriptions = self._subscriptions
+        CurrencyRoutes.currencies_cache = self._currencies
+        CurrencyRoutes.page_cache = PageCache()
+
+    def _post(self, path, body):
+        return self.routes.dispatch(Request.from_target(
+            'POST', path, {'Content-Type': 'application/x-www-form-urlencoded'}, body.encode()))
+
+    def test_subscribe_route(self):
+        """Подписка через форму видна на странице пользователя."""
+        response = self._post('/subscribe', 'user_id=1&currency_id=2')
+        self.assertEqual(response.status, 200)
+        self.assertTrue(CurrencyRoutes.subscriptions.is_subscribed(1, 2))
+        self.assertEqual([c.char_code for c in self.routes._get_user_currencies(1)], ['EUR'])
+        self.assertEqual(self.routes._get_user_currencies(2), [])
+
+        self._post('/unsubscribe', 'user_id=1&currency_id=2')
+        self.assertEqual(self.routes._get_user_currencies(1), [])
+        print("test_subscribe_route пройден")
+
+    def test_unknown_targets(self):
+        """Неизвестный пользователь - 404, неизвестная валюта не подписывается."""
+        self.assertEqual(self._post('/subscribe', 'user_id=99&currency_id=1').status, 404)
+        self._post('/subscribe', 'user_id=1&currency_id=99')
+        self.assertEqual(len(CurrencyRoutes.subscriptions), 0)
+        print("test_unknown_targets пройден")
+
+    def test_users_page_invalidated(self):
+        """После подписки список пользователей рендерится заново."""
+        get = lambda: self.routes.dispatch(Request.from_target('GET', '/users', {}))
+        etag = get().headers['ETag']
+        self._post('/subscribe', 'user_id=1&currency_id=1')
+        self.assertNotEqual(get().headers['ETag'], etag)
+        print("test_users_page_invalidated пройден")
+
+    def test_delete_user_drops_subscriptions(self):
+        """Удалённый пользователь не остаётся среди подписчиков."""
+        self._post('/subscribe', 'user_id=2&currency_id=1')
+        self._post('/delete-user', 'user_id=2')
+        self.assertEqual(CurrencyRoutes.subscriptions.subscribers_of(1), frozenset())
+        print("test_delete_user_drops_subscriptions пройден")
+
+    def test_read_only_rejects_changes(self):
+        """В режиме только для чтения (prefork без базы) POST-маршруты ничего не меняют."""
+        CurrencyRoutes.read_only = True
+        try:
+            for path, body in (('/subscribe', 'user_id=1&currency_id=1'), ('/users', 'name=Вера'),
+                               ('/delete-user', 'user_id=2')):
+                self.assertEqual(self._post(path, body).status, 405, path)
+            users = self.routes.dispatch(Request.from_target('GET', '/users', {}))
+        finally:
+            CurrencyRoutes.read_only = False
+        self.assertEqual(users.status, 200)
+        self.assertEqual(len(CurrencyRoutes.subscriptions), 0)
+        self.assertEqual(len(CurrencyRoutes.user_repository), 2)
+        print("test_read_only_rejects_changes пройден")
+
+
+class TestSharedStorageRoutes(unittest.TestCase):
+    """Несколько процессов с общей базой (режим prefork)."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        path = os.path.join(self.tmp, 'app.sqlite3')
+        self.storage = Storage(path)
+        self.storage.insert_users([User(1, "Анна"), User(2, "Борис")])
+        self.ids = self.storage.upsert_currencies([Currency(1, '840', 'USD', 'Доллар США', 90.0, 1)])
+        # Второй процесс: своё соединение и свои индексы в памяти
+        self.other = Storage(path)
+
+        self.routes = CurrencyRoutes()
+        self._saved = {name: getattr(CurrencyRoutes, name) for name in
+                       ('storage', 'user_repository', 'subscriptions', 'currencies_cache')}
+        CurrencyRoutes.storage = self.storage
+        CurrencyRoutes.user_repository = UserRepository.from_storage(self.storage)
+        CurrencyRoutes.subscriptions = SubscriptionIndex.from_storage(self.storage)
+        CurrencyRoutes.currencies_cache = self.storage.load_currencies()
+        CurrencyRoutes.page_cache = PageCache()
+
+    def tearDown(self):
+        for name, value in self._saved.items():
+            setattr(CurrencyRoutes, name, value)
+        CurrencyRoutes.page_cache = PageCache()
+        self.storage.close()
+        self.other.close()
+        shutil.rmtree(self.tmp)
+
+    def _get_users(self):
+        return self.routes.dispatch(Request.from_target('GET', '/users', {}))
+
+    def _post(self, path, body):
+        return self.routes.dispatch(Request.from_target(
+            'POST', path, {'Content-Type': 'application/x-www-form-urlencoded'}, body.encode()))
+
+    def test_changes_of_other_process_visible(self):
+        """Изменения соседнего процесса видны после перезагрузки индексов по счётчику базы."""
+        usd = self.ids['USD']
+        etag = self._get_users().headers['ETag']
+        other_users = UserRepository.from_storage(self.other)
+        other_subscriptions = SubscriptionIndex.from_storage(self.other)
+        vera = other_users.add("Вера Павлова")
+        other_subscriptions.subscribe(vera.id, usd)
+
+        response = self._get_users()
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertIn("Вера Павлова", response.body.decode('utf-8'))
+        self.assertTrue(CurrencyRoutes.subscriptions.is_subscribed(vera.id, usd))
+
+        other_users.delete(vera.id)
+        self.assertNotIn("Вера Павлова", self._get_users().body.decode('utf-8'))
+        self.assertEqual(CurrencyRoutes.subscriptions.subscribers_of(usd), frozenset())
+        print("test_changes_of_other_process_visible пройден")
+
+    def test_own_writes_without_reload(self):
+        """Собственные изменения не вызывают перезагрузки индексов."""
+        repository, subscriptions = CurrencyRoutes.user_repository, CurrencyRoutes.subscriptions
+        self.assertEqual(self._post('/users', 'name=Глеб Орлов').status, 200)
+        gleb = repository.find_by_name("Глеб Орлов")
+        self._post('/subscribe', f'user_id={gleb.id}&currency_id={self.ids["USD"]}')
+        self._post('/edit-user', f'user_id={gleb.id}&name=Глеб Соколов')
+        self._post('/delete-user', 'user_id=2')
+        self._get_users()
+        self.assertIs(CurrencyRoutes.user_repository, repository)
+        self.assertIs(CurrencyRoutes.subscriptions, subscriptions)
+        self.assertEqual([u.name for u in self.other.load_users()], ["Анна", "Глеб Соколов"])
+        print("test_own_writes_without_reload пройден")
+
+
+if __name__ == '__main__':
+    unittest.main()
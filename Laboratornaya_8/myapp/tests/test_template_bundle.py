@@ -0,0 +1,68 @@
+"""
+Тесты предварительной компиляции шаблонов.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from jinja2 import ChoiceLoader, FileSystemLoader
+
+from utils.template_bundle import TEMPLATES_DIR, bundle_is_fresh, compile_bundle, load_environment
+
+
+class TestTemplateBundle(unittest.TestCase):
+    """Тесты compile_bundle и load_environment."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.templates = os.path.join(self.tmp, 'templates')
+        self.bundle = os.path.join(self.tmp, 'bundle')
+        shutil.copytree(TEMPLATES_DIR, self.templates)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_bundle_renders_same_html(self):
+        """Шаблоны из пакета дают тот же HTML, что и из исходников."""
+        count = compile_bundle(self.templates, self.bundle)
+        self.assertEqual(count, len(os.listdir(self.templates)))
+
+        bundled = load_environment(self.templates, self.bundle)
+        source = load_environment(self.templates, None)
+        self.assertIsInstance(bundled.loader, ChoiceLoader)
+        self.assertIsInstance(source.loader, FileSystemLoader)
+
+        context = {'title': 'Страница', 'myapp': {'name': 'App', 'version': '1.0'}}
+        self.assertEqual(bundled.get_template('404.html').render(**context),
+                         source.get_template('404.html').render(**context))
+        print("test_bundle_renders_same_html пройден")
+
+    def test_stale_bundle_ignored(self):
+        """После изменения шаблона пакет считается устаревшим."""
+        compile_bundle(self.templates, self.bundle)
+        self.assertTrue(bundle_is_fresh(self.templates, self.bundle))
+
+        with open(os.path.join(self.templates, '404.html'), 'a', encoding='utf-8') as f:
+            f.write("<!-- изменено -->")
+        self.assertFalse(bundle_is_fresh(self.templates, self.bundle))
+        env = load_environment(self.templates, self.bundle)
+        self.assertIsInstance(env.loader, FileSystemLoader)
+        self.assertIn("изменено", env.get_template('404.html').render(myapp={}))
+        print("test_stale_bundle_ignored пройден")
+
+    def test_preload(self):
+        """При preload все шаблоны уже в кэше окружения."""
+        env = load_environment(self.templates, None)
+        self.assertEqual(len(env.cache), len(os.listdir(self.templates)))
+        print("test_preload пройден")
+
+
+if __name__ == '__main__':
+    unittest.main()
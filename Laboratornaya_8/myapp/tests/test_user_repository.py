@@ -0,0 +1,203 @@
+"""
+Тесты хранилища пользователей.
+"""
+
+import random
+import threading
+import unittest
+import sys
+import os
+
+# Добавляем текущую директорию в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from models import User
+from utils.user_repository import (DuplicateUserError, UserNotFoundError, UserRepository,
+                                   _SortedList, normalize_name)
+
+
+class TestUserRepository(unittest.TestCase):
+    """Тесты UserRepository."""
+
+    def setUp(self):
+        self.repo = UserRepository([User(1, "Алексей Петров"), User(2, "Мария Сидорова")])
+
+    def test_normalize_name(self):
+        """Регистр и лишние пробелы не различаются."""
+        self.assertEqual(normalize_name("  Анна   СМИРНОВА "), "анна смирнова")
+        print("test_normalize_name пройден")
+
+    def test_add_and_lookup(self):
+        """Добавленный пользователь находится по id и имени."""
+        user = self.repo.add("Анна Смирнова")
+        self.assertEqual(user.id, 3)
+        self.assertIs(self.repo.get(3), user)
+        self.assertIs(self.repo.find_by_name("анна  смирнова"), user)
+        self.assertEqual(len(self.repo), 3)
+        print("test_add_and_lookup пройден")
+
+    def test_duplicate_name(self):
+        """Повторное имя отклоняется без учёта регистра."""
+        with self.assertRaises(DuplicateUserError):
+            self.repo.add("алексей петров")
+        with self.assertRaises(DuplicateUserError):
+            UserRepository([User(1, "Анна"), User(2, "АННА")])
+        print("test_duplicate_name пройден")
+
+    def test_rename(self):
+        """Переименование обновляет индекс имён."""
+        old = self.repo.rename(1, "Алексей Иванов")
+        self.assertEqual(old, "Алексей Петров")
+        self.assertIsNone(self.repo.find_by_name("Алексей Петров"))
+        self.assertEqual(self.repo.find_by_name("Алексей Иванов").id, 1)
+
+        # Смена регистра своего же имени - не дубликат
+        self.repo.rename(1, "алексей иванов")
+        with self.assertRaises(DuplicateUserError):
+            self.repo.rename(1, "Мария Сидорова")
+        with self.assertRaises(UserNotFoundError):
+            self.repo.rename(99, "Кто-то")
+        print("test_rename пройден")
+
+    def test_delete_does_not_reuse_id(self):
+        """После удаления id не выдаётся повторно."""
+        user = self.repo.add("Анна Смирнова")
+        self.repo.delete(user.id)
+        self.assertNotIn(user.id, self.repo)
+        self.assertIsNone(self.repo.find_by_name("Анна Смирнова"))
+        self.assertEqual(self.repo.add("Ольга Новикова").id, user.id + 1)
+        with self.assertRaises(UserNotFoundError):
+            self.repo.delete(user.id)
+        print("test_delete_does_not_reuse_id пройден")
+
+    def test_snapshot_and_version(self):
+        """Список строится заново только после изменения."""
+        first = self.repo.all()
+        version = self.repo.version
+        self.assertIs(self.repo.all(), first)
+
+        self.repo.add("Анна Смирнова")
+        self.assertGreater(self.repo.version, version)
+        self.assertIsNot(self.repo.all(), first)
+        self.assertEqual([u.id for u in self.repo.all()], [1, 2, 3])
+        print("test_snapshot_and_version пройден")
+
+    def test_find_by_prefix(self):
+        """Поиск по началу имени с учётом переименований и удалений."""
+        anna = self.repo.add("Анна Смирнова")
+        self.repo.add("Алла Пугачёва")
+        users, total = self.repo.find_by_prefix("ал")
+        self.assertEqual([u.name for u in users], ["Алексей Петров", "Алла Пугачёва"])
+        self.assertEqual(total, 2)
+
+        users, total = self.repo.find_by_prefix("А", offset=1, limit=1)
+        self.assertEqual(([u.name for u in users], total), (["Алла Пугачёва"], 3))
+
+        self.repo.rename(anna.id, "Ольга Смирнова")
+        self.repo.delete(1)
+        self.assertEqual(self.repo.find_by_prefix("а"), ([self.repo.get(anna.id + 1)], 1))
+        self.assertEqual(self.repo.find_by_prefix("ольга")[1], 1)
+        self.assertEqual(self.repo.find_by_prefix("я"), ([], 0))
+        print("test_find_by_prefix пройден")
+
+    def test_page_after(self):
+        """Курсорная выдача не сдвигается при удалении."""
+        for i in range(3, 8):
+            self.repo.add(f"Пользователь {i}")
+        first = self.repo.page_after(0, 3)
+        self.assertEqual([u.id for u in first], [1, 2, 3])
+        self.repo.delete(2)
+        self.assertEqual([u.id for u in self.repo.page_after(first[-1].id, 3)], [4, 5, 6])
+        self.assertEqual(self.repo.page_after(7, 3), [])
+        print("test_page_after пройден")
+
+    def test_page(self):
+        """Страница по позиции в порядке id без пересортировки всего списка."""
+        for i in range(3, 8):
+            self.repo.add(f"Пользователь {i}")
+        self.repo.delete(4)
+        self.assertEqual([u.id for u in self.repo.page(2, 3)], [3, 5, 6])
+        self.assertEqual([u.id for u in self.repo.page(5, 3)], [7])
+        self.assertEqual([u.id for u in self.repo.all()], [1, 2, 3, 5, 6, 7])
+        print("test_page пройден")
+
+    def test_sorted_blocks(self):
+        """Блочный список совпадает с обычным отсортированным при вставках и удалениях."""
+        rng = random.Random(7)
+        blocks, reference = _SortedList(load=4), []
+        for _ in range(500):
+            value = rng.randrange(200)
+            if value in reference and rng.random() < 0.4:
+                blocks.remove(value)
+                reference.remove(value)
+            elif value not in reference:
+                blocks.add(value)
+                reference.append(value)
+                reference.sort()
+            self.assertEqual(list(blocks), reference)
+        for value in (-1, 0, 57, 100, 199, 250):
+            self.assertEqual(blocks.bisect_left(value), sum(v < value for v in reference))
+            self.assertEqual(blocks.bisect_right(value), sum(v <= value for v in reference))
+        for start, stop in ((0, 5), (3, 40), (len(reference) - 2, len(reference) + 5), (10, 10)):
+            self.assertEqual(blocks.slice(start, stop), reference[start:stop])
+        with self.assertRaises(ValueError):
+            blocks.remove(1000)
+        print("test_sorted_blocks пройден")
+
+    def test_concurrent_adds(self):
+        """Параллельные добавления получают разные id, дубликаты отклоняются."""
+        errors = []
+
+        def worker(n):
+            for i in range(100):
+                try:
+                    self.repo.add(f"Пользователь {i}")
+                except DuplicateUserError:
+                    errors.append(n)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.repo), 102)
+        self.assertEqual(len(errors), 300)
+        self.assertEqual(len({u.id for u in self.repo}), 102)
+        print("test_concurrent_adds пройден")
+
+    def test_readers_not_blocked_by_storage(self):
+        """Пока идёт запись в хранилище, чтение страниц и поиск не ждут."""
+        writing, release = threading.Event(), threading.Event()
+
+        class SlowStorage:
+            def create_user(self, name):
+                writing.set()
+                release.wait(5)
+                return User(3, name)
+
+            def written_version(self, name):
+                return 0
+
+        repo = UserRepository([User(1, "Алексей Петров")], storage=SlowStorage())
+        adder = threading.Thread(target=repo.add, args=("Вера Павлова",))
+        adder.start()
+        try:
+            self.assertTrue(writing.wait(5))
+            result = []
+            reader = threading.Thread(target=lambda: result.append(
+                (repo.page(0, 10), repo.find_by_prefix("ал"), repo.all())))
+            reader.start()
+            reader.join(1)
+            self.assertFalse(reader.is_alive())
+            self.assertEqual([u.id for u in result[0][0]], [1])
+        finally:
+            release.set()
+            adder.join(5)
+        self.assertEqual(repo.find_by_name("вера павлова").id, 3)
+        print("test_readers_not_blocked_by_storage пройден")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,259 @@
+"""Векторизованная аналитика курсов: скользящие средние, волатильность, кросс-курсы."""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from models import Currency
+from utils.currencies_api import get_currency_history
+
+
+def history_matrix(
+        currency_codes: Sequence[str],
+        days: int = 90,
+        store=None
+) -> Tuple[List[str], np.ndarray]:
+    """
+    Собрать историю курсов нескольких валют в одну матрицу.
+
+    Args:
+        currency_codes: Символьные коды валют (столбцы матрицы)
+        days: Глубина истории в днях
+        store: Хранилище курсов (по умолчанию - общее)
+
+    Returns:
+        Кортеж (даты по возрастанию, матрица T x N курсов за 1 единицу
+        валюты в рублях); отсутствующие значения равны NaN
+    """
+    columns: List[Dict[str, float]] = []
+    all_dates = set()
+    for code in currency_codes:
+        history = get_currency_history(code, days=days, store=store)
+        column = {row['date']: row['value'] / row.get('nominal', 1) for row in history}
+        columns.append(column)
+        all_dates.update(column)
+
+    dates = sorted(all_dates)
+    values = np.full((len(dates), len(columns)), np.nan)
+    for j, column in enumerate(columns):
+        values[:, j] = [column.get(d, np.nan) for d in dates]
+    return dates, values
+
+
+def _forward_fill(values: np.ndarray) -> np.ndarray:
+    """Заменить NaN последним известным значением выше по столбцу."""
+    rows = np.arange(len(values)).reshape((-1,) + (1,) * (values.ndim - 1))
+    last_known = np.where(np.isfinite(values), rows, 0)
+    np.maximum.accumulate(last_known, axis=0, out=last_known)
+    return np.take_along_axis(values, last_known, axis=0)
+
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Простое скользящее среднее по оси времени для всех валют сразу.
+
+    Первые window - 1 строк результата равны NaN. Пропуски (NaN) в
+    среднее не входят; окно без единого значения даёт NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.full(values.shape, np.nan)
+    if window <= len(values):
+        known = np.isfinite(values)
+        sums = sliding_window_view(np.where(known, values, 0.0), window, axis=0).sum(axis=-1)
+        counts = sliding_window_view(known, window, axis=0).sum(axis=-1)
+        with np.errstate(invalid='ignore'):
+            result[window - 1:] = sums / counts
+    return result
+
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """
+    Экспоненциальное скользящее среднее (alpha = 2 / (span + 1)).
+
+    Цикл идёт только по времени, каждый шаг обрабатывает все валюты
+    одной векторной операцией. EMA начинается с первого известного
+    значения валюты и не меняется в дни пропусков (как в RollingStats).
+    """
+    values = np.asarray(values, dtype=float)
+    alpha = 2.0 / (span + 1)
+    result = np.empty(values.shape)
+    if len(values) == 0:
+        return result
+    result[0] = values[0]
+    for t in range(1, len(values)):
+        row, previous = values[t], result[t - 1]
+        updated = alpha * row + (1 - alpha) * previous
+        result[t] = np.where(np.isfinite(row), np.where(np.isnan(previous), row, updated), previous)
+    return result
+
+
+def log_returns(values: np.ndarray) -> np.ndarray:
+    """
+    Логарифмические доходности; первая строка равна NaN.
+
+    Доходность после пропуска считается от последней известной цены,
+    в день пропуска она равна NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.full(values.shape, np.nan)
+    if len(values) > 1:
+        result[1:] = np.log(values[1:] / _forward_fill(values)[:-1])
+    return result
+
+
+def rolling_volatility(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Скользящее стандартное отклонение дневных лог-доходностей (ddof=1).
+
+    Значение в строке t считается по доходностям дней t - window + 1 ... t;
+    пропуски не учитываются, при менее чем двух доходностях в окне - NaN.
+    """
+    returns = log_returns(values)[1:]
+    result = np.full(np.shape(values), np.nan)
+    if window <= len(returns):
+        known = np.isfinite(returns)
+        filled = np.where(known, returns, 0.0)
+        n = sliding_window_view(known, window, axis=0).sum(axis=-1)
+        windows = sliding_window_view(filled, window, axis=0)
+        total = windows.sum(axis=-1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / n
+            # Отклонения пропусков от среднего в сумму квадратов не входят
+            deviations = np.where(sliding_window_view(known, window, axis=0),
+                                  windows - mean[..., None], 0.0)
+            variance = (deviations ** 2).sum(axis=-1) / (n - 1)
+        result[window:] = np.where(n >= 2, np.sqrt(variance), np.nan)
+    return result
+
+
+def cross_rate(values: np.ndarray, currency_codes: Sequence[str], base: str, quote: str) -> np.ndarray:
+    """
+    Кросс-курс base/quote через рубль для каждой строки истории.
+
+    Например, cross_rate(values, codes, 'EUR', 'USD') - сколько долларов
+    стоит один евро.
+    """
+    codes = list(currency_codes)
+    values = np.asarray(values, dtype=float)
+    return values[:, codes.index(base)] / values[:, codes.index(quote)]
+
+
+class RollingStats:
+    """
+    Инкрементальные SMA, EMA и волатильность для набора валют.
+
+    Каждый новый день обрабатывается за O(1) на окно и валюту: окно
+    хранится в кольцевом буфере, суммы обновляются на разницу между
+    добавленным и вытесненным значением.
+
+    Пропущенные значения (NaN) в суммы не попадают: для каждой валюты
+    отдельно считается число известных значений в окне, EMA и последняя
+    цена в такой день не меняются.
+    """
+
+    def __init__(self, currency_codes: Sequence[str], window: int = 20, span: Optional[int] = None):
+        """
+        Args:
+            currency_codes: Символьные коды валют
+            window: Размер окна SMA и волатильности
+            span: Период EMA (по умолчанию равен window)
+        """
+        if window < 2:
+            raise ValueError("Размер окна должен быть не меньше 2")
+        self.codes = list(currency_codes)
+        self.window = window
+        self.alpha = 2.0 / ((span or window) + 1)
+        n = len(self.codes)
+
+        self.count = 0
+        self._prices = np.zeros((window, n))
+        self._returns = np.zeros((window, n))
+        self._price_known = np.zeros((window, n), dtype=bool)
+        self._return_known = np.zeros((window, n), dtype=bool)
+        self._price_sum = np.zeros(n)
+        self._price_count = np.zeros(n)
+        self._return_sum = np.zeros(n)
+        self._return_sq_sum = np.zeros(n)
+        self._return_count = np.zeros(n)
+        self._last = np.full(n, np.nan)
+        self._ema = np.full(n, np.nan)
+
+    @classmethod
+    def from_history(cls, currency_codes: Sequence[str], values: np.ndarray, **kwargs) -> 'RollingStats':
+        """Создать и прогреть по готовой матрице истории."""
+        stats = cls(currency_codes, **kwargs)
+        for row in np.asarray(values, dtype=float):
+            stats.update(row)
+        return stats
+
+    def update(self, row: Sequence[float]) -> None:
+        """Добавить курсы за новый день (по одному значению на валюту)."""
+        row = np.asarray(row, dtype=float)
+        known = np.isfinite(row)
+        value = np.where(known, row, 0.0)
+        slot = self.count % self.window
+
+        # Скользящая сумма цен; пропуски хранятся в буфере нулями
+        self._price_sum += value - self._prices[slot]
+        self._price_count += known
+        self._price_count -= self._price_known[slot]
+        self._prices[slot] = value
+        self._price_known[slot] = known
+
+        # Доходности отстают от цен на один день и считаются
+        # от последней известной цены
+        if self.count > 0:
+            r = np.log(row / self._last)
+            r_known = np.isfinite(r)
+            r = np.where(r_known, r, 0.0)
+            r_slot = (self.count - 1) % self.window
+            old = self._returns[r_slot]
+            self._return_sum += r - old
+            self._return_sq_sum += r * r - old * old
+            self._return_count += r_known
+            self._return_count -= self._return_known[r_slot]
+            self._returns[r_slot] = r
+            self._return_known[r_slot] = r_known
+
+        ema_value = self.alpha * row + (1 - self.alpha) * self._ema
+        self._ema = np.where(known, np.where(np.isnan(self._ema), row, ema_value), self._ema)
+        self._last = np.where(known, row, self._last)
+        self.count += 1
+
+    def update_from_currencies(self, currencies: Sequence[Currency]) -> None:
+        """Добавить новый день по списку моделей Currency."""
+        by_code = {c.char_code: c.value_per_unit for c in currencies}
+        self.update([by_code.get(code, np.nan) for code in self.codes])
+
+    @property
+    def sma(self) -> np.ndarray:
+        """Текущее SMA по известным ценам окна (NaN, пока окно не заполнено)."""
+        if self.count < self.window:
+            return np.full(len(self.codes), np.nan)
+        with np.errstate(invalid='ignore'):
+            return self._price_sum / self._price_count
+
+    @property
+    def ema(self) -> np.ndarray:
+        """Текущее EMA."""
+        return self._ema.copy()
+
+    @property
+    def volatility(self) -> np.ndarray:
+        """Текущее стандартное отклонение лог-доходностей за окно."""
+        if self.count <= self.window:
+            return np.full(len(self.codes), np.nan)
+        n = self._return_count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = (self._return_sq_sum - self._return_sum ** 2 / n) / (n - 1)
+        return np.where(n >= 2, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Текущие показатели по каждой валюте."""
+        sma_values, ema_values, vol_values = self.sma, self.ema, self.volatility
+        return {
+            code: {'sma': float(sma_values[j]), 'ema': float(ema_values[j]),
+                   'volatility': float(vol_values[j])}
+            for j, code in enumerate(self.codes)
+        }
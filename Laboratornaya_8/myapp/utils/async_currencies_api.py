@@ -0,0 +1,307 @@
+"""Асинхронный клиент API курсов валют на asyncio streams."""
+
+import asyncio
+import json
+import os
+import ssl
+import threading
+from datetime import date
+from typing import Awaitable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, TypeVar
+from urllib.parse import urlsplit
+
+from utils.currencies_api import CBR_DAILY_URL, extract_currencies, _get_fallback_currencies
+
+CBR_MIRROR_URL = "https://cbr-xml-daily.ru/daily_json.js"
+CBR_ARCHIVE_URL = "https://www.cbr-xml-daily.ru/archive/{date:%Y/%m/%d}/daily_json.js"
+
+T = TypeVar('T')
+
+
+def _decode_chunked(body: bytes) -> bytes:
+    """Собрать тело ответа с Transfer-Encoding: chunked."""
+    result = bytearray()
+    pos = 0
+    while True:
+        line_end = body.index(b'\r\n', pos)
+        size = int(body[pos:line_end].split(b';', 1)[0], 16)
+        if size == 0:
+            return bytes(result)
+        start = line_end + 2
+        result += body[start:start + size]
+        pos = start + size + 2
+
+
+async def http_get(url: str, timeout: float = 10.0) -> Tuple[int, Dict[str, str], bytes]:
+    """
+    Выполнить GET-запрос через asyncio streams.
+
+    Args:
+        url: Адрес ресурса (http или https)
+        timeout: Общий таймаут запроса в секундах
+
+    Returns:
+        Кортеж (код ответа, заголовки в нижнем регистре, тело)
+
+    Raises:
+        ConnectionError: При ошибке сети или таймауте
+    """
+    parts = urlsplit(url)
+    is_https = parts.scheme == 'https'
+    host = parts.hostname
+    port = parts.port or (443 if is_https else 80)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+
+    async def _exchange() -> bytes:
+        reader, writer = await asyncio.open_connection(
+            host, port, ssl=ssl.create_default_context() if is_https else None
+        )
+        try:
+            request = (
+                f"GET {path} HTTP/1.1\r\n"
+                f"Host: {parts.netloc}\r\n"
+                "Accept: application/json\r\n"
+                "Connection: close\r\n"
+                "\r\n"
+            )
+            writer.write(request.encode('ascii'))
+            await writer.drain()
+            return await reader.read()
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+
+    try:
+        raw = await asyncio.wait_for(_exchange(), timeout)
+    except (OSError, asyncio.TimeoutError) as e:
+        raise ConnectionError(f"Ошибка соединения с {url}: {type(e).__name__}: {e}")
+
+    head, _, body = raw.partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        status = int(lines[0].split()[1])
+    except (IndexError, ValueError):
+        raise ConnectionError(f"Некорректный ответ от {url}")
+
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        body = _decode_chunked(body)
+
+    return status, headers, body
+
+
+class AsyncCurrencyClient:
+    """
+    Асинхронный клиент фида ЦБ.
+
+    Одновременные запросы одного и того же URL объединяются: все
+    вызывающие ждут одну и ту же загрузку.
+    """
+
+    def __init__(
+            self,
+            url: str = CBR_DAILY_URL,
+            mirror_urls: Sequence[str] = (CBR_MIRROR_URL,),
+            archive_url: str = CBR_ARCHIVE_URL,
+            timeout: float = 10.0,
+            hedge_delay: float = 1.0
+    ):
+        """
+        Args:
+            url: Основной URL ежедневного фида
+            mirror_urls: Резервные адреса того же фида
+            archive_url: Шаблон URL архива с подстановкой {date}
+            timeout: Таймаут одного запроса в секундах
+            hedge_delay: Через сколько секунд без ответа источника
+                запрашивается следующее зеркало
+        """
+        self.url = url
+        self.mirror_urls = list(mirror_urls)
+        self.archive_url = archive_url
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def _load_json(self, url: str) -> Dict:
+        """Загрузить и разобрать JSON без объединения запросов."""
+        status, _, body = await http_get(url, self.timeout)
+        if status != 200:
+            raise ConnectionError(f"HTTP {status} для {url}")
+        try:
+            return json.loads(body)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise ValueError(f"Ошибка парсинга JSON: {str(e)}")
+
+    def _forget(self, url: str, task: asyncio.Future) -> None:
+        """Убрать завершённую загрузку из списка выполняющихся."""
+        if self._inflight.get(url) is task:
+            del self._inflight[url]
+        # Забираем исключение, даже если ожидающих уже не осталось
+        if not task.cancelled():
+            task.exception()
+
+    async def fetch_json(self, url: str) -> Dict:
+        """
+        Загрузить JSON по URL, объединяя одновременные запросы.
+
+        Raises:
+            ConnectionError: При ошибке сети или HTTP-статусе, отличном от 200
+            ValueError: При некорректном JSON
+        """
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._load_json(url))
+            self._inflight[url] = task
+            task.add_done_callback(lambda done: self._forget(url, done))
+        # shield: отмена одного из ожидающих не отменяет общую загрузку
+        return await asyncio.shield(task)
+
+    async def fetch_daily(self) -> Dict:
+        """
+        Загрузить ежедневный фид с подстраховкой зеркалами.
+
+        Сначала запрашивается только основной адрес. Следующее зеркало
+        запрашивается, если источник ответил ошибкой или не ответил за
+        hedge_delay секунд; уже начатые запросы при этом продолжаются, и
+        используется первый успешный ответ. Пока основной источник
+        исправен, зеркала не нагружаются.
+
+        Returns:
+            JSON первого успешно ответившего источника
+
+        Raises:
+            ConnectionError: Если ни один источник не ответил
+        """
+        pending: Set[asyncio.Future] = set()
+        errors: List[str] = []
+        try:
+            for url in [self.url] + self.mirror_urls:
+                pending.add(asyncio.ensure_future(self.fetch_json(url)))
+                data = await self._first_daily(pending, errors, self.hedge_delay)
+                if data is not None:
+                    return data
+            # Все источники запрошены - ждём оставшиеся ответы
+            data = await self._first_daily(pending, errors, None)
+            if data is not None:
+                return data
+        finally:
+            for task in pending:
+                task.cancel()
+        raise ConnectionError("Все источники недоступны: " + "; ".join(errors))
+
+    @staticmethod
+    async def _first_daily(pending: Set[asyncio.Future], errors: List[str],
+                           timeout: Optional[float]) -> Optional[Dict]:
+        """
+        Дождаться фида от одного из запросов pending.
+
+        С timeout возвращает None после первой ошибки или по истечении
+        timeout (пора запросить следующий источник), без него - только
+        когда ответили все. Завершённые запросы убираются из pending.
+        """
+        while pending:
+            done, _ = await asyncio.wait(pending, timeout=timeout,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                return None
+            pending.difference_update(done)
+            for task in done:
+                try:
+                    data = task.result()
+                except (ConnectionError, ValueError) as e:
+                    errors.append(str(e))
+                    continue
+                if isinstance(data, dict) and 'Valute' in data:
+                    return data
+                errors.append("Ключ 'Valute' не найден в ответе")
+            if timeout is not None:
+                return None
+        return None
+
+    async def fetch_archive(self, dates: Iterable[date]) -> Dict[date, Dict]:
+        """
+        Загрузить архивные фиды за несколько дат параллельно.
+
+        Даты, за которые архива нет (выходные, праздники), пропускаются.
+
+        Returns:
+            Словарь {дата: JSON фида}
+        """
+        dates = list(dates)
+        results = await asyncio.gather(
+            *(self.fetch_json(self.archive_url.format(date=day)) for day in dates),
+            return_exceptions=True
+        )
+        return {
+            day: data for day, data in zip(dates, results)
+            if isinstance(data, dict)
+        }
+
+    async def get_currencies(self, currency_codes: List[str]) -> Dict[str, Dict]:
+        """
+        Асинхронный аналог utils.currencies_api.get_currencies.
+
+        Raises:
+            ConnectionError: Если ни один источник не ответил
+        """
+        data = await self.fetch_daily()
+        result = extract_currencies(data['Valute'], currency_codes)
+        if not result:
+            return _get_fallback_currencies(currency_codes)
+        return result
+
+
+# Общий клиент синхронных вызовов: одновременные вызовы из разных потоков
+# объединяются в одну загрузку
+default_client = AsyncCurrencyClient()
+
+# Цикл событий синхронных вызовов в фоновом потоке (pid - процесс, где он
+# запущен: после fork поток не копируется и цикл создаётся заново)
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Общий цикл событий, запущенный в фоновом потоке."""
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, name='currency-client-loop',
+                             daemon=True).start()
+        return _loop
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """
+    Выполнить корутину в общем цикле событий и дождаться результата.
+
+    Нельзя вызывать из работающего цикла событий (он будет заблокирован
+    до ответа) - там следует использовать await.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+def get_currencies_sync(
+        currency_codes: List[str],
+        client: Optional[AsyncCurrencyClient] = None
+) -> Dict[str, Dict]:
+    """
+    Синхронная обёртка над AsyncCurrencyClient.get_currencies.
+
+    Все синхронные вызовы выполняются в одном цикле событий и по
+    умолчанию через один клиент (default_client), поэтому одновременные
+    вызовы из разных потоков ждут одну загрузку фида.
+    """
+    client = client or default_client
+    return run_sync(client.get_currencies(currency_codes))
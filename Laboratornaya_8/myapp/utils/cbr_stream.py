@@ -0,0 +1,237 @@
+"""Потоковый разбор фида ЦБ с выборкой только нужных валют и полей."""
+
+import codecs
+import json
+import re
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import requests
+
+from utils.currencies_api import CBR_DAILY_URL
+
+# Поля записи Valute, которые можно извлечь, и имена колонок для них
+FIELD_COLUMNS = {
+    'Value': 'value',
+    'Nominal': 'nominal',
+    'NumCode': 'num_code',
+    'Name': 'name',
+}
+DEFAULT_FIELDS = tuple(FIELD_COLUMNS)
+
+_VALUTE_START = re.compile(r'"Valute"\s*:\s*\{')
+_DATE_FIELD = re.compile(r'"Date"\s*:\s*"([^"\\]*)"')
+# Плоский объект записи; строки внутри пропускаются целиком
+_OBJECT = re.compile(r'\{(?:[^"{}]|"(?:[^"\\]|\\.)*")*\}')
+# Сколько символов хвоста буфера хранить, если ключ разрезан границей фрагмента
+_KEY_TAIL = 64
+
+
+# Порог, после которого перебор записей быстрее поиска по альтернативам
+_ALTERNATION_LIMIT = 8
+_ANY_KEY = re.compile(r'"([^"\\]*)"\s*:\s*\{')
+
+
+def _key_pattern(currency_codes: Iterable[str]):
+    """Регулярное выражение для ключей нужных валют внутри Valute."""
+    codes = sorted(currency_codes)
+    if len(codes) > _ALTERNATION_LIMIT:
+        return _ANY_KEY
+    alternatives = '|'.join(re.escape(code) for code in codes)
+    return re.compile(r'"(' + alternatives + r')"\s*:\s*\{')
+
+
+def _find_object_end(buffer: str, start: int) -> int:
+    """
+    Найти конец плоского JSON-объекта, начинающегося с '{' в позиции start.
+
+    Returns:
+        Позицию за закрывающей скобкой или -1, если объект ещё не дочитан
+    """
+    end = buffer.find('}', start)
+    if end < 0:
+        return -1
+    segment = buffer[start:end]
+    if segment.count('"') % 2 == 0 and '\\' not in segment:
+        return end + 1
+    # Скобка внутри строки или экранированные символы - медленный путь
+    match = _OBJECT.match(buffer, start)
+    return match.end() if match else -1
+
+
+class CurrencyColumns:
+    """
+    Компактное колоночное представление выбранных валют.
+
+    Числовые поля хранятся в array, строковые - в списках. Колонки
+    полей, которые не запрашивались, равны None.
+    """
+
+    __slots__ = ('date', 'fields', 'char_code', 'value', 'nominal', 'num_code', 'name', '_index')
+
+    def __init__(self, fields: Sequence[str] = DEFAULT_FIELDS):
+        unknown = set(fields) - set(FIELD_COLUMNS)
+        if unknown:
+            raise ValueError(f"Неизвестные поля: {', '.join(sorted(unknown))}")
+
+        self.date: Optional[str] = None
+        self.fields = tuple(fields)
+        self.char_code: List[str] = []
+        self.value = array('d') if 'Value' in fields else None
+        self.nominal = array('l') if 'Nominal' in fields else None
+        self.num_code: Optional[List[str]] = [] if 'NumCode' in fields else None
+        self.name: Optional[List[str]] = [] if 'Name' in fields else None
+        self._index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.char_code)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._index
+
+    def append(self, code: str, valute: Dict) -> None:
+        """Добавить запись Valute, оставив только выбранные поля."""
+        self._index[code] = len(self.char_code)
+        self.char_code.append(code)
+        if self.value is not None:
+            self.value.append(float(valute.get('Value', 0)))
+        if self.nominal is not None:
+            self.nominal.append(int(valute.get('Nominal', 1)))
+        if self.num_code is not None:
+            self.num_code.append(str(valute.get('NumCode', '000')))
+        if self.name is not None:
+            self.name.append(valute.get('Name', code))
+
+    def get(self, code: str) -> Optional[Dict]:
+        """Получить валюту в формате utils.currencies_api.get_currencies."""
+        i = self._index.get(code)
+        if i is None:
+            return None
+        row = {'char_code': code}
+        for field in self.fields:
+            column = FIELD_COLUMNS[field]
+            row[column] = getattr(self, column)[i]
+        return row
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """Преобразовать все строки в словарь {код: данные}."""
+        return {code: self.get(code) for code in self.char_code}
+
+
+def parse_valute_stream(
+        chunks: Iterable[bytes],
+        currency_codes: Iterable[str],
+        fields: Sequence[str] = DEFAULT_FIELDS
+) -> CurrencyColumns:
+    """
+    Разобрать фид ЦБ по частям, извлекая только нужные валюты.
+
+    Внутри Valute ищутся только ключи запрошенных валют, записи других
+    валют не разбираются вовсе. Чтение прекращается, как только найдены
+    все запрошенные коды. Поддерживается формат фида ЦБ: записи Valute -
+    плоские объекты.
+
+    Args:
+        chunks: Последовательность байтовых фрагментов тела ответа
+        currency_codes: Символьные коды нужных валют
+        fields: Извлекаемые поля записи ('Value', 'Nominal', 'NumCode', 'Name')
+
+    Returns:
+        CurrencyColumns с найденными валютами (в порядке следования в фиде)
+
+    Raises:
+        KeyError: Если в фиде нет ключа 'Valute'
+        ValueError: При некорректном JSON
+    """
+    wanted = set(currency_codes)
+    columns = CurrencyColumns(fields)
+    if not wanted:
+        return columns
+
+    key_re = _key_pattern(wanted)
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    in_valute = False
+    pending = False
+
+    for chunk in chunks:
+        buffer = buffer[pos:] + decoder.decode(chunk)
+        pos = 0
+
+        if not in_valute:
+            match = _VALUTE_START.search(buffer)
+            if match is None:
+                # Заголовок фида до Valute короткий - копим его целиком
+                continue
+            date_match = _DATE_FIELD.search(buffer, 0, match.start())
+            if date_match:
+                columns.date = date_match.group(1)
+            in_valute = True
+            pos = match.end()
+
+        # Ищем ключи нужных валют, остальные записи не разбираются
+        while True:
+            match = key_re.search(buffer, pos)
+            if match is None:
+                pending = False
+                pos = max(pos, len(buffer) - _KEY_TAIL)
+                break
+            start = match.end() - 1
+            end = _find_object_end(buffer, start)
+            if end < 0:
+                # Запись не дочитана - продолжим с её начала
+                pending = True
+                pos = match.start()
+                break
+            pos = end
+            code = match.group(1)
+            if code in wanted and code not in columns:
+                try:
+                    columns.append(code, json.loads(buffer[start:end]))
+                except (json.JSONDecodeError, TypeError, ValueError) as e:
+                    raise ValueError(f"Ошибка парсинга записи '{code}': {str(e)}")
+                if len(columns) == len(wanted):
+                    return columns
+
+    if not in_valute:
+        raise KeyError('Valute')
+    if pending:
+        raise ValueError("Фид обрывается внутри таблицы Valute")
+    return columns
+
+
+def parse_valute(
+        payload: bytes,
+        currency_codes: Iterable[str],
+        fields: Sequence[str] = DEFAULT_FIELDS
+) -> CurrencyColumns:
+    """Разобрать фид, уже загруженный в память целиком."""
+    return parse_valute_stream((payload,), currency_codes, fields)
+
+
+def fetch_currency_columns(
+        currency_codes: Iterable[str],
+        url: str = CBR_DAILY_URL,
+        fields: Sequence[str] = DEFAULT_FIELDS,
+        chunk_size: int = 4096,
+        timeout: float = 10
+) -> CurrencyColumns:
+    """
+    Загрузить фид потоково и извлечь нужные валюты.
+
+    Соединение закрывается сразу после того, как найдены все коды,
+    остаток ответа не читается.
+
+    Raises:
+        ConnectionError: При ошибке сети
+        ValueError: При некорректных данных
+    """
+    try:
+        with requests.get(url, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            return parse_valute_stream(response.iter_content(chunk_size), currency_codes, fields)
+    except requests.RequestException as e:
+        raise ConnectionError(f"Ошибка соединения: {str(e)}")
+    except KeyError as e:
+        raise ValueError(f"Ошибка парсинга JSON: ключ {str(e)} не найден")
@@ -0,0 +1,177 @@
+"""Автоматический выключатель (circuit breaker) для внешних источников данных."""
+
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, Type
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(ConnectionError):
+    """Вызов отклонён: выключатель разомкнут."""
+
+
+class CircuitBreaker:
+    """
+    Выключатель с состояниями closed / open / half_open.
+
+    После failure_threshold ошибок подряд выключатель размыкается, и
+    вызовы сразу завершаются CircuitOpenError, не дожидаясь таймаута
+    источника. Через reset_timeout секунд выполняется пробный вызов
+    (в фоне, если задан probe или probe_last_call, иначе - первым
+    пришедшим вызовом): успех замыкает цепь, ошибка снова размыкает её.
+    """
+
+    def __init__(
+            self,
+            failure_threshold: int = 3,
+            reset_timeout: float = 30.0,
+            probe: Optional[Callable[[], object]] = None,
+            expected_exceptions: Tuple[Type[BaseException], ...] = (Exception,),
+            name: str = 'circuit',
+            probe_last_call: bool = False
+    ):
+        """
+        Args:
+            failure_threshold: Число ошибок подряд до размыкания
+            reset_timeout: Пауза перед пробным вызовом в секундах
+            probe: Функция фоновой проверки источника (None - без фоновой проверки)
+            expected_exceptions: Исключения, которые считаются отказом источника
+            name: Имя выключателя для метрик
+            probe_last_call: Проверять источник в фоне, повторяя последний
+                неудачный вызов с теми же аргументами (если probe не задан)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe = probe
+        self.probe_last_call = probe_last_call
+        self.expected_exceptions = expected_exceptions
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_timer: Optional[threading.Timer] = None
+        self._last_failed_call: Optional[Tuple[Callable, tuple, dict]] = None
+
+        # Метрики
+        self.transitions: Dict[str, int] = {}
+        self.short_circuited = 0
+        self.calls = 0
+
+    @property
+    def state(self) -> str:
+        """Текущее состояние выключателя."""
+        with self._lock:
+            return self._state
+
+    def _transition(self, new_state: str) -> None:
+        """Сменить состояние (вызывается под блокировкой)."""
+        if new_state == self._state:
+            return
+        key = f"{self._state}->{new_state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        self._state = new_state
+        if new_state == OPEN:
+            self._opened_at = time.monotonic()
+            self._schedule_probe()
+        elif new_state == CLOSED:
+            self._failures = 0
+
+    @property
+    def _background_probe(self) -> bool:
+        return self.probe is not None or self.probe_last_call
+
+    def _schedule_probe(self) -> None:
+        """Запланировать фоновую пробу источника."""
+        if not self._background_probe:
+            return
+        self._probe_timer = threading.Timer(self.reset_timeout, self._run_probe)
+        self._probe_timer.daemon = True
+        self._probe_timer.start()
+
+    def _run_probe(self) -> None:
+        """Фоновая проба в полуоткрытом состоянии."""
+        with self._lock:
+            if self._state != OPEN:
+                return
+            self._transition(HALF_OPEN)
+            probe = self.probe
+            if probe is None:
+                func, args, kwargs = self._last_failed_call
+                probe = lambda: func(*args, **kwargs)
+        try:
+            probe()
+        except Exception:
+            # Любая ошибка пробы снова размыкает цепь и планирует следующую пробу
+            with self._lock:
+                self._transition(OPEN)
+            return
+        with self._lock:
+            self._transition(CLOSED)
+
+    def call(self, func: Callable, *args, **kwargs):
+        """
+        Вызвать func через выключатель.
+
+        Raises:
+            CircuitOpenError: Если выключатель разомкнут
+            Исключения func пробрасываются без изменений
+        """
+        with self._lock:
+            self.calls += 1
+            if self._state == OPEN:
+                waited = time.monotonic() - self._opened_at
+                if not self._background_probe and waited >= self.reset_timeout:
+                    # Этот вызов становится пробным
+                    self._transition(HALF_OPEN)
+                else:
+                    self.short_circuited += 1
+                    raise CircuitOpenError(f"Источник '{self.name}' временно недоступен")
+            elif self._state == HALF_OPEN:
+                self.short_circuited += 1
+                raise CircuitOpenError(f"Источник '{self.name}' проверяется")
+
+        try:
+            result = func(*args, **kwargs)
+        except self.expected_exceptions:
+            with self._lock:
+                self._failures += 1
+                self._last_failed_call = (func, args, kwargs)
+                if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                    self._transition(OPEN)
+            raise
+        except BaseException:
+            # Прочие исключения не считаются отказом источника, но пробный
+            # вызов не должен оставить выключатель полуоткрытым навсегда
+            with self._lock:
+                if self._state == HALF_OPEN:
+                    self._transition(OPEN)
+            raise
+
+        with self._lock:
+            self._failures = 0
+            self._transition(CLOSED)
+        return result
+
+    def reset(self) -> None:
+        """Принудительно замкнуть цепь и отменить фоновую пробу."""
+        with self._lock:
+            if self._probe_timer is not None:
+                self._probe_timer.cancel()
+            self._transition(CLOSED)
+
+    def stats(self) -> Dict:
+        """Метрики выключателя."""
+        with self._lock:
+            return {
+                'name': self.name,
+                'state': self._state,
+                'failures': self._failures,
+                'calls': self.calls,
+                'short_circuited': self.short_circuited,
+                'transitions': dict(self.transitions)
+            }
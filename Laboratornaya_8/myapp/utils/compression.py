@@ -0,0 +1,162 @@
+"""Сжатие ответов gzip/deflate по заголовку Accept-Encoding."""
+
+import gzip
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Dict, Optional, Tuple
+
+from utils.http_messages import Response
+
+SUPPORTED_ENCODINGS = ('gzip', 'deflate')
+
+# Типы содержимого, которые имеет смысл сжимать
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """
+    Разобрать Accept-Encoding в словарь {кодировка: q}.
+
+    Args:
+        header: Значение заголовка, например 'gzip;q=1.0, deflate;q=0.5'
+    """
+    result: Dict[str, float] = {}
+    if not header:
+        return result
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        result[name] = q
+    return result
+
+
+def choose_encoding(header: Optional[str]) -> Optional[str]:
+    """
+    Выбрать кодировку сжатия, которую принимает клиент.
+
+    Returns:
+        'gzip', 'deflate' или None (отправлять без сжатия)
+    """
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, level: int = 6) -> bytes:
+    """
+    Сжать тело ответа.
+
+    Raises:
+        ValueError: При неподдерживаемой кодировке
+    """
+    if encoding == 'gzip':
+        # mtime=0 - одинаковый результат для одинаковых страниц
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == 'deflate':
+        # "deflate" в HTTP - это поток zlib (RFC 1950)
+        return zlib.compress(body, level)
+    raise ValueError(f"Неподдерживаемая кодировка: {encoding}")
+
+
+def is_compressible(content_type: str) -> bool:
+    """Имеет ли смысл сжимать содержимое такого типа."""
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionCache:
+    """
+    LRU-кэш сжатых тел ответов.
+
+    Ключ - хэш несжатого тела и кодировка, поэтому неизменившаяся
+    страница сжимается один раз, а изменившаяся получает новый ключ.
+    """
+
+    def __init__(self, max_entries: int = 128, level: int = 6):
+        """
+        Args:
+            max_entries: Максимальное число сжатых тел в кэше
+            level: Уровень сжатия
+        """
+        self.max_entries = max_entries
+        self.level = level
+        self._entries: 'OrderedDict[Tuple[bytes, str], bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, body: bytes, encoding: str) -> bytes:
+        """Сжатое тело из кэша или сжать и запомнить."""
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+
+        compressed = compress(body, encoding, self.level)
+        with self._lock:
+            self._entries[key] = compressed
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compressed
+
+    def clear(self) -> None:
+        """Очистить кэш."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Статистика кэша."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+def compress_response(response: Response, accept_encoding: Optional[str],
+                      cache: Optional[CompressionCache] = None, min_size: int = 1024) -> Response:
+    """
+    Сжать ответ, если клиент это поддерживает и тело достаточно большое.
+
+    Args:
+        response: Исходный ответ
+        accept_encoding: Заголовок Accept-Encoding запроса
+        cache: Кэш сжатых тел (None - сжимать каждый раз)
+        min_size: Тела меньше этого размера отправляются без сжатия
+
+    Returns:
+        Новый Response (исходный не изменяется)
+    """
+    if (not is_compressible(response.content_type) or 'Content-Encoding' in response.headers
+            or response.chunks is not None or response.file is not None
+            or 'Content-Range' in response.headers):
+        return response
+
+    headers = dict(response.headers)
+    headers['Vary'] = 'Accept-Encoding'
+    encoding = choose_encoding(accept_encoding) if len(response.body) >= min_size else None
+    if encoding is None:
+        return replace(response, headers=headers)
+
+    if cache is not None:
+        body = cache.get(response.body, encoding)
+    else:
+        body = compress(response.body, encoding)
+    headers['Content-Encoding'] = encoding
+    return replace(response, body=body, headers=headers)
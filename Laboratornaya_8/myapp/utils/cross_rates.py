@@ -0,0 +1,143 @@
+"""Матрица кросс-курсов для всех пар валют фида ЦБ."""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from models import Currency
+from utils.currencies_api import CBR_DAILY_URL, rates_cache
+from utils.rates_cache import RatesCache
+
+BASE_CURRENCY = 'RUB'
+
+Codes = Union[str, Sequence[str], np.ndarray]
+
+
+class CrossRateMatrix:
+    """
+    Полная матрица N x N кросс-курсов, построенная за один векторный шаг.
+
+    matrix[i, j] - сколько единиц валюты j стоит одна единица валюты i.
+    Рубль включён как валюта с курсом 1.
+    """
+
+    def __init__(self, currency_codes: Sequence[str], per_unit: Sequence[float],
+                 timestamp: Optional[str] = None):
+        """
+        Args:
+            currency_codes: Символьные коды валют
+            per_unit: Курс одной единицы каждой валюты в рублях
+            timestamp: Метка времени фида, по которому построена матрица
+        """
+        codes = [BASE_CURRENCY] + [c for c in currency_codes if c != BASE_CURRENCY]
+        per_unit_by_code = dict(zip(currency_codes, per_unit))
+        per_unit_by_code[BASE_CURRENCY] = 1.0
+
+        self.codes: List[str] = codes
+        self.timestamp = timestamp
+        self.per_unit = np.array([per_unit_by_code[c] for c in codes], dtype=float)
+        if not np.all(self.per_unit > 0):
+            raise ValueError("Курсы должны быть положительными числами")
+        self._index: Dict[str, int] = {code: i for i, code in enumerate(codes)}
+        self.matrix = self.per_unit[:, None] / self.per_unit[None, :]
+
+    @classmethod
+    def from_valute(cls, valute_table: Dict[str, Dict], timestamp: Optional[str] = None) -> 'CrossRateMatrix':
+        """Построить матрицу по таблице Valute фида ЦБ."""
+        codes = list(valute_table)
+        per_unit = [float(v['Value']) / int(v.get('Nominal', 1)) for v in valute_table.values()]
+        return cls(codes, per_unit, timestamp)
+
+    @classmethod
+    def from_currencies(cls, currencies: Iterable[Currency], timestamp: Optional[str] = None) -> 'CrossRateMatrix':
+        """Построить матрицу по списку моделей Currency."""
+        currencies = list(currencies)
+        return cls([c.char_code for c in currencies], [c.value_per_unit for c in currencies], timestamp)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._index
+
+    def _position(self, code: str) -> int:
+        try:
+            return self._index[code]
+        except KeyError:
+            raise ValueError(f"Неизвестный код валюты: {code}")
+
+    def _positions(self, codes: Codes) -> np.ndarray:
+        """Индексы строк для массива кодов (поиск в словаре только по уникальным)."""
+        if isinstance(codes, str):
+            return np.array(self._position(codes))
+        unique, inverse = np.unique(np.asarray(codes, dtype=str), return_inverse=True)
+        positions = np.array([self._position(code) for code in unique], dtype=np.intp)
+        return positions[inverse].reshape(np.shape(codes))
+
+    def rate(self, base: str, quote: str) -> float:
+        """Сколько единиц quote стоит одна единица base (O(1))."""
+        return float(self.matrix[self._position(base), self._position(quote)])
+
+    def convert(self, amounts, from_codes: Codes, to_codes: Codes) -> np.ndarray:
+        """
+        Пересчитать суммы из одних валют в другие.
+
+        Args:
+            amounts: Сумма или массив сумм
+            from_codes: Код или массив кодов исходных валют
+            to_codes: Код или массив кодов целевых валют
+
+        Returns:
+            Массив пересчитанных сумм (аргументы транслируются по правилам NumPy)
+        """
+        from_idx = self._positions(from_codes)
+        to_idx = self._positions(to_codes)
+        return np.asarray(amounts, dtype=float) * self.matrix[from_idx, to_idx]
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """Матрица в виде вложенного словаря {base: {quote: курс}}."""
+        return {
+            base: dict(zip(self.codes, self.matrix[i].tolist()))
+            for i, base in enumerate(self.codes)
+        }
+
+
+class CrossRateEngine:
+    """
+    Источник матрицы кросс-курсов поверх кэша фида.
+
+    Матрица пересобирается, только когда меняется метка времени фида.
+    """
+
+    def __init__(self, cache: RatesCache = rates_cache, url: str = CBR_DAILY_URL):
+        self.cache = cache
+        self.url = url
+        self._lock = threading.Lock()
+        self._matrix: Optional[CrossRateMatrix] = None
+        self._valute: Optional[Dict] = None
+
+    def matrix(self) -> CrossRateMatrix:
+        """Получить актуальную матрицу кросс-курсов."""
+        valute = self.cache.get(self.url)
+        # Таблица и метка времени берутся из одной записи: обновление фида
+        # между двумя чтениями связало бы новую метку со старой таблицей
+        entry = self.cache.peek(self.url)
+        timestamp = None
+        if entry is not None:
+            valute, timestamp = entry.valute, entry.timestamp
+
+        with self._lock:
+            fresh = self._matrix is not None and (
+                valute is self._valute
+                or (timestamp is not None and timestamp == self._matrix.timestamp)
+            )
+            if not fresh:
+                self._matrix = CrossRateMatrix.from_valute(valute, timestamp)
+            self._valute = valute
+            return self._matrix
+
+    def rate(self, base: str, quote: str) -> float:
+        """Кросс-курс по актуальной матрице."""
+        return self.matrix().rate(base, quote)
+
+    def convert(self, amounts, from_codes: Codes, to_codes: Codes) -> np.ndarray:
+        """Пакетный пересчёт сумм по актуальной матрице."""
+        return self.matrix().convert(amounts, from_codes, to_codes)
@@ -1,16 +1,53 @@
 """Модуль для работы с API курсов валют."""
 
 import json
+import os
+from datetime import date, timedelta
 from typing import Dict, List, Optional
 import requests
 
+from utils.rates_cache import RatesCache, RatesSnapshot
+from utils.history_store import HistoryStore
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
 
-def get_currencies(currency_codes: List[str]) -> Dict[str, Dict]:
+CBR_DAILY_URL = "https://www.cbr-xml-daily.ru/daily_json.js"
+SNAPSHOT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'last_rates.json'
+)
+
+# Ошибки, которые считаются отказом источника
+_SOURCE_ERRORS = (requests.RequestException, ValueError, KeyError, TypeError)
+
+# Общий кэш таблицы Valute (фид обновляется не чаще раза в сутки)
+rates_cache = RatesCache()
+
+# Последние успешно полученные курсы на диске
+rates_snapshot = RatesSnapshot(SNAPSHOT_PATH)
+
+# Выключатель вокруг загрузки фида; в разомкнутом состоянии источник
+# проверяется в фоне повтором последней неудачной загрузки (с тем же URL),
+# запросы сразу получают резервные данные
+currency_breaker = CircuitBreaker(
+    failure_threshold=3,
+    reset_timeout=30.0,
+    expected_exceptions=_SOURCE_ERRORS,
+    name='cbr-xml-daily',
+    probe_last_call=True
+)
+
+# Хранилище истории курсов (см. get_history_store)
+_history_store: Optional[HistoryStore] = None
+
+
+def get_currencies(currency_codes: List[str], url: str = CBR_DAILY_URL) -> Dict[str, Dict]:
     """
     Получить курсы валют по их символьным кодам.
 
+    Повторные вызовы обслуживаются из rates_cache без загрузки фида.
+
     Args:
         currency_codes: Список символьных кодов валют (например, ['USD', 'EUR'])
+        url: URL JSON-фида ЦБ
 
     Returns:
         Словарь с данными о валютах
@@ -20,25 +57,9 @@ def get_currencies(currency_codes: List[str]) -> Dict[str, Dict]:
         ValueError: При некорректных данных
     """
     try:
-        # Используем JSON API вместо XML
-        url = "https://www.cbr-xml-daily.ru/daily_json.js"
-
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-
-        data = response.json()
-
-        result = {}
-        for code in currency_codes:
-            if code in data['Valute']:
-                valute = data['Valute'][code]
-                result[code] = {
-                    'num_code': str(valute.get('NumCode', '000')),
-                    'char_code': code,
-                    'name': valute.get('Name', code),
-                    'value': valute.get('Value', 0),
-                    'nominal': valute.get('Nominal', 1)
-                }
+        valute_table = rates_cache.get(url, timeout=10)
+
+        result = extract_currencies(valute_table, currency_codes)
 
         if not result:
             # Если API не вернул данные, используем заглушку
@@ -54,6 +75,75 @@ def get_currencies(currency_codes: List[str]) -> Dict[str, Dict]:
         raise RuntimeError(f"Неизвестная ошибка: {str(e)}")
 
 
+def get_currencies_guarded(
+        currency_codes: List[str],
+        url: str = CBR_DAILY_URL,
+        static_fallback: bool = True
+) -> Dict[str, Dict]:
+    """
+    Получить курсы валют, не блокируясь на недоступном источнике.
+
+    Данные берутся по уровням: свежий фид (через currency_breaker) ->
+    устаревшая запись rates_cache -> снимок на диске -> статическая
+    заглушка. Пока выключатель разомкнут, сеть не используется.
+
+    Args:
+        currency_codes: Список символьных кодов валют
+        url: URL JSON-фида ЦБ
+        static_fallback: Возвращать статическую заглушку, если других данных нет
+
+    Returns:
+        Словарь с данными о валютах
+
+    Raises:
+        ConnectionError: Если данных нет, а static_fallback=False
+    """
+    try:
+        valute_table = currency_breaker.call(rates_cache.get, url, timeout=10, allow_stale=False)
+    except (CircuitOpenError,) + _SOURCE_ERRORS:
+        entry = rates_cache.peek(url)
+        valute_table = entry.valute if entry else rates_snapshot.load()
+    else:
+        entry = rates_cache.peek(url)
+        try:
+            rates_snapshot.save(valute_table, entry.timestamp if entry else None)
+        except OSError as e:
+            # Снимок - только резерв: ошибка диска не отменяет полученные курсы
+            print(f"Не удалось сохранить снимок курсов: {e}")
+
+    result = extract_currencies(valute_table, currency_codes) if valute_table else {}
+    if not result:
+        if not static_fallback:
+            raise ConnectionError("Курсы недоступны: нет ни свежих, ни сохранённых данных")
+        return _get_fallback_currencies(currency_codes)
+    return result
+
+
+def extract_currencies(valute_table: Dict[str, Dict], currency_codes: List[str]) -> Dict[str, Dict]:
+    """
+    Выбрать нужные валюты из таблицы Valute фида ЦБ.
+
+    Args:
+        valute_table: Содержимое ключа 'Valute' из JSON фида
+        currency_codes: Список символьных кодов валют
+
+    Returns:
+        Словарь с данными о найденных валютах
+    """
+    result = {}
+    for code in currency_codes:
+        if code in valute_table:
+            valute = valute_table[code]
+            result[code] = {
+                'num_code': str(valute.get('NumCode', '000')),
+                'char_code': code,
+                'name': valute.get('Name', code),
+                'value': valute.get('Value', 0),
+                'nominal': valute.get('Nominal', 1)
+            }
+    return result
+
+
 def _get_fallback_currencies(currency_codes: List[str]) -> Dict[str, Dict]:
     """Заглушка для курсов валют, если API не работает."""
     fallback_data = {
@@ -78,31 +168,44 @@ def _get_fallback_currencies(currency_codes: List[str]) -> Dict[str, Dict]:
     return result
 
 
-def get_currency_history(char_code: str, days: int = 90) -> List[Dict]:
+def get_history_store() -> HistoryStore:
+    """Получить общее хранилище истории курсов (создаётся при первом вызове)."""
+    global _history_store
+    if _history_store is None:
+        _history_store = HistoryStore()
+    return _history_store
+
+
+def get_currency_history(
+        char_code: str,
+        days: int = 90,
+        store: Optional[HistoryStore] = None
+) -> List[Dict]:
     """
-    Получить исторические данные по валюте.
+    Получить исторические данные по валюте из хранилища курсов.
+
+    Хранилище заполняется командой python -m utils.history_store.
+    На каждый календарный день возвращается курс, действовавший в этот
+    день; дни раньше первой сохранённой записи пропускаются.
 
     Args:
         char_code: Символьный код валюты
         days: Количество дней для анализа
+        store: Хранилище курсов (по умолчанию - общее)
 
     Returns:
-        Список исторических значений
+        Список исторических значений, начиная с сегодняшнего дня
     """
-    import random
-    from datetime import datetime, timedelta
+    store = store or get_history_store()
+    end = date.today()
+    start = end - timedelta(days=days - 1)
 
     history = []
-    current_date = datetime.now()
-    base_value = 90.0 if char_code == 'USD' else 100.0
-
-    for i in range(days):
-        date = current_date - timedelta(days=i)
-        # Случайные изменения для демонстрации
-        change = random.uniform(-0.1, 0.1) * (days - i) / days
+    for day, rate in reversed(store.daily_history(char_code, start, end)):
         history.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'value': round(base_value * (1 + change), 4)
+            'date': day.isoformat(),
+            'value': rate['value'],
+            'nominal': rate['nominal']
         })
 
     return history
\ No newline at end of file
@@ -0,0 +1,277 @@
+"""Хранилище исторических курсов валют на SQLite."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'rates_history.sqlite3'
+)
+
+# Первичный ключ (char_code, date) - это B-дерево: поиск курса на дату
+# и выборка диапазона выполняются за O(log n)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rates (
+    char_code TEXT NOT NULL,
+    date TEXT NOT NULL,
+    value REAL NOT NULL,
+    nominal INTEGER NOT NULL,
+    PRIMARY KEY (char_code, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rates_by_date ON rates (date);
+"""
+
+
+def feed_date(data: Dict) -> date:
+    """Получить дату курсов из поля Date фида ЦБ."""
+    return datetime.fromisoformat(data['Date']).date()
+
+
+class HistoryStore:
+    """
+    Временной ряд курсов: одна строка на пару (дата, валюта).
+
+    Даты хранятся в ISO-формате, поэтому строковое сравнение совпадает
+    с хронологическим.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        """
+        Args:
+            path: Путь к файлу базы или ':memory:'
+        """
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Закрыть соединение с базой."""
+        with self._lock:
+            self._conn.close()
+
+    def append_day(self, day: date, valute_table: Dict[str, Dict]) -> int:
+        """
+        Добавить (или заменить) курсы всех валют за день.
+
+        Args:
+            day: Дата курсов
+            valute_table: Содержимое ключа 'Valute' фида ЦБ
+
+        Returns:
+            Количество записанных строк
+        """
+        rows = [
+            (code, day.isoformat(), float(valute['Value']), int(valute.get('Nominal', 1)))
+            for code, valute in valute_table.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rates (char_code, date, value, nominal) VALUES (?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def get_range(self, char_code: str, start: date, end: date) -> List[Dict]:
+        """
+        Получить курсы валюты за период (включительно), по возрастанию даты.
+
+        Returns:
+            Список словарей {'date', 'value', 'nominal'}
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT date, value, nominal FROM rates "
+                "WHERE char_code = ? AND date BETWEEN ? AND ? ORDER BY date",
+                (char_code, start.isoformat(), end.isoformat())
+            )
+            rows = cursor.fetchall()
+        return [{'date': d, 'value': v, 'nominal': n} for d, v, n in rows]
+
+    def iter_range(self, char_code: str, start: date, end: date,
+                   batch_size: int = 1000) -> Iterator[List[Tuple[str, float, int]]]:
+        """
+        Курсы валюты за период пачками строк (date, value, nominal).
+
+        В отличие от get_range, в памяти одновременно находится не больше
+        batch_size строк. Каждая пачка - отдельный запрос от последней
+        выданной даты, поэтому между пачками на общем соединении не остаётся
+        открытого курсора, а блокировка берётся только на чтение пачки.
+        """
+        after, last = None, end.isoformat()
+        while True:
+            with self._lock:
+                if after is None:
+                    rows = self._conn.execute(
+                        "SELECT date, value, nominal FROM rates "
+                        "WHERE char_code = ? AND date BETWEEN ? AND ? ORDER BY date LIMIT ?",
+                        (char_code, start.isoformat(), last, batch_size)
+                    ).fetchall()
+                else:
+                    rows = self._conn.execute(
+                        "SELECT date, value, nominal FROM rates "
+                        "WHERE char_code = ? AND date > ? AND date <= ? ORDER BY date LIMIT ?",
+                        (char_code, after, last, batch_size)
+                    ).fetchall()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < batch_size:
+                return
+            after = rows[-1][0]
+
+    def rate_on(self, char_code: str, day: date) -> Optional[Dict]:
+        """
+        Получить курс, действовавший на дату.
+
+        ЦБ не публикует курсы на выходные, поэтому берётся последняя
+        запись не позже указанной даты.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT date, value, nominal FROM rates "
+                "WHERE char_code = ? AND date <= ? ORDER BY date DESC LIMIT 1",
+                (char_code, day.isoformat())
+            ).fetchone()
+        if row is None:
+            return None
+        return {'date': row[0], 'value': row[1], 'nominal': row[2]}
+
+    def range_digest(self, char_code: str, start: date, end: date) -> str:
+        """
+        Хеш строк (date, value, nominal) периода для ETag.
+
+        Меняется при дозагрузке или исправлении любого дня внутри периода,
+        в том числе когда курсы двух дней поменялись местами и суммы
+        по периоду остались прежними.
+        """
+        digest = hashlib.sha1()
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT date, value, nominal FROM rates "
+                "WHERE char_code = ? AND date BETWEEN ? AND ? ORDER BY date",
+                (char_code, start.isoformat(), end.isoformat())
+            )
+            for day, value, nominal in cursor:
+                digest.update(f"{day}|{value!r}|{nominal};".encode())
+        return digest.hexdigest()
+
+    def last_date(self) -> Optional[date]:
+        """Последняя дата, за которую есть данные."""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(date) FROM rates").fetchone()
+        return date.fromisoformat(row[0]) if row[0] else None
+
+    def codes(self) -> List[str]:
+        """Список валют, по которым есть данные."""
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT char_code FROM rates ORDER BY char_code").fetchall()
+        return [code for (code,) in rows]
+
+    def daily_history(self, char_code: str, start: date, end: date) -> List[Tuple[date, Dict]]:
+        """
+        Курс на каждый календарный день периода (с переносом на выходные).
+
+        Дни до первой известной записи пропускаются.
+        """
+        rows = self.get_range(char_code, start, end)
+        current = self.rate_on(char_code, start)
+        index = 0
+        result = []
+        day = start
+        while day <= end:
+            iso_day = day.isoformat()
+            while index < len(rows) and rows[index]['date'] <= iso_day:
+                current = rows[index]
+                index += 1
+            if current is not None:
+                result.append((day, current))
+            day += timedelta(days=1)
+        return result
+
+
+def _date_range(start: date, end: date) -> Iterable[date]:
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def backfill(
+        store: HistoryStore,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        client=None,
+        batch_size: int = 31
+) -> int:
+    """
+    Заполнить хранилище из архива ЦБ.
+
+    По умолчанию загрузка продолжается со дня, следующего за последней
+    сохранённой датой. Даты без архива (выходные) пропускаются.
+
+    Args:
+        store: Хранилище курсов
+        start: Первая дата (по умолчанию - после последней сохранённой, иначе 90 дней назад)
+        end: Последняя дата (по умолчанию - сегодня)
+        client: AsyncCurrencyClient или объект с методом fetch_archive(dates)
+        batch_size: Сколько дат загружать параллельно
+
+    Returns:
+        Количество загруженных дней
+    """
+    from utils.async_currencies_api import default_client, run_sync
+    client = client or default_client
+
+    end = end or date.today()
+    if start is None:
+        last = store.last_date()
+        start = last + timedelta(days=1) if last else end - timedelta(days=89)
+
+    days = list(_date_range(start, end))
+    loaded = 0
+    for i in range(0, len(days), batch_size):
+        archive = run_sync(client.fetch_archive(days[i:i + batch_size]))
+        for day, data in sorted(archive.items()):
+            if 'Valute' not in data:
+                continue
+            store.append_day(feed_date(data) if 'Date' in data else day, data['Valute'])
+            loaded += 1
+    return loaded
+
+
+def append_latest(store: HistoryStore, client=None) -> date:
+    """
+    Дописать в хранилище текущий ежедневный фид.
+
+    Returns:
+        Дату записанных курсов
+    """
+    from utils.async_currencies_api import default_client, run_sync
+    client = client or default_client
+
+    data = run_sync(client.fetch_daily())
+    day = feed_date(data)
+    store.append_day(day, data['Valute'])
+    return day
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Загрузка истории курсов ЦБ")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="Путь к базе SQLite")
+    parser.add_argument('--days', type=int, default=None,
+                        help="Сколько последних дней загрузить (по умолчанию - дозагрузка)")
+    args = parser.parse_args()
+
+    history = HistoryStore(args.db)
+    first_day = date.today() - timedelta(days=args.days - 1) if args.days else None
+    count = backfill(history, start=first_day)
+    print(f"Загружено дней: {count}, последняя дата: {history.last_date()}")
+    history.close()
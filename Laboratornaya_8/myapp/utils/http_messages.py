@@ -0,0 +1,130 @@
+"""Запрос и ответ, не зависящие от способа обслуживания HTTP."""
+
+import json
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+@dataclass
+class Request:
+    """
+    Разобранный HTTP-запрос.
+
+    Заголовки хранятся с именами в нижнем регистре.
+    """
+
+    method: str
+    path: str
+    query: Dict[str, List[str]] = field(default_factory=dict)
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b''
+    version: str = 'HTTP/1.1'
+
+    @classmethod
+    def from_target(cls, method: str, target: str, headers: Mapping[str, str] = (),
+                    body: bytes = b'', version: str = 'HTTP/1.1') -> 'Request':
+        """
+        Построить запрос по строке запроса.
+
+        Args:
+            method: HTTP-метод
+            target: Путь вместе со строкой параметров (например, '/user?id=1')
+            headers: Заголовки запроса
+            body: Тело запроса
+            version: Версия протокола из строки запроса
+        """
+        parsed = urlparse(target)
+        header_items = headers.items() if hasattr(headers, 'items') else headers
+        return cls(
+            method=method.upper(),
+            path=parsed.path,
+            query=parse_qs(parsed.query),
+            headers={name.lower(): value for name, value in header_items},
+            body=body,
+            version=version
+        )
+
+    @property
+    def form(self) -> Dict[str, List[str]]:
+        """Поля формы application/x-www-form-urlencoded из тела запроса."""
+        return parse_qs(self.body.decode('utf-8'))
+
+
+@dataclass
+class FileBody:
+    """Участок файла, отправляемый как тело ответа без чтения в память."""
+
+    path: str
+    offset: int
+    length: int
+
+    def read_chunks(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Содержимое участка по частям (для транспортов без sendfile)."""
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            remaining = self.length
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+
+
+@dataclass
+class Response:
+    """
+    HTTP-ответ с уже закодированным телом.
+
+    Если задан chunks, тело отправляется по частям по мере их получения
+    (Transfer-Encoding: chunked), а body не используется. Если задан
+    file, телом служит участок файла: транспорт отправляет его через
+    sendfile, без копирования в память процесса.
+    """
+
+    status: int = 200
+    body: bytes = b''
+    content_type: str = 'text/html; charset=utf-8'
+    headers: Dict[str, str] = field(default_factory=dict)
+    chunks: Optional[Iterable[bytes]] = None
+    file: Optional[FileBody] = None
+
+    def header_items(self) -> List[Tuple[str, str]]:
+        """Все заголовки ответа, включая Content-Type и Content-Length."""
+        if self.status in (204, 304):
+            # Ответы без тела
+            return list(self.headers.items())
+        if self.chunks is not None:
+            items = [('Content-Type', self.content_type), ('Transfer-Encoding', 'chunked')]
+        elif self.file is not None:
+            items = [('Content-Type', self.content_type), ('Content-Length', str(self.file.length))]
+        else:
+            items = [('Content-Type', self.content_type), ('Content-Length', str(len(self.body)))]
+        items.extend(self.headers.items())
+        return items
+
+    def buffered(self) -> 'Response':
+        """Тот же ответ с телом, собранным из chunks (для клиентов HTTP/1.0)."""
+        if self.chunks is None:
+            return self
+        return replace(self, body=b''.join(self.chunks), chunks=None)
+
+
+def chunked_body(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Закодировать части тела для Transfer-Encoding: chunked."""
+    for chunk in chunks:
+        if chunk:
+            yield b'%x\r\n%s\r\n' % (len(chunk), chunk)
+    yield b'0\r\n\r\n'
+
+
+def html_response(content: str, status: int = 200) -> Response:
+    """HTML-ответ."""
+    return Response(status, content.encode('utf-8'))
+
+
+def error_response(code: int, message: str) -> Response:
+    """Ответ с ошибкой в формате JSON."""
+    body = json.dumps({'error': message, 'code': code}).encode('utf-8')
+    return Response(code, body, 'application/json; charset=utf-8')
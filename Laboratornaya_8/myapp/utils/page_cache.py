@@ -0,0 +1,100 @@
+"""Кэш отрендеренных страниц с инвалидацией по версиям данных."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Optional
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    """Готовая страница в байтах."""
+
+    body: bytes
+    content_type: str
+    etag: str
+
+
+def make_etag(body: bytes) -> str:
+    """
+    Слабый ETag по содержимому страницы.
+
+    Слабый, потому что сжатые gzip и deflate варианты страницы
+    семантически равны несжатому и получают тот же тег.
+    """
+    return 'W/"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Проверить If-None-Match (слабое сравнение, RFC 9110).
+
+    Args:
+        if_none_match: Значение заголовка If-None-Match
+        etag: Текущий ETag страницы
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class PageCache:
+    """
+    LRU-кэш страниц.
+
+    Ключ включает версии данных, от которых зависит страница, поэтому
+    после изменения данных старые записи просто перестают запрашиваться
+    и вытесняются, явная инвалидация не нужна.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Args:
+            max_entries: Максимальное число страниц в кэше
+        """
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, CachedPage]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[CachedPage]:
+        """Страница по ключу или None."""
+        with self._lock:
+            page = self._entries.get(key)
+            if page is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return page
+
+    def put(self, key: Hashable, body: bytes, content_type: str) -> CachedPage:
+        """Сохранить страницу и вернуть её запись."""
+        page = CachedPage(body, content_type, make_etag(body))
+        with self._lock:
+            self._entries[key] = page
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return page
+
+    def clear(self) -> None:
+        """Очистить кэш."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Статистика кэша."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
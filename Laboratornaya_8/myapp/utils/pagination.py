@@ -0,0 +1,86 @@
+"""Постраничная выдача списков по параметрам запроса."""
+
+from dataclasses import dataclass
+from typing import Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar('T')
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+
+def query_int(query: Dict[str, List[str]], name: str, default: int,
+              minimum: int = 1, maximum: Optional[int] = None) -> int:
+    """
+    Целый параметр запроса.
+
+    Некорректное значение заменяется на default, выходящее за границы -
+    на ближайшую границу: ссылка с неверным параметром открывает
+    страницу, а не ошибку.
+    """
+    try:
+        value = int(query.get(name, [default])[0])
+    except (TypeError, ValueError):
+        value = default
+    value = max(value, minimum)
+    if maximum is not None:
+        value = min(value, maximum)
+    return value
+
+
+def paging_params(query: Dict[str, List[str]], default_per_page: int = DEFAULT_PER_PAGE,
+                  max_per_page: int = MAX_PER_PAGE) -> Tuple[int, int]:
+    """
+    Номер страницы и размер страницы из ?page= и ?per_page=.
+
+    Returns:
+        Кортеж (page, per_page)
+    """
+    return (query_int(query, 'page', 1),
+            query_int(query, 'per_page', default_per_page, maximum=max_per_page))
+
+
+@dataclass
+class Page(Generic[T]):
+    """Одна страница списка."""
+
+    items: List[T]
+    page: int
+    per_page: int
+    total: int
+    # id последнего элемента для курсорной выдачи (?after=), None - страница последняя
+    next_cursor: Optional[int] = None
+
+    @property
+    def pages(self) -> int:
+        """Число страниц (не меньше одной)."""
+        return max(1, -(-self.total // self.per_page))
+
+    @property
+    def has_prev(self) -> bool:
+        return self.page > 1
+
+    @property
+    def has_next(self) -> bool:
+        return self.page < self.pages
+
+    @property
+    def offset(self) -> int:
+        """Номер первого элемента страницы (с нуля)."""
+        return (self.page - 1) * self.per_page
+
+
+def clamp_page(page: int, per_page: int, total: int) -> int:
+    """Номер страницы, ограниченный последней существующей."""
+    return min(page, max(1, -(-total // per_page)))
+
+
+def paginate(items: Sequence[T], page: int, per_page: int) -> Page[T]:
+    """
+    Страница списка: срез длиной не больше per_page.
+
+    Номер страницы за концом списка заменяется на последнюю страницу.
+    """
+    page = clamp_page(page, per_page, len(items))
+    offset = (page - 1) * per_page
+    return Page(list(items[offset:offset + per_page]), page, per_page, len(items))
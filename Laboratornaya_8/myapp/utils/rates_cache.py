@@ -0,0 +1,216 @@
+"""Кэш курсов валют с TTL и условными HTTP-запросами."""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import requests
+
+
+@dataclass
+class CacheEntry:
+    """Запись кэша: разобранная таблица Valute и метаданные ответа."""
+
+    valute: Dict[str, Dict]
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    timestamp: Optional[str] = None
+
+
+def _parse_feed_time(value: Optional[str]) -> Optional[float]:
+    """Преобразовать дату из фида ЦБ (ISO 8601 со смещением) во время UNIX."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def compute_expires_at(data: Dict, now: float, min_ttl: float) -> float:
+    """
+    Вычислить момент устаревания данных по полям фида.
+
+    Если в фиде есть NextDate, данные актуальны до неё. Иначе следующая
+    публикация ожидается через сутки после Timestamp. Если расчётный срок
+    уже прошёл (выходные, задержка публикации), данные перепроверяются
+    не раньше чем через min_ttl секунд.
+    """
+    expires_at = _parse_feed_time(data.get('NextDate'))
+    if expires_at is None:
+        published_at = _parse_feed_time(data.get('Timestamp'))
+        if published_at is not None:
+            expires_at = published_at + timedelta(days=1).total_seconds()
+
+    if expires_at is None or expires_at < now + min_ttl:
+        return now + min_ttl
+    return expires_at
+
+
+class RatesCache:
+    """
+    Кэш таблицы Valute из ежедневного фида ЦБ.
+
+    Пока запись свежая, сеть не используется. После истечения срока
+    выполняется условный запрос (If-None-Match / If-Modified-Since):
+    ответ 304 продлевает запись без повторного разбора JSON. При ошибке
+    источника возвращаются устаревшие данные, если они есть.
+    """
+
+    def __init__(self, min_ttl: float = 300.0):
+        """
+        Args:
+            min_ttl: Минимальное время жизни записи в секундах
+        """
+        self.min_ttl = min_ttl
+        self._entries: Dict[str, CacheEntry] = {}
+        self._lock = threading.Lock()
+
+        # Счётчики обращений
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stale_hits = 0
+
+    def get(self, url: str, timeout: float = 10, allow_stale: bool = True) -> Dict[str, Dict]:
+        """
+        Получить таблицу Valute по URL фида.
+
+        Args:
+            url: Адрес JSON-фида
+            timeout: Таймаут запроса в секундах
+            allow_stale: Возвращать устаревшие данные при ошибке источника
+
+        Returns:
+            Словарь вида {символьный код: данные валюты из фида}
+
+        Raises:
+            requests.RequestException: При ошибке сети и пустом кэше
+            ValueError: При некорректном JSON и пустом кэше
+            KeyError: При отсутствии ключа 'Valute' и пустом кэше
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None and now < entry.expires_at:
+                self.hits += 1
+                return entry.valute
+            self.misses += 1
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        try:
+            response = requests.get(url, headers=headers, timeout=timeout)
+
+            if response.status_code == 304 and entry is not None:
+                with self._lock:
+                    self.revalidated += 1
+                    entry.expires_at = now + self.min_ttl
+                return entry.valute
+
+            response.raise_for_status()
+            data = response.json()
+            valute = data['Valute']
+        except (requests.RequestException, ValueError, KeyError, TypeError):
+            if entry is None or not allow_stale:
+                raise
+            # Источник недоступен - отдаём последние известные данные
+            with self._lock:
+                self.stale_hits += 1
+            return entry.valute
+
+        new_entry = CacheEntry(
+            valute=valute,
+            expires_at=compute_expires_at(data, now, self.min_ttl),
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            timestamp=data.get('Timestamp')
+        )
+        with self._lock:
+            self._entries[url] = new_entry
+        return valute
+
+    def peek(self, url: str) -> Optional[CacheEntry]:
+        """Получить запись кэша без обращения к сети."""
+        with self._lock:
+            return self._entries.get(url)
+
+    def clear(self) -> None:
+        """Очистить кэш и обнулить счётчики."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.revalidated = 0
+            self.stale_hits = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Получить счётчики обращений к кэшу."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidated': self.revalidated,
+                'stale_hits': self.stale_hits,
+                'entries': len(self._entries)
+            }
+
+
+class RatesSnapshot:
+    """
+    Последняя успешно полученная таблица Valute, сохранённая на диск.
+
+    Используется как резерв, когда источник недоступен, а в памяти
+    данных нет (например, сразу после перезапуска сервера).
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Путь к JSON-файлу снимка
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._saved_timestamp: Optional[str] = None
+
+    def save(self, valute: Dict[str, Dict], timestamp: Optional[str] = None) -> bool:
+        """
+        Сохранить таблицу, если она отличается от уже сохранённой.
+
+        Запись атомарна: файл пишется во временный и переименовывается.
+
+        Returns:
+            True, если файл был перезаписан
+        """
+        with self._lock:
+            if timestamp is not None and timestamp == self._saved_timestamp:
+                return False
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'timestamp': timestamp, 'saved_at': time.time(), 'Valute': valute},
+                          f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._saved_timestamp = timestamp
+            return True
+
+    def load(self) -> Optional[Dict[str, Dict]]:
+        """Загрузить сохранённую таблицу Valute (None, если снимка нет)."""
+        with self._lock:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return None
+        valute = data.get('Valute') if isinstance(data, dict) else None
+        return valute if isinstance(valute, dict) else None
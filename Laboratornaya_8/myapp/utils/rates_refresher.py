@@ -0,0 +1,113 @@
+"""Фоновое обновление курсов валют с атомарной подменой снимка."""
+
+import threading
+import time
+from typing import Callable, List, Optional
+
+from models import Currency
+from utils.currencies_api import CBR_DAILY_URL, rates_cache
+from utils.rates_cache import RatesCache
+
+
+class RatesRefresher:
+    """
+    Фоновый поток, периодически строящий новый список Currency.
+
+    Список собирается целиком вне обработки запросов и передаётся в
+    publish, который подменяет снимок одной операцией присваивания
+    ссылки, поэтому читатели всегда видят либо старый, либо новый готовый
+    снимок. Опубликованные списки не изменяются. При ошибке загрузки
+    publish не вызывается и остаётся предыдущий снимок; ошибка внутри
+    publish тоже только записывается в last_error.
+
+    Следующее обновление планируется на момент устаревания записи
+    rates_cache, то есть на ожидаемое время публикации нового фида.
+    """
+
+    def __init__(
+            self,
+            loader: Callable[[], List[Currency]],
+            publish: Callable[[List[Currency]], None],
+            min_interval: float = 60.0,
+            max_interval: float = 3600.0,
+            cache: RatesCache = rates_cache,
+            url: str = CBR_DAILY_URL
+    ):
+        """
+        Args:
+            loader: Функция, возвращающая новый список валют
+            publish: Функция, получающая каждый новый снимок
+            min_interval: Минимальная пауза между обновлениями в секундах
+            max_interval: Максимальная пауза между обновлениями в секундах
+            cache: Кэш фида, по которому определяется время публикации
+            url: URL фида в кэше
+        """
+        self.loader = loader
+        self.publish = publish
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.cache = cache
+        self.url = url
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.last_refresh: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def refresh(self) -> bool:
+        """
+        Построить новый снимок и опубликовать его.
+
+        Returns:
+            True при успехе; при ошибке загрузки или публикации (например,
+            записи в базу) остаётся предыдущий снимок
+        """
+        try:
+            currencies = list(self.loader())
+            self.publish(currencies)
+        except Exception as e:
+            # Ошибка не должна останавливать фоновый поток или запуск сервера
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"Ошибка обновления курсов: {self.last_error}")
+            return False
+
+        self.last_refresh = time.time()
+        self.last_error = None
+        return True
+
+    def next_delay(self, now: Optional[float] = None) -> float:
+        """Пауза до следующего обновления в секундах."""
+        now = time.time() if now is None else now
+        entry = self.cache.peek(self.url)
+        if entry is None:
+            delay = self.min_interval
+        else:
+            delay = entry.expires_at - now
+        return min(max(delay, self.min_interval), self.max_interval)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.next_delay()):
+            self.refresh()
+
+    def start(self, prime: bool = True) -> None:
+        """
+        Запустить фоновый поток.
+
+        Args:
+            prime: Синхронно построить первый снимок до возврата
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if prime:
+            self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='rates-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Остановить фоновый поток."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
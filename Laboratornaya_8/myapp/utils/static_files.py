@@ -0,0 +1,266 @@
+"""Раздача статических файлов из каталога static/."""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from collections import OrderedDict
+from email.utils import formatdate
+from typing import Dict, Optional, Tuple
+
+from utils.compression import choose_encoding, is_compressible
+from utils.http_messages import FileBody, Request, Response, error_response
+from utils.page_cache import etag_matches
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'static')
+STATIC_PREFIX = '/static/'
+
+# Файлы с отпечатком содержимого в имени не меняются - кэшируются на год
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Файлы без отпечатка (или с устаревшим) перепроверяются по ETag
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# Сторонние библиотеки берутся с CDN, пока их копия не положена в static/
+CDN_FALLBACKS = {
+    'vendor/bootstrap/bootstrap.min.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+    'vendor/bootstrap/bootstrap.bundle.min.js':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+    'vendor/bootstrap-icons/bootstrap-icons.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.10.0/font/bootstrap-icons.css',
+}
+
+# имя.<10 шестнадцатеричных цифр>.расширение
+_FINGERPRINTED = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{10})(?P<suffix>\.[^./]+)$')
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Разобрать заголовок Range с одним диапазоном байтов.
+
+    Returns:
+        (начало, длина) или None, если заголовка нет, он не поддерживается
+        или синтаксически неверен, например bytes=5-2 (тогда по RFC 9110
+        заголовок игнорируется и отдаётся весь файл)
+
+    Raises:
+        ValueError: Если диапазон не пересекается с файлом (ответ 416)
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if match is None or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        # bytes=-N: последние N байтов
+        length = min(int(last), size)
+        if length == 0:
+            raise ValueError(header)
+        return size - length, length
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(header)
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end - start + 1
+
+
+class StaticFiles:
+    """
+    Статические файлы с отпечатками содержимого в URL.
+
+    url('css/app.css') даёт '/static/css/app.<хэш>.css': такой адрес
+    меняется вместе с файлом, поэтому ответ кэшируется браузером на год.
+    Рядом с файлом может лежать сжатая копия .gz (см. precompress) - она
+    отдаётся клиентам, принимающим gzip. Небольшие файлы держатся в LRU
+    в памяти, остальные отправляются через sendfile.
+    """
+
+    def __init__(self, root: str = STATIC_DIR, hot_max_entries: int = 64,
+                 hot_max_file_size: int = 256 * 1024):
+        """
+        Args:
+            root: Каталог статических файлов
+            hot_max_entries: Сколько файлов держать в памяти
+            hot_max_file_size: Файлы больше этого размера всегда читаются с диска
+        """
+        self.root = os.path.realpath(root)
+        self.hot_max_entries = hot_max_entries
+        self.hot_max_file_size = hot_max_file_size
+        self._lock = threading.Lock()
+        # путь -> (mtime, размер, отпечаток): одна запись на файл
+        self._fingerprints: Dict[str, Tuple[int, int, str]] = {}
+        # (путь, mtime, размер) -> содержимое
+        self._hot: 'OrderedDict[Tuple[str, int, int], bytes]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _resolve(self, relative: str) -> Optional[str]:
+        """Абсолютный путь файла внутри root или None."""
+        path = os.path.realpath(os.path.join(self.root, relative))
+        if os.path.commonpath([self.root, path]) != self.root or not os.path.isfile(path):
+            return None
+        return path
+
+    def _fingerprint(self, path: str, stat: os.stat_result) -> str:
+        """Отпечаток содержимого (пересчитывается только после изменения файла)."""
+        with self._lock:
+            entry = self._fingerprints.get(path)
+        if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+            return entry[2]
+        digest = hashlib.blake2b(digest_size=5)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(64 * 1024), b''):
+                digest.update(block)
+        fingerprint = digest.hexdigest()
+        with self._lock:
+            self._fingerprints[path] = (stat.st_mtime_ns, stat.st_size, fingerprint)
+        return fingerprint
+
+    def url(self, relative: str) -> str:
+        """
+        Адрес файла для шаблонов.
+
+        Для отсутствующих библиотек из CDN_FALLBACKS возвращается адрес CDN.
+        """
+        path = self._resolve(relative)
+        if path is None:
+            return CDN_FALLBACKS.get(relative, STATIC_PREFIX + relative)
+        stem, suffix = os.path.splitext(relative)
+        return f"{STATIC_PREFIX}{stem}.{self._fingerprint(path, os.stat(path))}{suffix}"
+
+    def _read(self, path: str, stat: os.stat_result) -> Optional[bytes]:
+        """Содержимое небольшого файла из LRU (None - файл слишком большой)."""
+        if stat.st_size > self.hot_max_file_size:
+            return None
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            body = self._hot.get(key)
+            if body is not None:
+                self._hot.move_to_end(key)
+                self.hits += 1
+                return body
+        with open(path, 'rb') as f:
+            body = f.read()
+        with self._lock:
+            self.misses += 1
+            self._hot[key] = body
+            while len(self._hot) > self.hot_max_entries:
+                self._hot.popitem(last=False)
+        return body
+
+    def serve(self, request: Request) -> Response:
+        """Ответ на GET /static/<путь>."""
+        relative = request.path[len(STATIC_PREFIX):]
+        cache_control = REVALIDATE_CACHE_CONTROL
+        path = self._resolve(relative)
+        if path is None:
+            match = _FINGERPRINTED.match(relative)
+            if match is None:
+                return error_response(404, "Файл не найден")
+            path = self._resolve(match.group('stem') + match.group('suffix'))
+            if path is None:
+                return error_response(404, "Файл не найден")
+            if match.group('hash') == self._fingerprint(path, os.stat(path)):
+                cache_control = IMMUTABLE_CACHE_CONTROL
+
+        stat = os.stat(path)
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type == 'application/javascript':
+            content_type += '; charset=utf-8'
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        # Сжатая копия - другое представление и другой сильный ETag
+        gz_etag = etag[:-1] + '-gz"'
+        headers = {
+            'ETag': etag,
+            'Last-Modified': formatdate(stat.st_mtime, usegmt=True),
+            'Cache-Control': cache_control,
+            'Accept-Ranges': 'bytes',
+        }
+        if_none_match = request.headers.get('if-none-match')
+        if etag_matches(if_none_match, etag) or etag_matches(if_none_match, gz_etag):
+            return Response(304, headers=headers)
+
+        # Диапазоны отдаются только из несжатого файла; If-Range с другим
+        # ETag означает, что файл изменился - тогда отдаётся целиком
+        range_header = request.headers.get('range')
+        if range_header and request.headers.get('if-range', etag) == etag:
+            try:
+                byte_range = parse_range(range_header, stat.st_size)
+            except ValueError:
+                headers['Content-Range'] = f"bytes */{stat.st_size}"
+                return Response(416, content_type=content_type, headers=headers)
+            if byte_range is not None:
+                start, length = byte_range
+                headers['Content-Range'] = f"bytes {start}-{start + length - 1}/{stat.st_size}"
+                return self._file_response(206, path, stat, start, length, content_type, headers)
+
+        if is_compressible(content_type):
+            headers['Vary'] = 'Accept-Encoding'
+            gz_path = path + '.gz'
+            if (choose_encoding(request.headers.get('accept-encoding')) == 'gzip'
+                    and os.path.isfile(gz_path) and os.stat(gz_path).st_mtime >= stat.st_mtime):
+                headers['Content-Encoding'] = 'gzip'
+                headers['ETag'] = gz_etag
+                gz_stat = os.stat(gz_path)
+                return self._file_response(200, gz_path, gz_stat, 0, gz_stat.st_size,
+                                           content_type, headers)
+        return self._file_response(200, path, stat, 0, stat.st_size, content_type, headers)
+
+    def _file_response(self, status: int, path: str, stat: os.stat_result, start: int,
+                       length: int, content_type: str, headers: Dict[str, str]) -> Response:
+        """Тело из памяти для небольших файлов, иначе - участок файла для sendfile."""
+        body = self._read(path, stat)
+        if body is not None:
+            return Response(status, body[start:start + length], content_type, headers)
+        return Response(status, content_type=content_type, headers=headers,
+                        file=FileBody(path, start, length))
+
+    def stats(self) -> Dict[str, int]:
+        """Попадания и промахи LRU файлов в памяти."""
+        with self._lock:
+            return {'entries': len(self._hot), 'hits': self.hits, 'misses': self.misses}
+
+
+# Общий экземпляр: его url() - функция static_url в шаблонах
+static_files = StaticFiles()
+
+
+def precompress(root: str = STATIC_DIR, min_size: int = 1024) -> int:
+    """
+    Создать сжатые копии .gz для текстовых файлов каталога.
+
+    Копии пересоздаются, только если исходный файл новее.
+
+    Returns:
+        Количество созданных копий
+    """
+    created = 0
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            content_type = mimetypes.guess_type(path)[0]
+            if name.endswith('.gz') or not content_type or not is_compressible(content_type):
+                continue
+            gz_path = path + '.gz'
+            if os.path.getsize(path) < min_size or (
+                    os.path.exists(gz_path) and os.path.getmtime(gz_path) >= os.path.getmtime(path)):
+                continue
+            with open(path, 'rb') as f:
+                data = gzip.compress(f.read(), compresslevel=9, mtime=0)
+            with open(gz_path, 'wb') as f:
+                f.write(data)
+            created += 1
+    return created
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Сжатие статических файлов заранее")
+    parser.add_argument('--root', default=STATIC_DIR, help="Каталог статических файлов")
+    args = parser.parse_args()
+    print(f"Создано сжатых копий: {precompress(args.root)}")
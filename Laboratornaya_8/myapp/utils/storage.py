@@ -0,0 +1,372 @@
+"""Хранение пользователей, валют и подписок в SQLite."""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from models import Currency, User, UserCurrency
+from utils.user_repository import DuplicateUserError, normalize_name
+
+DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'app.sqlite3'
+)
+
+# Миграции схемы по порядку; номер применённой хранится в PRAGMA user_version
+MIGRATIONS: List[str] = [
+    # 1: пользователи, валюты и подписки
+    """
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        name_key TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE currencies (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        num_code TEXT NOT NULL,
+        char_code TEXT NOT NULL UNIQUE,
+        name TEXT NOT NULL,
+        value REAL NOT NULL,
+        nominal INTEGER NOT NULL
+    );
+    CREATE TABLE user_currency (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+        currency_id INTEGER NOT NULL REFERENCES currencies (id) ON DELETE CASCADE
+    );
+    -- Уникальный индекс по (user_id, currency_id) служит и индексом по user_id
+    CREATE UNIQUE INDEX user_currency_by_user ON user_currency (user_id, currency_id);
+    CREATE INDEX user_currency_by_currency ON user_currency (currency_id);
+    """,
+    # 2: счётчики изменений - по ним процессы с общей базой узнают о чужих записях
+    """
+    CREATE TABLE data_version (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    );
+    INSERT INTO data_version (name, version) VALUES ('users', 0), ('subscriptions', 0);
+    """,
+]
+
+# Тексты запросов - константы: sqlite3 кэширует подготовленные выражения
+# каждого соединения по тексту SQL, и повторный вызов не компилирует запрос
+_SELECT_USERS = "SELECT id, name FROM users ORDER BY id"
+_INSERT_USER = "INSERT INTO users (id, name, name_key) VALUES (?, ?, ?)"
+_CREATE_USER = "INSERT INTO users (name, name_key) VALUES (?, ?)"
+_RENAME_USER = "UPDATE users SET name = ?, name_key = ? WHERE id = ?"
+_DELETE_USER = "DELETE FROM users WHERE id = ?"
+_NEXT_USER_ID = "SELECT seq FROM sqlite_sequence WHERE name = 'users'"
+
+_SELECT_CURRENCIES = "SELECT id, num_code, char_code, name, value, nominal FROM currencies ORDER BY id"
+_UPSERT_CURRENCY = (
+    "INSERT INTO currencies (num_code, char_code, name, value, nominal) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (char_code) DO UPDATE SET "
+    "num_code = excluded.num_code, name = excluded.name, "
+    "value = excluded.value, nominal = excluded.nominal"
+)
+_CURRENCY_IDS = "SELECT char_code, id FROM currencies"
+
+_SELECT_SUBSCRIPTIONS = "SELECT id, user_id, currency_id FROM user_currency ORDER BY id"
+_INSERT_SUBSCRIPTION = "INSERT OR IGNORE INTO user_currency (user_id, currency_id) VALUES (?, ?)"
+_SUBSCRIPTION_ID = "SELECT id FROM user_currency WHERE user_id = ? AND currency_id = ?"
+_DELETE_SUBSCRIPTION = "DELETE FROM user_currency WHERE user_id = ? AND currency_id = ?"
+_USER_CURRENCY_IDS = "SELECT currency_id FROM user_currency WHERE user_id = ?"
+_CURRENCY_USER_IDS = "SELECT user_id FROM user_currency WHERE currency_id = ?"
+
+_BUMP_VERSION = "UPDATE data_version SET version = version + 1 WHERE name = ?"
+_SELECT_VERSION = "SELECT version FROM data_version WHERE name = ?"
+_SELECT_VERSIONS = "SELECT name, version FROM data_version"
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Применить недостающие миграции.
+
+    Returns:
+        Количество применённых миграций
+    """
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, script in enumerate(MIGRATIONS[current:], start=current + 1):
+        try:
+            conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {number};\nCOMMIT;")
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+    return len(MIGRATIONS) - current
+
+
+class Storage:
+    """
+    Пользователи, валюты и подписки в SQLite.
+
+    Каждый поток работает через своё соединение, база открыта в режиме
+    WAL: читатели не блокируют писателя и друг друга. Пакетные вставки
+    выполняются через executemany одной транзакцией.
+
+    Каждая транзакция, меняющая пользователей или подписки, увеличивает
+    их счётчик в таблице data_version (см. versions()): процессы с общей
+    базой сравнивают его со своим и перезагружают индексы в памяти.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, batch_size: int = 10000):
+        """
+        Args:
+            path: Путь к файлу базы или ':memory:' (общая база для всех потоков)
+            batch_size: Число строк в одной транзакции пакетной вставки
+        """
+        if path == ':memory:':
+            self._target = f"file:app_storage_{id(self)}?mode=memory&cache=shared"
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._target = path
+        self.path = path
+        self.batch_size = batch_size
+
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        # Первое соединение применяет миграции (и держит базу в памяти)
+        migrate(self._connection())
+
+    def _connection(self) -> sqlite3.Connection:
+        """Соединение текущего потока."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self._target, uri=self.path == ':memory:',
+                                   check_same_thread=False, cached_statements=256)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA foreign_keys = ON")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """Закрыть соединения всех потоков."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def _execute_batches(self, sql: str, rows: Iterable[Tuple], *versions: str) -> int:
+        """
+        Выполнить sql для всех строк пакетами по batch_size в транзакции.
+
+        Счётчики versions увеличиваются в транзакции каждого пакета.
+        """
+        conn = self._connection()
+        total = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                with conn:
+                    conn.executemany(sql, batch)
+                    self._bump(conn, *versions)
+                total += len(batch)
+                batch = []
+        if batch:
+            with conn:
+                conn.executemany(sql, batch)
+                self._bump(conn, *versions)
+            total += len(batch)
+        return total
+
+    # Счётчики изменений
+
+    def _bump(self, conn: sqlite3.Connection, *names: str) -> None:
+        """Увеличить счётчики изменений (внутри транзакции записи)."""
+        written = getattr(self._local, 'written', None)
+        if written is None:
+            written = self._local.written = {}
+        for name in names:
+            conn.execute(_BUMP_VERSION, (name,))
+            written[name] = conn.execute(_SELECT_VERSION, (name,)).fetchone()[0]
+
+    def versions(self) -> Dict[str, int]:
+        """Текущие счётчики изменений {'users': ..., 'subscriptions': ...}."""
+        return dict(self._connection().execute(_SELECT_VERSIONS).fetchall())
+
+    def written_version(self, name: str) -> int:
+        """
+        Значение счётчика после последней записи текущего потока.
+
+        Если оно ровно на 1 больше известного индексу, между его загрузкой
+        и этой записью базу никто не менял.
+        """
+        return getattr(self._local, 'written', {}).get(name, 0)
+
+    # Пользователи
+
+    def load_users(self) -> List[User]:
+        """Все пользователи по возрастанию id."""
+        rows = self._connection().execute(_SELECT_USERS).fetchall()
+        # Строки записаны через проверенные модели - повторная проверка не нужна
+        return User.from_rows(rows, validate=False)
+
+    def next_user_id(self) -> int:
+        """Следующий свободный id (удалённые id не переиспользуются)."""
+        row = self._connection().execute(_NEXT_USER_ID).fetchone()
+        return (row[0] if row else 0) + 1
+
+    def insert_user(self, user: User) -> None:
+        """
+        Сохранить пользователя.
+
+        Raises:
+            sqlite3.IntegrityError: Если id или имя уже заняты
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute(_INSERT_USER, (user.id, user.name, normalize_name(user.name)))
+            self._bump(conn, 'users')
+
+    def create_user(self, name: str) -> User:
+        """
+        Сохранить нового пользователя с id, выданным базой.
+
+        id выдаёт AUTOINCREMENT, а уникальность имени проверяет ограничение
+        UNIQUE, поэтому несколько процессов с одной базой не получат
+        одинаковых id или имён.
+
+        Raises:
+            DuplicateUserError: Если имя уже занято
+        """
+        conn = self._connection()
+        try:
+            with conn:
+                cursor = conn.execute(_CREATE_USER, (name, normalize_name(name)))
+                self._bump(conn, 'users')
+        except sqlite3.IntegrityError:
+            raise DuplicateUserError(f"Пользователь '{name}' уже существует")
+        return User(id=cursor.lastrowid, name=name)
+
+    def insert_users(self, users: Iterable[User]) -> int:
+        """Пакетная вставка пользователей."""
+        return self._execute_batches(
+            _INSERT_USER, ((u.id, u.name, normalize_name(u.name)) for u in users), 'users'
+        )
+
+    def rename_user(self, user_id: int, name: str) -> None:
+        """
+        Изменить имя пользователя.
+
+        Raises:
+            DuplicateUserError: Если имя уже занято
+        """
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute(_RENAME_USER, (name, normalize_name(name), user_id))
+                self._bump(conn, 'users')
+        except sqlite3.IntegrityError:
+            raise DuplicateUserError(f"Пользователь '{name}' уже существует")
+
+    def delete_user(self, user_id: int) -> None:
+        """Удалить пользователя вместе с его подписками."""
+        conn = self._connection()
+        with conn:
+            conn.execute(_DELETE_USER, (user_id,))
+            # Подписки удаляются каскадно - меняются оба счётчика
+            self._bump(conn, 'users', 'subscriptions')
+
+    # Валюты
+
+    def load_currencies(self) -> List[Currency]:
+        """Все сохранённые валюты."""
+        rows = self._connection().execute(_SELECT_CURRENCIES).fetchall()
+        return Currency.from_rows(rows, validate=False)
+
+    def upsert_currencies(self, currencies: Iterable[Currency]) -> Dict[str, int]:
+        """
+        Сохранить курсы валют (новые добавляются, известные обновляются).
+
+        id валюты назначает база и не меняет его при обновлении курса,
+        поэтому подписки ссылаются на устойчивые id.
+
+        Returns:
+            Словарь {символьный код: id в базе}
+        """
+        self._execute_batches(
+            _UPSERT_CURRENCY,
+            ((c.num_code, c.char_code, c.name, c.value, c.nominal) for c in currencies)
+        )
+        return dict(self._connection().execute(_CURRENCY_IDS).fetchall())
+
+    # Подписки
+
+    def load_subscriptions(self) -> List[UserCurrency]:
+        """Все подписки."""
+        rows = self._connection().execute(_SELECT_SUBSCRIPTIONS).fetchall()
+        return UserCurrency.from_rows(rows, validate=False)
+
+    def add_subscription(self, user_id: int, currency_id: int) -> int:
+        """
+        Подписать пользователя на валюту (повторная подписка игнорируется).
+
+        Returns:
+            id записи подписки
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute(_INSERT_SUBSCRIPTION, (user_id, currency_id))
+            row = conn.execute(_SUBSCRIPTION_ID, (user_id, currency_id)).fetchone()
+            self._bump(conn, 'subscriptions')
+        return row[0]
+
+    def insert_subscriptions(self, pairs: Iterable[Tuple[int, int]]) -> int:
+        """Пакетная вставка подписок из пар (user_id, currency_id)."""
+        return self._execute_batches(_INSERT_SUBSCRIPTION, pairs, 'subscriptions')
+
+    def remove_subscription(self, user_id: int, currency_id: int) -> None:
+        """Отписать пользователя от валюты."""
+        conn = self._connection()
+        with conn:
+            conn.execute(_DELETE_SUBSCRIPTION, (user_id, currency_id))
+            self._bump(conn, 'subscriptions')
+
+    def user_currency_ids(self, user_id: int) -> List[int]:
+        """id валют, на которые подписан пользователь (по индексу user_id)."""
+        rows = self._connection().execute(_USER_CURRENCY_IDS, (user_id,)).fetchall()
+        return [currency_id for (currency_id,) in rows]
+
+    def currency_user_ids(self, currency_id: int) -> List[int]:
+        """id пользователей, подписанных на валюту (по индексу currency_id)."""
+        rows = self._connection().execute(_CURRENCY_USER_IDS, (currency_id,)).fetchall()
+        return [user_id for (user_id,) in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Число строк в таблицах и версия схемы."""
+        conn = self._connection()
+        result = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ('users', 'currencies', 'user_currency')
+        }
+        result['schema_version'] = conn.execute("PRAGMA user_version").fetchone()[0]
+        return result
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Миграции базы приложения")
+    parser.add_argument('command', choices=('migrate', 'stats'),
+                        help="migrate - применить миграции, stats - размеры таблиц")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="Путь к базе SQLite")
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+        connection = sqlite3.connect(args.db)
+        applied = migrate(connection)
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        connection.close()
+        print(f"Применено миграций: {applied}, версия схемы: {version}")
+    else:
+        storage = Storage(args.db)
+        for name, value in storage.stats().items():
+            print(f"{name}: {value}")
+        storage.close()
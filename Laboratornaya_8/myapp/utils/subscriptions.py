@@ -0,0 +1,175 @@
+"""Индекс подписок пользователей на валюты."""
+
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from models import UserCurrency
+
+_EMPTY: FrozenSet[int] = frozenset()
+
+
+class SubscriptionIndex:
+    """
+    Подписки в двух направлениях: пользователь -> валюты и валюта -> пользователи.
+
+    Подписка, отписка и проверка выполняются за O(1), выборка подписчиков
+    валюты - за время, пропорциональное их числу. Каждая подписка
+    представлена записью UserCurrency.
+
+    storage_version - счётчик изменений базы, которому соответствует
+    индекс (как у UserRepository). Изменения выполняются по одному под
+    блокировкой записи, а блокировка индексов берётся только на время
+    изменения структур в памяти: читатели не ждут записи в SQLite.
+    """
+
+    def __init__(self, records: Iterable[UserCurrency] = (), storage=None):
+        """
+        Args:
+            records: Начальные подписки
+            storage: Хранилище для записи изменений (None - только в памяти)
+        """
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._records: Dict[Tuple[int, int], UserCurrency] = {}
+        self._by_user: Dict[int, Set[int]] = {}
+        self._by_currency: Dict[int, Set[int]] = {}
+        self._next_id = 1
+        self.version = 0
+        self.storage = storage
+        self.storage_version: Optional[int] = None
+
+        for record in records:
+            self._insert(record)
+
+    @classmethod
+    def from_storage(cls, storage) -> 'SubscriptionIndex':
+        """Загрузить подписки из хранилища."""
+        storage_version = storage.versions()['subscriptions']
+        index = cls(storage.load_subscriptions(), storage=storage)
+        index.storage_version = storage_version
+        return index
+
+    def _stored(self) -> None:
+        """Учесть собственную запись в хранилище (под блокировкой записи)."""
+        written = self.storage.written_version('subscriptions')
+        if self.storage_version is not None and written == self.storage_version + 1:
+            self.storage_version = written
+
+    def _insert(self, record: UserCurrency) -> None:
+        """Добавить запись в индексы (под блокировкой)."""
+        self._records[(record.user_id, record.currency_id)] = record
+        self._by_user.setdefault(record.user_id, set()).add(record.currency_id)
+        self._by_currency.setdefault(record.currency_id, set()).add(record.user_id)
+        self._next_id = max(self._next_id, record.id + 1)
+
+    def _discard(self, user_id: int, currency_id: int) -> None:
+        """Удалить запись из индексов (под блокировкой)."""
+        del self._records[(user_id, currency_id)]
+        for index, key, value in ((self._by_user, user_id, currency_id),
+                                  (self._by_currency, currency_id, user_id)):
+            members = index[key]
+            members.discard(value)
+            if not members:
+                del index[key]
+
+    def subscribe(self, user_id: int, currency_id: int) -> bool:
+        """
+        Подписать пользователя на валюту.
+
+        Returns:
+            True, если подписка новая
+        """
+        with self._write_lock:
+            if (user_id, currency_id) in self._records:
+                return False
+            record_id = self._next_id
+            if self.storage is not None:
+                record_id = self.storage.add_subscription(user_id, currency_id)
+                self._stored()
+            with self._lock:
+                self._insert(UserCurrency(record_id, user_id, currency_id))
+                self.version += 1
+            return True
+
+    def unsubscribe(self, user_id: int, currency_id: int) -> bool:
+        """
+        Отписать пользователя от валюты.
+
+        Returns:
+            True, если подписка была
+        """
+        with self._write_lock:
+            if (user_id, currency_id) not in self._records:
+                return False
+            if self.storage is not None:
+                self.storage.remove_subscription(user_id, currency_id)
+                self._stored()
+            with self._lock:
+                self._discard(user_id, currency_id)
+                self.version += 1
+            return True
+
+    def remove_user(self, user_id: int) -> int:
+        """
+        Удалить все подписки пользователя из индекса.
+
+        В хранилище они удаляются каскадно вместе с пользователем
+        (Storage.delete_user в том же потоке непосредственно перед этим).
+
+        Returns:
+            Количество удалённых подписок
+        """
+        with self._write_lock:
+            with self._lock:
+                currency_ids = list(self._by_user.get(user_id, ()))
+                for currency_id in currency_ids:
+                    self._discard(user_id, currency_id)
+                if currency_ids:
+                    self.version += 1
+            if self.storage is not None:
+                self._stored()
+            return len(currency_ids)
+
+    def is_subscribed(self, user_id: int, currency_id: int) -> bool:
+        """Подписан ли пользователь на валюту."""
+        return (user_id, currency_id) in self._records
+
+    def currencies_of(self, user_id: int) -> FrozenSet[int]:
+        """id валют, на которые подписан пользователь."""
+        with self._lock:
+            return frozenset(self._by_user.get(user_id, _EMPTY))
+
+    def subscribers_of(self, currency_id: int) -> FrozenSet[int]:
+        """id пользователей, подписанных на валюту."""
+        with self._lock:
+            return frozenset(self._by_currency.get(currency_id, _EMPTY))
+
+    def count_for_user(self, user_id: int) -> int:
+        """Число подписок пользователя."""
+        return len(self._by_user.get(user_id, _EMPTY))
+
+    def notify_targets(self, changed_currency_ids: Iterable[int]) -> Dict[int, Set[int]]:
+        """
+        Кого уведомить об изменении курсов.
+
+        Args:
+            changed_currency_ids: id валют с изменившимся курсом
+
+        Returns:
+            Словарь {id пользователя: id его изменившихся валют} - по одному
+            уведомлению на пользователя
+        """
+        targets: Dict[int, Set[int]] = {}
+        with self._lock:
+            for currency_id in changed_currency_ids:
+                for user_id in self._by_currency.get(currency_id, _EMPTY):
+                    targets.setdefault(user_id, set()).add(currency_id)
+        return targets
+
+    def records(self) -> List[UserCurrency]:
+        """Все подписки."""
+        with self._lock:
+            return list(self._records.values())
+
+    def __len__(self) -> int:
+        return len(self._records)
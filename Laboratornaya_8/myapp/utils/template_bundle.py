@@ -0,0 +1,115 @@
+"""Предварительная компиляция шаблонов Jinja2 в модули Python."""
+
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, Optional
+
+from jinja2 import ChoiceLoader, Environment, FileSystemLoader, ModuleLoader, select_autoescape
+
+from utils.static_files import static_files
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'templates')
+DEFAULT_BUNDLE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'compiled_templates'
+)
+MANIFEST_NAME = 'manifest.json'
+
+
+def make_environment(loader) -> Environment:
+    """
+    Окружение Jinja2 с настройками приложения.
+
+    Одни и те же настройки используются и при компиляции, и при загрузке
+    пакета: автоэкранирование зашивается в скомпилированный код.
+    auto_reload выключен - загруженные шаблоны не перепроверяются по файлам.
+    Функция static_url даёт адреса статических файлов с отпечатком.
+    """
+    env = Environment(loader=loader, autoescape=select_autoescape(), auto_reload=False)
+    env.globals['static_url'] = static_files.url
+    return env
+
+
+def templates_fingerprint(templates_dir: str = TEMPLATES_DIR) -> Dict[str, str]:
+    """Хэши исходников шаблонов {имя: sha1}."""
+    fingerprint = {}
+    for name in FileSystemLoader(templates_dir).list_templates():
+        with open(os.path.join(templates_dir, name), 'rb') as f:
+            fingerprint[name] = hashlib.sha1(f.read()).hexdigest()
+    return fingerprint
+
+
+def compile_bundle(templates_dir: str = TEMPLATES_DIR, bundle_dir: str = DEFAULT_BUNDLE_DIR) -> int:
+    """
+    Скомпилировать все шаблоны в модули Python.
+
+    Рядом с модулями сохраняется манифест с хэшами исходников, по
+    которому при запуске проверяется, что пакет не устарел.
+
+    Returns:
+        Число скомпилированных шаблонов
+    """
+    env = make_environment(FileSystemLoader(templates_dir))
+    if os.path.isdir(bundle_dir):
+        shutil.rmtree(bundle_dir)
+    os.makedirs(bundle_dir)
+    env.compile_templates(bundle_dir, zip=None, ignore_errors=False)
+
+    fingerprint = templates_fingerprint(templates_dir)
+    tmp_path = os.path.join(bundle_dir, MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(fingerprint, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(bundle_dir, MANIFEST_NAME))
+    return len(fingerprint)
+
+
+def bundle_is_fresh(templates_dir: str = TEMPLATES_DIR, bundle_dir: str = DEFAULT_BUNDLE_DIR) -> bool:
+    """Совпадает ли пакет с текущими исходниками шаблонов."""
+    try:
+        with open(os.path.join(bundle_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return manifest == templates_fingerprint(templates_dir)
+
+
+def load_environment(templates_dir: str = TEMPLATES_DIR,
+                     bundle_dir: Optional[str] = DEFAULT_BUNDLE_DIR,
+                     preload: bool = True) -> Environment:
+    """
+    Создать окружение, по возможности из скомпилированного пакета.
+
+    Если пакет есть и не устарел, шаблоны загружаются из готовых модулей
+    без разбора исходников; иначе компилируются из файлов. При preload все
+    шаблоны загружаются сразу, и первый запрос не платит за компиляцию.
+
+    Args:
+        templates_dir: Каталог с исходниками шаблонов
+        bundle_dir: Каталог скомпилированного пакета (None - не использовать)
+        preload: Загрузить все шаблоны при создании окружения
+    """
+    file_loader = FileSystemLoader(templates_dir)
+    if bundle_dir is not None and bundle_is_fresh(templates_dir, bundle_dir):
+        # Файловый загрузчик остаётся запасным для шаблонов вне пакета
+        loader = ChoiceLoader([ModuleLoader(bundle_dir), file_loader])
+    else:
+        loader = file_loader
+
+    env = make_environment(loader)
+    if preload:
+        for name in file_loader.list_templates():
+            env.get_template(name)
+    return env
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Компиляция шаблонов Jinja2")
+    parser.add_argument('--templates', default=TEMPLATES_DIR, help="Каталог шаблонов")
+    parser.add_argument('--out', default=DEFAULT_BUNDLE_DIR, help="Каталог пакета")
+    args = parser.parse_args()
+
+    count = compile_bundle(args.templates, args.out)
+    print(f"Скомпилировано шаблонов: {count} -> {os.path.abspath(args.out)}")
@@ -0,0 +1,371 @@
+"""Хранилище пользователей в памяти с индексами по id и имени."""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate, chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models import User
+
+
+class DuplicateUserError(ValueError):
+    """Пользователь с таким именем уже существует."""
+
+
+class UserNotFoundError(LookupError):
+    """Пользователь с таким id не найден."""
+
+
+def normalize_name(name: str) -> str:
+    """
+    Ключ имени для проверки дубликатов.
+
+    Регистр и повторяющиеся пробелы не различаются:
+    'Анна  Смирнова' и 'анна смирнова' - одно имя.
+    """
+    return ' '.join(name.split()).casefold()
+
+
+# Больше любого символа Юникода: ключи с префиксом p лежат в [p, p + _MAX_CHAR)
+_MAX_CHAR = '\U0010ffff'
+
+
+class _SortedList:
+    """
+    Отсортированный список, разбитый на блоки не длиннее 2 * load.
+
+    Вставка и удаление сдвигают элементы только внутри одного блока,
+    а не во всём списке; блок для значения находится двоичным поиском
+    по максимумам блоков. Позиции считаются по накопленным длинам
+    блоков, которые пересчитываются при первом чтении после изменения.
+    """
+
+    def __init__(self, load: int = 256):
+        self._load = load
+        self._blocks: List[List[Any]] = []
+        self._maxes: List[Any] = []
+        self._offsets: Optional[List[int]] = None
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Any]:
+        return chain.from_iterable(self._blocks)
+
+    def add(self, value) -> None:
+        """Вставить значение, сохранив порядок (в конец - без сдвигов)."""
+        blocks, maxes = self._blocks, self._maxes
+        if not blocks:
+            blocks.append([value])
+            maxes.append(value)
+        else:
+            i = bisect_left(maxes, value)
+            if i == len(blocks):
+                i -= 1
+                blocks[i].append(value)
+                maxes[i] = value
+            else:
+                insort(blocks[i], value)
+            block = blocks[i]
+            if len(block) > 2 * self._load:
+                blocks[i:i + 1] = [block[:self._load], block[self._load:]]
+                maxes[i:i + 1] = [block[self._load - 1], block[-1]]
+        self._len += 1
+        self._offsets = None
+
+    def remove(self, value) -> None:
+        """
+        Удалить значение.
+
+        Raises:
+            ValueError: Если значения нет
+        """
+        i = bisect_left(self._maxes, value)
+        if i == len(self._blocks):
+            raise ValueError(value)
+        block = self._blocks[i]
+        j = bisect_left(block, value)
+        if block[j] != value:
+            raise ValueError(value)
+        del block[j]
+        if block:
+            self._maxes[i] = block[-1]
+        else:
+            del self._blocks[i]
+            del self._maxes[i]
+        self._len -= 1
+        self._offsets = None
+
+    def _block_offsets(self) -> List[int]:
+        offsets = self._offsets
+        if offsets is None:
+            offsets = self._offsets = list(accumulate((len(b) for b in self._blocks), initial=0))
+        return offsets
+
+    def bisect_left(self, value) -> int:
+        """Позиция первого элемента не меньше value."""
+        i = bisect_left(self._maxes, value)
+        if i == len(self._blocks):
+            return self._len
+        return self._block_offsets()[i] + bisect_left(self._blocks[i], value)
+
+    def bisect_right(self, value) -> int:
+        """Позиция первого элемента больше value."""
+        i = bisect_right(self._maxes, value)
+        if i == len(self._blocks):
+            return self._len
+        return self._block_offsets()[i] + bisect_right(self._blocks[i], value)
+
+    def slice(self, start: int, stop: int) -> List[Any]:
+        """Элементы с позициями от start до stop (не включая stop)."""
+        result: List[Any] = []
+        if start >= stop:
+            return result
+        offsets = self._block_offsets()
+        i = bisect_right(offsets, start) - 1
+        j = start - offsets[i]
+        remaining = stop - start
+        while remaining > 0 and i < len(self._blocks):
+            part = self._blocks[i][j:j + remaining]
+            result.extend(part)
+            remaining -= len(part)
+            i += 1
+            j = 0
+        return result
+
+
+class UserRepository:
+    """
+    Пользователи с индексами id -> User и нормализованное имя -> id.
+
+    Поиск, добавление, переименование и удаление выполняются за O(1).
+    Дополнительно поддерживаются отсортированные по блокам списки id и
+    ключей имён: страницы по id и поиск по началу имени - за O(log n)
+    плюс размер страницы, их обновление сдвигает только один блок.
+    Новые id выдаются монотонно и не переиспользуются после удаления,
+    поэтому новый пользователь добавляется в конец списка id.
+
+    Изменения выполняются по одному под блокировкой записи, поэтому
+    проверка уникальности и запись - одна атомарная операция. Читатели
+    её не ждут: блокировка индексов берётся только на время изменения
+    структур в памяти, запись в хранилище выполняется вне её (чтение
+    страницы из цикла событий не стоит за записью в SQLite).
+
+    Если задано хранилище (utils.storage.Storage), изменения сначала
+    записываются в него и только после успешной записи - в индексы;
+    id новых пользователей тогда выдаёт база, а уникальность имени
+    окончательно проверяет её ограничение UNIQUE. storage_version -
+    счётчик изменений базы, которому соответствуют индексы: если он
+    отстал от Storage.versions(), базу менял другой процесс.
+    """
+
+    def __init__(self, users: Iterable[User] = (), storage=None):
+        """
+        Args:
+            users: Начальные пользователи
+            storage: Хранилище для записи изменений (None - только в памяти)
+
+        Raises:
+            DuplicateUserError: Если среди начальных есть одинаковые имена или id
+        """
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._by_id: Dict[int, User] = {}
+        self._id_by_name: Dict[str, int] = {}
+        self._ids = _SortedList()
+        self._name_index = _SortedList()
+        self._next_id = 1
+        self._snapshot: Optional[List[User]] = None
+        self.version = 0
+        self.storage = storage
+        self.storage_version: Optional[int] = None
+
+        for user in users:
+            self._insert(user)
+
+    @classmethod
+    def from_storage(cls, storage) -> 'UserRepository':
+        """Загрузить пользователей из хранилища и продолжить его счётчик id."""
+        # Счётчик читается до загрузки: запись между ними вызовет лишнюю
+        # перезагрузку, но не пропуск изменений
+        storage_version = storage.versions()['users']
+        repository = cls(storage.load_users(), storage=storage)
+        repository._next_id = max(repository._next_id, storage.next_user_id())
+        repository.storage_version = storage_version
+        return repository
+
+    def _insert(self, user: User) -> None:
+        """Добавить готового пользователя в индексы (под блокировкой)."""
+        key = normalize_name(user.name)
+        if user.id in self._by_id or key in self._id_by_name:
+            raise DuplicateUserError(f"Пользователь '{user.name}' уже существует")
+        self._by_id[user.id] = user
+        self._id_by_name[key] = user.id
+        self._ids.add(user.id)
+        self._name_index.add((key, user.id))
+        self._next_id = max(self._next_id, user.id + 1)
+        self._changed()
+
+    def _changed(self) -> None:
+        self._snapshot = None
+        self.version += 1
+
+    def _stored(self) -> None:
+        """Учесть собственную запись в хранилище (под блокировкой записи)."""
+        written = self.storage.written_version('users')
+        if self.storage_version is not None and written == self.storage_version + 1:
+            self.storage_version = written
+
+    def add(self, name: str) -> User:
+        """
+        Создать пользователя с новым id.
+
+        Raises:
+            DuplicateUserError: Если имя уже занято
+        """
+        with self._write_lock:
+            if normalize_name(name) in self._id_by_name:
+                raise DuplicateUserError(f"Пользователь '{name}' уже существует")
+            if self.storage is not None:
+                user = self.storage.create_user(name)
+                self._stored()
+            else:
+                user = User(id=self._next_id, name=name)
+            with self._lock:
+                self._insert(user)
+            return user
+
+    def rename(self, user_id: int, new_name: str) -> str:
+        """
+        Переименовать пользователя.
+
+        Returns:
+            Прежнее имя
+
+        Raises:
+            UserNotFoundError: Если пользователя нет
+            DuplicateUserError: Если имя занято другим пользователем
+        """
+        with self._write_lock:
+            user = self._by_id.get(user_id)
+            if user is None:
+                raise UserNotFoundError(user_id)
+            new_key = normalize_name(new_name)
+            owner = self._id_by_name.get(new_key)
+            if owner is not None and owner != user_id:
+                raise DuplicateUserError(f"Пользователь '{new_name}' уже существует")
+
+            if self.storage is not None:
+                self.storage.rename_user(user_id, new_name)
+                self._stored()
+            with self._lock:
+                old_name = user.name
+                old_key = normalize_name(old_name)
+                del self._id_by_name[old_key]
+                self._name_index.remove((old_key, user_id))
+                user.name = new_name
+                self._id_by_name[new_key] = user_id
+                self._name_index.add((new_key, user_id))
+                self._changed()
+            return old_name
+
+    def delete(self, user_id: int) -> User:
+        """
+        Удалить пользователя.
+
+        Returns:
+            Удалённый пользователь
+
+        Raises:
+            UserNotFoundError: Если пользователя нет
+        """
+        with self._write_lock:
+            if user_id not in self._by_id:
+                raise UserNotFoundError(user_id)
+            if self.storage is not None:
+                self.storage.delete_user(user_id)
+                self._stored()
+            with self._lock:
+                user = self._by_id.pop(user_id)
+                key = normalize_name(user.name)
+                del self._id_by_name[key]
+                self._name_index.remove((key, user_id))
+                self._ids.remove(user_id)
+                self._changed()
+            return user
+
+    def get(self, user_id: int) -> Optional[User]:
+        """Пользователь по id или None."""
+        return self._by_id.get(user_id)
+
+    def find_by_name(self, name: str) -> Optional[User]:
+        """Пользователь по имени (без учёта регистра и лишних пробелов) или None."""
+        user_id = self._id_by_name.get(normalize_name(name))
+        return None if user_id is None else self._by_id.get(user_id)
+
+    def find_by_prefix(self, prefix: str, offset: int = 0,
+                       limit: Optional[int] = None) -> Tuple[List[User], int]:
+        """
+        Пользователи, чьё имя начинается с prefix, по алфавиту.
+
+        Границы совпадений находятся двоичным поиском, поэтому время
+        зависит от размера страницы, а не от числа пользователей.
+
+        Args:
+            prefix: Начало имени (без учёта регистра и лишних пробелов)
+            offset: Сколько первых совпадений пропустить
+            limit: Наибольшее число возвращаемых пользователей (None - все)
+
+        Returns:
+            Кортеж (пользователи страницы, общее число совпадений)
+        """
+        key = normalize_name(prefix)
+        with self._lock:
+            index = self._name_index
+            lo = index.bisect_left((key,))
+            hi = index.bisect_left((key + _MAX_CHAR,))
+            start = min(lo + offset, hi)
+            stop = hi if limit is None else min(start + limit, hi)
+            return [self._by_id[user_id] for _, user_id in index.slice(start, stop)], hi - lo
+
+    def page_after(self, after_id: int, limit: int) -> List[User]:
+        """
+        Пользователи с id больше after_id, не больше limit.
+
+        Курсорная выдача: добавление и удаление пользователей не сдвигает
+        следующие страницы, как при выдаче по номеру страницы.
+        """
+        with self._lock:
+            start = self._ids.bisect_right(after_id)
+            return [self._by_id[user_id] for user_id in self._ids.slice(start, start + limit)]
+
+    def page(self, offset: int, limit: int) -> List[User]:
+        """Пользователи по возрастанию id начиная с позиции offset, не больше limit."""
+        with self._lock:
+            return [self._by_id[user_id] for user_id in self._ids.slice(offset, offset + limit)]
+
+    def all(self) -> List[User]:
+        """
+        Все пользователи по возрастанию id (id выдаются по порядку добавления).
+
+        Список собирается из уже упорядоченного списка id один раз после
+        каждого изменения и общий для всех читателей - изменять его нельзя.
+        Для одной страницы дешевле page() и page_after().
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = [self._by_id[user_id] for user_id in self._ids]
+                snapshot = self._snapshot
+        return snapshot
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._by_id
+
+    def __iter__(self) -> Iterator[User]:
+        return iter(self.all())